@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Compara a extração de texto de EPUBs do caminho anterior (ebooklib e a
+expressão regular <[^<]+?>) com o extrator em uma única passagem, em série
+e com capítulos processados em paralelo.
+
+Uso:
+    python benchmarks/epub_text.py livro1.epub livro2.epub --workers 4
+    python benchmarks/epub_text.py --synthetic-chapters 40 --paragraphs 400
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import shutil
+import zipfile
+import argparse
+import tempfile
+import importlib.util
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "medical_assistant"))
+from book_processor.processor import BookProcessor
+
+# Vocabulário usado para gerar capítulos sintéticos
+SYNTHETIC_WORDS = (
+    "paciente febre tosse dispneia lactente criança pneumonia bronquiolite asma "
+    "amoxicilina paracetamol dose mg/kg tratamento diagnóstico hemograma radiografia"
+).split()
+
+CONTAINER_XML = ('<?xml version="1.0"?><container version="1.0" '
+                 'xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+                 '<rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>'
+                 '</rootfiles></container>')
+
+def synthetic_chapter(rng, paragraphs):
+    """
+    Gera um capítulo XHTML com títulos, parágrafos, marcação em linha,
+    entidades, estilos e scripts.
+    
+    Args:
+        rng (random.Random): Gerador aleatório
+        paragraphs (int): Número de parágrafos
+        
+    Returns:
+        str: Documento XHTML
+    """
+    body = []
+    for index in range(paragraphs):
+        if index % 20 == 0:
+            body.append(f"<h2>Seção {index // 20 + 1} &amp; revisão</h2>")
+        words = [f"<em>{word}</em>" if position % 7 == 0 else word
+                 for position, word in enumerate(rng.choices(SYNTHETIC_WORDS, k=60))]
+        body.append(f'<p class="texto">{" ".join(words)}. Temperatura &gt; 38&#176;C.</p>')
+    return ('<?xml version="1.0" encoding="utf-8"?><!DOCTYPE html>'
+            '<html xmlns="http://www.w3.org/1999/xhtml"><head><title>Capítulo</title>'
+            '<style>p { margin: 0 }</style><script>var nota = "<b>x</b>";</script></head>'
+            f'<body>{"".join(body)}</body></html>')
+
+def make_synthetic_epub(path, chapters, paragraphs, seed=42):
+    """
+    Grava um EPUB sintético.
+    
+    Args:
+        path (str): Caminho do arquivo de saída
+        chapters (int): Número de capítulos
+        paragraphs (int): Parágrafos por capítulo
+        seed (int): Semente do gerador aleatório
+    """
+    rng = random.Random(seed)
+    items = "".join(f'<item id="c{index}" href="cap{index}.xhtml" media-type="application/xhtml+xml"/>'
+                    for index in range(chapters))
+    spine = "".join(f'<itemref idref="c{index}"/>' for index in range(chapters))
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as epub_file:
+        epub_file.writestr("mimetype", "application/epub+zip")
+        epub_file.writestr("META-INF/container.xml", CONTAINER_XML)
+        epub_file.writestr("OEBPS/content.opf",
+                           '<?xml version="1.0"?><package xmlns="http://www.idpf.org/2007/opf" version="3.0" '
+                           'unique-identifier="id"><metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+                           '<dc:identifier id="id">sintetico</dc:identifier><dc:title>Sintético</dc:title>'
+                           '<dc:language>pt</dc:language></metadata>'
+                           f'<manifest>{items}</manifest><spine>{spine}</spine></package>')
+        for index in range(chapters):
+            epub_file.writestr(f"OEBPS/cap{index}.xhtml", synthetic_chapter(rng, paragraphs))
+
+def extract_regex(processor, epub_path, use_ebooklib=False):
+    """
+    Extrai o texto de um EPUB como a versão anterior: cada capítulo é
+    decodificado por inteiro e as tags são removidas com uma expressão regular.
+    
+    Args:
+        processor (BookProcessor): Processador usado para listar os capítulos
+        epub_path (str): Caminho para o arquivo EPUB
+        use_ebooklib (bool): Ler o livro com o ebooklib, como a versão anterior,
+            em vez de ler os capítulos diretamente do arquivo
+            
+    Returns:
+        int: Número de caracteres extraídos
+    """
+    chars = 0
+    if use_ebooklib:
+        import ebooklib
+        from ebooklib import epub
+        for item in epub.read_epub(epub_path).get_items():
+            if item.get_type() == ebooklib.ITEM_DOCUMENT:
+                chars += len(re.sub('<[^<]+?>', '', item.get_content().decode('utf-8')) + "\n")
+        return chars
+    
+    with zipfile.ZipFile(epub_path) as epub_file:
+        for document in processor.list_epub_documents(epub_file):
+            content = epub_file.read(document).decode('utf-8')
+            chars += len(re.sub('<[^<]+?>', '', content) + "\n")
+    return chars
+
+def extract_streaming(processor, books, workers):
+    """
+    Extrai o texto dos EPUBs com o extrator em fluxo.
+    
+    Args:
+        processor (BookProcessor): Processador de livros
+        books (list): Caminhos dos EPUBs
+        workers (int): Número de processos de trabalho
+        
+    Returns:
+        int: Número de caracteres extraídos
+    """
+    chars = 0
+    for _, records in processor.iter_books(books, workers):
+        chars += sum(len(record.text) for record in records)
+    return chars
+
+def main():
+    """
+    Executa a comparação e imprime os tempos de cada caminho.
+    """
+    parser = argparse.ArgumentParser(description="Compara os extratores de texto de EPUB")
+    parser.add_argument("books", nargs="*", help="EPUBs a usar (padrão: EPUB sintético)")
+    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 1,
+                        help="Processos para a extração paralela")
+    parser.add_argument("--synthetic-chapters", type=int, default=40, help="Capítulos do EPUB sintético")
+    parser.add_argument("--paragraphs", type=int, default=400, help="Parágrafos por capítulo sintético")
+    args = parser.parse_args()
+    
+    work_dir = tempfile.mkdtemp(prefix="epub_text_")
+    try:
+        books = args.books
+        if not books:
+            books = [os.path.join(work_dir, "sintetico.epub")]
+            make_synthetic_epub(books[0], args.synthetic_chapters, args.paragraphs)
+        
+        processor = BookProcessor(work_dir)
+        size = sum(os.path.getsize(book) for book in books)
+        print(f"{len(books)} EPUBs, {size / 1e6:.1f} MB comprimidos")
+        
+        results = []
+        if importlib.util.find_spec("ebooklib"):
+            start = time.perf_counter()
+            chars = sum(extract_regex(processor, book, use_ebooklib=True) for book in books)
+            results.append(("ebooklib + regex", time.perf_counter() - start, chars))
+        else:
+            print("ebooklib não instalado: o caminho anterior completo não será medido.")
+        
+        start = time.perf_counter()
+        chars = sum(extract_regex(processor, book) for book in books)
+        results.append(("zip + regex", time.perf_counter() - start, chars))
+        
+        start = time.perf_counter()
+        chars = extract_streaming(processor, books, 1)
+        results.append(("passagem única", time.perf_counter() - start, chars))
+        
+        if args.workers > 1:
+            start = time.perf_counter()
+            chars = extract_streaming(processor, books, args.workers)
+            results.append((f"passagem única x{args.workers}", time.perf_counter() - start, chars))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    baseline = results[0][1]
+    print(f"{'extrator':<20} {'tempo (s)':>10} {'caracteres':>12} {'ganho':>7}")
+    for name, seconds, chars in results:
+        print(f"{name:<20} {seconds:>10.2f} {chars:>12} {baseline / seconds:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Mede o custo por requisição do transporte HTTP dos clientes da API contra um
+servidor local que imita o endpoint de mensagens da Anthropic. Compara uma
+conexão nova a cada requisição (requests.post, como antes do transporte
+compartilhado) com as conexões persistentes do HTTPTransport, pelo cliente
+HTTP direto (requests) e pelo cliente httpx entregue ao SDK, em sequência e
+com várias threads.
+
+O servidor pode atrasar cada conexão nova (--handshake-ms) para simular o
+handshake TCP e TLS de uma rede real, que o servidor local não tem.
+
+Uso:
+    python benchmarks/http_transport.py
+    python benchmarks/http_transport.py --handshake-ms 150 --requests 50 --threads 4
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+import statistics
+import subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "medical_assistant"))
+from ai_integration.http_transport import HTTPTransport
+from simple_anthropic_client import SimpleAnthropicClient
+
+# Resposta no formato da API de mensagens
+MOCK_RESPONSE = json.dumps({
+    "id": "msg_benchmark",
+    "type": "message",
+    "role": "assistant",
+    "model": "claude-3-opus-20240229",
+    "content": [{"type": "text", "text": "Sugestão de teste."}],
+    "stop_reason": "end_turn",
+    "usage": {"input_tokens": 10, "output_tokens": 5}
+}).encode("utf-8")
+
+class MockAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Cabeçalhos e corpo saem em um único envio, sem o atraso do algoritmo de
+    # Nagle com o ACK atrasado do cliente
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024
+    
+    def setup(self):
+        """
+        Registra cada conexão nova e aplica o atraso de handshake simulado.
+        """
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        if self.server.handshake_delay:
+            time.sleep(self.server.handshake_delay)
+    
+    def do_POST(self):
+        """
+        Lê a requisição e devolve uma resposta fixa, mantendo a conexão aberta.
+        """
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(MOCK_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(MOCK_RESPONSE)
+    
+    def log_message(self, format, *args):
+        pass
+
+def start_server(handshake_ms):
+    """
+    Inicia o servidor local em uma thread de fundo.
+    
+    Args:
+        handshake_ms (float): Atraso de cada conexão nova, em milissegundos
+        
+    Returns:
+        ThreadingHTTPServer: Servidor em execução
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockAPIHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.handshake_delay = handshake_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class BareTransport:
+    """
+    Uma conexão nova por requisição, como as chamadas diretas a requests.post.
+    """
+    def post(self, url, **kwargs):
+        return requests.post(url, **kwargs)
+
+class HTTPXTransport:
+    """
+    Requisições pelo cliente httpx que o HTTPTransport entrega ao SDK.
+    """
+    def __init__(self, transport):
+        self.client = transport.httpx_client()
+    
+    def post(self, url, **kwargs):
+        return self.client.post(url, **kwargs)
+
+def measure(server, url, transport, count, threads):
+    """
+    Envia requisições pelo cliente HTTP direto e mede a latência de cada uma.
+    
+    Args:
+        server (ThreadingHTTPServer): Servidor local
+        url (str): Endereço do endpoint
+        transport: Transporte usado pelo cliente
+        count (int): Requisições por thread
+        threads (int): Threads enviando requisições ao mesmo tempo
+        
+    Returns:
+        dict: Latências em milissegundos e conexões abertas
+    """
+    client = SimpleAnthropicClient("chave-de-teste", transport=transport)
+    client.api_url = url
+    latencies = []
+    lock = threading.Lock()
+    
+    def worker():
+        for _ in range(count):
+            start = time.perf_counter()
+            client.get_completion("Paciente com febre há três dias.", "Você é um assistente médico.")
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+    
+    connections = server.connections
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    total = time.perf_counter() - start
+    
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p95_ms": round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)], 3),
+        "requests_per_s": round(len(latencies) / total, 1),
+        "connections_opened": server.connections - connections
+    }
+
+def git_commit():
+    """
+    Identifica o commit atual do repositório.
+    
+    Returns:
+        str: Hash do commit ou None fora de um repositório git
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def main():
+    """
+    Inicia o servidor local, executa as medições e imprime o resultado em JSON.
+    """
+    parser = argparse.ArgumentParser(description="Mede o transporte HTTP dos clientes da API")
+    parser.add_argument("--requests", "-n", type=int, default=30, help="Requisições por thread")
+    parser.add_argument("--threads", "-t", type=int, default=4, help="Threads na medição concorrente")
+    parser.add_argument("--handshake-ms", type=float, default=100.0,
+                        help="Atraso simulado de cada conexão nova, em ms (padrão: 100)")
+    parser.add_argument("--pool-size", type=int, default=4, help="Conexões persistentes do transporte")
+    parser.add_argument("--output", "-o", help="Arquivo JSON de saída (padrão: saída padrão)")
+    args = parser.parse_args()
+    
+    server = start_server(args.handshake_ms)
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/messages"
+    
+    results = {}
+    try:
+        for threads in (1, args.threads):
+            pooled = HTTPTransport(pool_size=args.pool_size)
+            modes = {
+                "bare": BareTransport(),
+                "pooled_requests": pooled,
+                "pooled_httpx": HTTPXTransport(pooled)
+            }
+            measured = {name: measure(server, url, transport, args.requests, threads)
+                        for name, transport in modes.items()}
+            pooled.close()
+            for name in ("pooled_requests", "pooled_httpx"):
+                measured[name]["saving_ms_per_request"] = round(
+                    measured["bare"]["mean_ms"] - measured[name]["mean_ms"], 3)
+            results["sequential" if threads == 1 else f"threads_{threads}"] = measured
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    output = json.dumps({
+        "benchmark": "http_transport",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "requests": requests.__version__,
+        "config": {name: value for name, value in vars(args).items() if name != "output"},
+        "results": results
+    }, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + "\n")
+        print(f"Resultado salvo em: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Mede a ingestão de uma biblioteca pelo BookProcessor: listagem dos livros,
+cada extrator (PDF, EPUB e TXT), processamento completo, montagem da base de
+conhecimento e gravação em disco. A biblioteca sintética é gerada com uma
+semente fixa, de modo que execuções em commits diferentes medem exatamente o
+mesmo corpus. O resultado, com páginas/s, MB/s e pico de memória de cada
+etapa, é impresso em JSON.
+
+Uso:
+    python benchmarks/ingestion.py
+    python benchmarks/ingestion.py --pdf-books 4 --pdf-pages 300 --output resultado.json
+    python benchmarks/ingestion.py --library caminho/da/biblioteca --workers 4
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, "medical_assistant"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from book_processor.processor import BookProcessor, peak_memory_mb
+from kb_format import SYNTHETIC_WORDS
+from epub_text import make_synthetic_epub
+
+# Extrator medido para cada extensão de arquivo
+EXTRACTORS = {
+    ".pdf": "process_pdf",
+    ".epub": "process_epub",
+    ".txt": "process_txt"
+}
+
+def synthetic_lines(rng, count):
+    """
+    Gera linhas de texto médico aleatório.
+    
+    Args:
+        rng (random.Random): Gerador aleatório
+        count (int): Número de linhas
+        
+    Returns:
+        list: Linhas geradas
+    """
+    return [" ".join(rng.choices(SYNTHETIC_WORDS, k=rng.randint(8, 14))).capitalize() + "."
+            for _ in range(count)]
+
+def pdf_string(text):
+    """
+    Codifica um texto como string literal de PDF.
+    
+    Args:
+        text (str): Texto da linha
+        
+    Returns:
+        bytes: String literal entre parênteses, em WinAnsi (latin-1)
+    """
+    escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"(" + escaped.encode('latin-1') + b")"
+
+def make_synthetic_pdf(path, pages, lines_per_page=40, seed=42):
+    """
+    Grava um PDF sintético com uma fonte padrão e texto extraível, sem
+    depender de bibliotecas de geração de PDF.
+    
+    Args:
+        path (str): Caminho do arquivo de saída
+        pages (int): Número de páginas
+        lines_per_page (int): Linhas de texto por página
+        seed (int): Semente do gerador aleatório
+    """
+    rng = random.Random(seed)
+    title = os.path.splitext(os.path.basename(path))[0]
+    kids = " ".join(f"{4 + 2 * page} 0 R" for page in range(pages))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode('ascii'),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    ]
+    for page in range(pages):
+        lines = [f"{title} - Capítulo {page // 20 + 1}"] + synthetic_lines(rng, lines_per_page) + [str(page + 1)]
+        content = b"BT /F1 9 Tf 11 TL 40 780 Td " + b" ".join(pdf_string(line) + b" Tj T*" for line in lines) + b" ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * page} 0 R >>".encode('ascii'))
+        objects.append(f"<< /Length {len(content)} >>\nstream\n".encode('ascii') + content + b"\nendstream")
+    
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode('ascii') + body + b"\nendobj\n"
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('ascii')
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode('ascii')
+    output += (f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+               f"startxref\n{xref}\n%%EOF\n").encode('ascii')
+    with open(path, 'wb') as file:
+        file.write(output)
+
+def make_synthetic_txt(path, size_kb, seed=42):
+    """
+    Grava um arquivo de texto sintético.
+    
+    Args:
+        path (str): Caminho do arquivo de saída
+        size_kb (int): Tamanho aproximado em KB
+        seed (int): Semente do gerador aleatório
+    """
+    rng = random.Random(seed)
+    written = 0
+    with open(path, 'w', encoding='utf-8') as file:
+        while written < size_kb * 1024:
+            paragraph = " ".join(synthetic_lines(rng, 6)) + "\n\n"
+            file.write(paragraph)
+            written += len(paragraph.encode('utf-8'))
+
+def make_synthetic_library(library_path, args):
+    """
+    Gera a biblioteca sintética descrita pelos argumentos.
+    
+    Args:
+        library_path (str): Diretório da biblioteca
+        args (argparse.Namespace): Tamanho de cada formato e semente
+    """
+    os.makedirs(library_path, exist_ok=True)
+    for book in range(args.pdf_books):
+        make_synthetic_pdf(os.path.join(library_path, f"sintetico{book}.pdf"), args.pdf_pages,
+                           seed=args.seed + book)
+    for book in range(args.epub_books):
+        make_synthetic_epub(os.path.join(library_path, f"sintetico{book}.epub"), args.epub_chapters,
+                            args.paragraphs, seed=args.seed + 100 + book)
+    for book in range(args.txt_books):
+        make_synthetic_txt(os.path.join(library_path, f"sintetico{book}.txt"), args.txt_kb,
+                           seed=args.seed + 200 + book)
+
+def count_pages(processor, book_path):
+    """
+    Conta as páginas de um livro: páginas do PDF, documentos do EPUB e uma
+    página por arquivo de texto.
+    
+    Args:
+        processor (BookProcessor): Processador de livros
+        book_path (str): Caminho para o livro
+        
+    Returns:
+        int: Número de páginas
+    """
+    extension = os.path.splitext(book_path)[1].lower()
+    if extension == ".pdf":
+        return processor.count_pdf_pages(book_path)
+    if extension == ".epub":
+        return processor.count_epub_chapters(book_path)
+    return 1
+
+def stage_result(seconds, pages=0, input_bytes=0, chars=0):
+    """
+    Monta o resultado de uma etapa.
+    
+    Args:
+        seconds (float): Tempo da etapa
+        pages (int): Páginas processadas
+        input_bytes (int): Bytes dos arquivos lidos
+        chars (int): Caracteres de texto produzidos
+        
+    Returns:
+        dict: Tempo, vazões e pico de memória do processo até o fim da etapa
+    """
+    elapsed = max(seconds, 1e-9)
+    return {
+        "seconds": round(seconds, 6),
+        "pages": pages,
+        "input_mb": round(input_bytes / (1024 * 1024), 3),
+        "text_mb": round(chars / (1024 * 1024), 3),
+        "pages_per_s": round(pages / elapsed, 1),
+        "input_mb_per_s": round(input_bytes / (1024 * 1024) / elapsed, 3),
+        "text_mb_per_s": round(chars / (1024 * 1024) / elapsed, 3),
+        "peak_rss_mb": peak_memory_mb()
+    }
+
+def run_benchmark(library_path, output_dir, workers, memory_limit):
+    """
+    Executa as etapas da ingestão sobre uma biblioteca.
+    
+    Args:
+        library_path (str): Diretório da biblioteca
+        output_dir (str): Diretório para as saídas gravadas
+        workers (int): Processos de trabalho do processamento completo
+        memory_limit (int): Limite de caracteres em memória (None para sem limite)
+        
+    Returns:
+        dict: Resultado de cada etapa
+    """
+    stages = {}
+    processor = BookProcessor(library_path)
+    processor.ensure_resources()
+    
+    started = time.perf_counter()
+    books = processor.scan_library()
+    stages["scan_library"] = stage_result(time.perf_counter() - started)
+    stages["scan_library"]["books"] = len(books)
+    
+    # Cada extrator, sobre todos os livros do seu formato
+    for extension, method in EXTRACTORS.items():
+        paths = [book for book in books if book.lower().endswith(extension)]
+        if not paths:
+            continue
+        pages = sum(count_pages(processor, book) for book in paths)
+        input_bytes = sum(os.path.getsize(book) for book in paths)
+        started = time.perf_counter()
+        chars = sum(len(getattr(processor, method)(book)) for book in paths)
+        stages[method] = stage_result(time.perf_counter() - started, pages, input_bytes, chars)
+    
+    pages = sum(count_pages(processor, book) for book in books)
+    input_bytes = sum(os.path.getsize(book) for book in books)
+    processor = BookProcessor(library_path, memory_limit=memory_limit,
+                              spill_dir=os.path.join(output_dir, "spill"))
+    started = time.perf_counter()
+    processor.process_books(books, workers=workers)
+    elapsed = time.perf_counter() - started
+    chars = sum(stats["chars"] for stats in processor.book_stats.values())
+    stages["process_books"] = stage_result(elapsed, pages, input_bytes, chars)
+    stages["process_books"]["workers"] = workers
+    
+    started = time.perf_counter()
+    knowledge_base = processor.extract_medical_knowledge()
+    stages["extract_medical_knowledge"] = stage_result(time.perf_counter() - started, pages,
+                                                       chars=len(knowledge_base))
+    
+    started = time.perf_counter()
+    processor.save_knowledge_base(os.path.join(output_dir, "medical_knowledge.txt"))
+    stages["save_knowledge_base"] = stage_result(time.perf_counter() - started, pages, chars=len(knowledge_base))
+    
+    started = time.perf_counter()
+    processor.save_processed_content(os.path.join(output_dir, "processed_books"))
+    stages["save_processed_content"] = stage_result(time.perf_counter() - started, pages, chars=chars)
+    
+    processor.cleanup_spill()
+    return stages
+
+def git_commit():
+    """
+    Identifica o commit atual do repositório.
+    
+    Returns:
+        str: Hash do commit ou None fora de um repositório git
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def main():
+    """
+    Gera a biblioteca, executa as medições e imprime o resultado em JSON.
+    """
+    parser = argparse.ArgumentParser(description="Mede a ingestão de livros pelo BookProcessor")
+    parser.add_argument("--library", "-l", help="Biblioteca a medir (padrão: biblioteca sintética)")
+    parser.add_argument("--pdf-books", type=int, default=2, help="PDFs da biblioteca sintética")
+    parser.add_argument("--pdf-pages", type=int, default=200, help="Páginas de cada PDF sintético")
+    parser.add_argument("--epub-books", type=int, default=2, help="EPUBs da biblioteca sintética")
+    parser.add_argument("--epub-chapters", type=int, default=20, help="Capítulos de cada EPUB sintético")
+    parser.add_argument("--paragraphs", type=int, default=100, help="Parágrafos por capítulo de EPUB")
+    parser.add_argument("--txt-books", type=int, default=2, help="Arquivos de texto da biblioteca sintética")
+    parser.add_argument("--txt-kb", type=int, default=512, help="Tamanho de cada arquivo de texto, em KB")
+    parser.add_argument("--seed", type=int, default=42, help="Semente da biblioteca sintética")
+    parser.add_argument("--workers", "-w", type=int, default=1, help="Processos do processamento completo")
+    parser.add_argument("--memory-limit", type=int,
+                        help="Limite de caracteres mantidos em memória (padrão: sem limite)")
+    parser.add_argument("--output", "-o", help="Arquivo JSON de saída (padrão: saída padrão)")
+    args = parser.parse_args()
+    
+    work_dir = tempfile.mkdtemp(prefix="ingestion_")
+    library_path = args.library
+    try:
+        if not library_path:
+            library_path = os.path.join(work_dir, "lib")
+            make_synthetic_library(library_path, args)
+        
+        # As mensagens do processador vão para stderr, deixando o JSON sozinho
+        # na saída padrão
+        stdout = sys.stdout
+        sys.stdout = sys.stderr
+        try:
+            stages = run_benchmark(library_path, work_dir, args.workers, args.memory_limit)
+        finally:
+            sys.stdout = stdout
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    config = {name: value for name, value in vars(args).items() if name != "output"}
+    if args.library:
+        config = {"library": os.path.abspath(args.library), "workers": args.workers,
+                  "memory_limit": args.memory_limit}
+    results = {
+        "benchmark": "ingestion",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": config,
+        "stages": stages,
+        "peak_rss_mb": peak_memory_mb()
+    }
+    
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + "\n")
+        print(f"Resultado salvo em: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Compara o formato antigo da base de conhecimento (arquivos de texto por livro
+e medical_knowledge.txt) com a base segmentada em blocos comprimidos: tamanho
+em disco, tempo de gravação, tempo de leitura completa e latência de acesso
+a trechos aleatórios.
+
+Uso:
+    python benchmarks/kb_format.py --library caminho/da/biblioteca
+    python benchmarks/kb_format.py --synthetic-pages 5000
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "medical_assistant"))
+from book_processor.processor import BookProcessor, PageRecord
+from book_processor.chunker import TextChunker
+from book_processor.knowledge_store import KnowledgeStore, CODECS
+
+# Vocabulário usado para gerar páginas sintéticas
+SYNTHETIC_WORDS = (
+    "paciente febre tosse dispneia lactente criança pneumonia bronquiolite asma "
+    "amoxicilina paracetamol dipirona dose mg/kg dia tratamento diagnóstico exame "
+    "hemograma leucocitose radiografia tórax saturação oxigênio internação alta "
+    "sintomas quadro clínico evolução aguda crônica infecção viral bacteriana "
+    "recomenda-se avaliar considerar indicado contraindicado vômitos diarreia "
+    "desidratação hidratação oral venosa sódio potássio glicemia insulina"
+).split()
+
+def synthetic_records(books, pages, seed=42):
+    """
+    Gera registros de texto sintéticos com sentenças médicas aleatórias.
+    
+    Args:
+        books (int): Número de livros
+        pages (int): Número total de páginas
+        seed (int): Semente do gerador aleatório
+        
+    Returns:
+        dict: Nome do livro -> lista de registros
+    """
+    rng = random.Random(seed)
+    library = {}
+    for page in range(pages):
+        book_name = f"sintetico{page % books}.pdf"
+        sentences = []
+        for _ in range(rng.randint(15, 30)):
+            words = rng.choices(SYNTHETIC_WORDS, k=rng.randint(6, 18))
+            sentences.append(" ".join(words).capitalize() + ".")
+        records = library.setdefault(book_name, [])
+        records.append(PageRecord(book_name, len(records) + 1, " ".join(sentences) + "\n"))
+    return library
+
+def library_records(library_path):
+    """
+    Extrai os registros de todos os livros de uma biblioteca.
+    
+    Args:
+        library_path (str): Caminho para a biblioteca
+        
+    Returns:
+        dict: Nome do livro -> lista de registros
+    """
+    processor = BookProcessor(library_path)
+    return {os.path.basename(book_path): list(processor.iter_book(book_path))
+            for book_path in processor.scan_library()}
+
+def directory_size(path):
+    """
+    Soma o tamanho dos arquivos de um diretório.
+    
+    Args:
+        path (str): Diretório
+        
+    Returns:
+        int: Tamanho total em bytes
+    """
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, files in os.walk(path) for name in files)
+
+def percentile(values, fraction):
+    """
+    Retorna um percentil de uma lista de valores.
+    
+    Args:
+        values (list): Valores medidos
+        fraction (float): Percentil entre 0 e 1
+        
+    Returns:
+        float: Valor do percentil
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def bench_plain(library, passages, work_dir):
+    """
+    Mede o formato antigo: um .txt por livro e o medical_knowledge.txt.
+    
+    Args:
+        library (dict): Nome do livro -> lista de registros
+        passages (list): Tuplas (livro, byte inicial, byte final) a ler
+        work_dir (str): Diretório de trabalho
+        
+    Returns:
+        dict: Resultados da medição
+    """
+    processor = BookProcessor(work_dir)
+    books_dir = os.path.join(work_dir, "books")
+    os.makedirs(books_dir, exist_ok=True)
+    
+    start = time.perf_counter()
+    for book_name, records in library.items():
+        processor.save_book_records(iter(records), os.path.join(books_dir, processor.get_output_filename(book_name)))
+    kb_path = os.path.join(work_dir, "medical_knowledge.txt")
+    processor.save_knowledge_base_from_books(list(library), books_dir, kb_path)
+    write_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    with open(kb_path, 'r', encoding='utf-8') as file:
+        file.read()
+    load_time = time.perf_counter() - start
+    
+    latencies = []
+    for book_name, byte_start, byte_end in passages:
+        start = time.perf_counter()
+        with open(os.path.join(books_dir, processor.get_output_filename(book_name)), 'rb') as file:
+            file.seek(byte_start)
+            file.read(byte_end - byte_start).decode('utf-8')
+        latencies.append(time.perf_counter() - start)
+    
+    return {"size": directory_size(work_dir), "write": write_time, "load": load_time, "latencies": latencies}
+
+def bench_store(library, passages, work_dir, compression):
+    """
+    Mede a base segmentada com um formato de compressão.
+    
+    Args:
+        library (dict): Nome do livro -> lista de registros
+        passages (list): Tuplas (livro, byte inicial, byte final) a ler
+        work_dir (str): Diretório de trabalho
+        compression (str): Formato dos blocos
+        
+    Returns:
+        dict: Resultados da medição
+    """
+    store = KnowledgeStore(work_dir, compression=compression)
+    start = time.perf_counter()
+    for book_name, records in library.items():
+        store.write_segment(book_name, iter(records))
+    store.save_catalog(list(library))
+    write_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    KnowledgeStore(work_dir).full_text()
+    load_time = time.perf_counter() - start
+    
+    # Uma nova base, para que o cache de blocos comece vazio
+    store = KnowledgeStore(work_dir)
+    latencies = []
+    for book_name, byte_start, byte_end in passages:
+        start = time.perf_counter()
+        store.segment(book_name).read(byte_start, byte_end)
+        latencies.append(time.perf_counter() - start)
+    
+    return {"size": directory_size(work_dir), "write": write_time, "load": load_time, "latencies": latencies}
+
+def main():
+    """
+    Executa a comparação e imprime uma tabela com os resultados.
+    """
+    parser = argparse.ArgumentParser(description="Compara os formatos da base de conhecimento")
+    parser.add_argument("--library", "-l", help="Biblioteca de livros a usar (padrão: corpus sintético)")
+    parser.add_argument("--synthetic-pages", type=int, default=3000, help="Páginas do corpus sintético")
+    parser.add_argument("--synthetic-books", type=int, default=6, help="Livros do corpus sintético")
+    parser.add_argument("--passages", type=int, default=2000, help="Trechos aleatórios lidos")
+    args = parser.parse_args()
+    
+    if args.library:
+        library = library_records(args.library)
+    else:
+        library = synthetic_records(args.synthetic_books, args.synthetic_pages)
+    
+    # Trechos reais, gerados pelo mesmo divisor usado na base
+    chunker = TextChunker()
+    chunks = [(chunk["book"], chunk["start"], chunk["end"])
+              for records in library.values() for chunk in chunker.chunk_records(iter(records))]
+    if not chunks:
+        print("Nenhum trecho gerado. Verifique a biblioteca.")
+        return
+    rng = random.Random(7)
+    passages = [rng.choice(chunks) for _ in range(args.passages)]
+    
+    work_dir = tempfile.mkdtemp(prefix="kb_format_")
+    try:
+        results = {"texto": bench_plain(library, passages, os.path.join(work_dir, "plain"))}
+        for compression in CODECS:
+            results[compression] = bench_store(library, passages, os.path.join(work_dir, compression), compression)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    text_bytes = sum(len(record.text.encode('utf-8')) for records in library.values() for record in records)
+    print(f"\n{len(library)} livros, {text_bytes / 1e6:.1f} MB de texto, {len(chunks)} trechos, "
+          f"{len(passages)} leituras aleatórias")
+    print(f"{'formato':<8} {'disco (MB)':>11} {'gravação (s)':>13} {'leitura total (s)':>18} "
+          f"{'trecho médio (µs)':>18} {'trecho p95 (µs)':>16}")
+    for name, result in results.items():
+        latencies = result["latencies"]
+        print(f"{name:<8} {result['size'] / 1e6:>11.2f} {result['write']:>13.2f} {result['load']:>18.3f} "
+              f"{sum(latencies) / len(latencies) * 1e6:>18.1f} {percentile(latencies, 0.95) * 1e6:>16.1f}")
+
+if __name__ == "__main__":
+    main()
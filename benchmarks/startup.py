@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Mede o tempo de inicialização do assistente: verificação das dependências,
+importação do programa e abertura de uma base de conhecimento já processada,
+cada medição em um interpretador novo. Também verifica que as bibliotecas de
+extração e da API não são carregadas nesse caminho. Termina com erro se o
+tempo de abertura da base passar do limite.
+
+Uso:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --knowledge-base medical_assistant/knowledge_base --budget 0.5
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, "medical_assistant"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from kb_format import synthetic_records, percentile
+
+# Bibliotecas que não devem ser importadas ao abrir uma base pronta
+HEAVY_MODULES = ["anthropic", "PyPDF2", "nltk", "ebooklib", "concurrent.futures.process"]
+
+# Código executado em cada interpretador novo. Imprime, em JSON, o tempo de
+# cada etapa e as bibliotecas pesadas carregadas.
+STARTUP_SCRIPTS = {
+    "interpretador": "results = {}",
+    "verificar dependências (import)": """
+started = time.perf_counter()
+import anthropic, PyPDF2, nltk, numpy
+results = {"seconds": time.perf_counter() - started}
+""",
+    "verificar dependências (metadados)": """
+started = time.perf_counter()
+sys.path.insert(0, ROOT_DIR)
+from run_medical_assistant import missing_dependencies
+missing_dependencies()
+results = {"seconds": time.perf_counter() - started}
+""",
+    "abrir base": """
+started = time.perf_counter()
+sys.path.insert(0, os.path.join(ROOT_DIR, "medical_assistant"))
+import main
+main.load_assistant(KB_DIR, "chave-de-teste", RETRIEVAL)
+results = {"seconds": time.perf_counter() - started}
+""",
+}
+
+def build_knowledge_base(kb_dir, pages, books):
+    """
+    Gera uma base de conhecimento sintética com os índices de busca.
+    
+    Args:
+        kb_dir (str): Diretório da base
+        pages (int): Páginas do corpus sintético
+        books (int): Livros do corpus sintético
+    """
+    from book_processor.chunker import TextChunker
+    from book_processor.knowledge_store import KnowledgeStore
+    from retrieval.snapshot import IndexSnapshot
+    from retrieval.vectors import VectorIndex
+    
+    library = synthetic_records(books, pages)
+    store = KnowledgeStore(os.path.join(kb_dir, "store"))
+    chunker = TextChunker()
+    for book_name, records in library.items():
+        store.write_segment(book_name, iter(records), chunker)
+    store.save_catalog(list(library))
+    VectorIndex().build(store.iter_chunks(), kb_dir, documents=store)
+    IndexSnapshot(kb_dir).build(store)
+
+def run_script(code, kb_dir, retrieval):
+    """
+    Executa uma etapa em um interpretador novo.
+    
+    Args:
+        code (str): Código da etapa
+        kb_dir (str): Diretório da base de conhecimento
+        retrieval (str): Método de busca ("bm25" ou "vector")
+        
+    Returns:
+        dict: Tempo total do processo, tempo da etapa e bibliotecas pesadas carregadas
+    """
+    prelude = (f"import os, sys, json, time\nROOT_DIR = {ROOT_DIR!r}\nKB_DIR = {kb_dir!r}\n"
+               f"RETRIEVAL = {retrieval!r}\n")
+    epilogue = (f"\nresults['heavy'] = [name for name in {HEAVY_MODULES!r} if name in sys.modules]\n"
+                "print('@@' + json.dumps(results))\n")
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", prelude + code + epilogue],
+                            capture_output=True, text=True, check=True).stdout
+    elapsed = time.perf_counter() - started
+    results = json.loads(output[output.rindex("@@") + 2:])
+    results["process"] = elapsed
+    return results
+
+def main():
+    """
+    Executa as medições e imprime uma tabela com os resultados.
+    """
+    parser = argparse.ArgumentParser(description="Mede o tempo de inicialização do assistente")
+    parser.add_argument("--knowledge-base", "-kb", help="Base de conhecimento a abrir (padrão: base sintética)")
+    parser.add_argument("--synthetic-pages", type=int, default=3000, help="Páginas da base sintética")
+    parser.add_argument("--synthetic-books", type=int, default=6, help="Livros da base sintética")
+    parser.add_argument("--retrieval", choices=["bm25", "vector"], default="bm25", help="Índice de busca aberto")
+    parser.add_argument("--runs", type=int, default=5, help="Repetições de cada medição")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="Tempo máximo, em segundos, para abrir a base (mediana do processo inteiro)")
+    args = parser.parse_args()
+    
+    work_dir = None
+    kb_dir = args.knowledge_base
+    if not kb_dir:
+        work_dir = tempfile.mkdtemp(prefix="startup_")
+        kb_dir = work_dir
+        build_knowledge_base(kb_dir, args.synthetic_pages, args.synthetic_books)
+    
+    try:
+        results = {}
+        for name, code in STARTUP_SCRIPTS.items():
+            results[name] = [run_script(code, kb_dir, args.retrieval) for _ in range(args.runs)]
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print(f"\n{args.runs} execuções por etapa, índice {args.retrieval}")
+    print(f"{'etapa':<36} {'etapa (s)':>10} {'processo (s)':>13} {'processo p95 (s)':>17}  bibliotecas pesadas")
+    for name, runs in results.items():
+        steps = [run.get("seconds", 0.0) for run in runs]
+        processes = [run["process"] for run in runs]
+        heavy = ", ".join(runs[-1]["heavy"]) or "-"
+        print(f"{name:<36} {percentile(steps, 0.5):>10.3f} {percentile(processes, 0.5):>13.3f} "
+              f"{percentile(processes, 0.95):>17.3f}  {heavy}")
+    
+    startup = percentile([run["process"] for run in results["abrir base"]], 0.5)
+    heavy = results["abrir base"][-1]["heavy"]
+    if heavy:
+        print(f"\nFALHA: bibliotecas pesadas carregadas ao abrir a base: {', '.join(heavy)}")
+    if startup > args.budget:
+        print(f"\nFALHA: a base levou {startup:.3f}s para abrir (limite: {args.budget:.3f}s)")
+    if heavy or startup > args.budget:
+        return 1
+    
+    print(f"\nOK: a base abriu em {startup:.3f}s (limite: {args.budget:.3f}s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
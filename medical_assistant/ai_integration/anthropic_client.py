@@ -1,13 +1,54 @@
-import anthropic
 import os
+import threading
+
+from ai_integration.context_assembler import ContextAssembler
+from ai_integration.http_transport import shared_transport
+from ai_integration.prompt_cache import PromptCacheStats, cached_system_prompt
+from ai_integration.completion_cache import CompletionCache
+
+SYSTEM_INSTRUCTIONS = "Você é um assistente médico especializado."
+KNOWLEDGE_PROMPT = "Use o seguinte conhecimento médico como referência: {context}"
+SYSTEM_PROMPT = f"{SYSTEM_INSTRUCTIONS} {KNOWLEDGE_PROMPT}"
+
+# Trechos buscados na análise completa, em múltiplos de top_k; o orçamento da
+# chamada decide quantos deles entram no contexto
+ANALYSIS_DEPTH = 3
 
 class AnthropicClient:
-    def __init__(self, api_key):
+    def __init__(self, api_key, transport=None, completion_cache=None):
         self.api_key = api_key
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.transport = transport or shared_transport()
+        self.completion_cache = completion_cache or CompletionCache()
+        self._client = None
         self.model = "claude-3-opus-20240229"  # Podemos ajustar para outros modelos conforme necessário
         self.max_tokens = 1000
         self.medical_context = ""
+        self.retriever = None
+        self.top_k = 5
+        self.context_assembler = ContextAssembler()
+        self.prompt_caching = True
+        self.cache_stats = PromptCacheStats()
+        self._knowledge_lock = threading.Lock()
+    
+    @property
+    def client(self):
+        """
+        Cliente da API, criado na primeira consulta: a biblioteca anthropic é
+        carregada apenas quando for usada, sem atrasar a abertura do editor.
+        As conexões vêm do transporte compartilhado e são reutilizadas entre
+        as consultas.
+        """
+        if self._client is None:
+            import anthropic
+            self._client = anthropic.Anthropic(api_key=self.api_key, http_client=self.transport.httpx_client())
+        return self._client
+    
+    def warm_up(self):
+        """
+        Cria o cliente da API em segundo plano, para que a primeira consulta
+        não espere pelo carregamento da biblioteca anthropic.
+        """
+        threading.Thread(target=lambda: self.client, daemon=True).start()
     
     def set_medical_context(self, context):
         """
@@ -15,13 +56,96 @@ class AnthropicClient:
         """
         self.medical_context = context
     
-    def get_completion(self, prompt, temperature=0.7):
+    def set_retriever(self, retriever, top_k=5):
+        """
+        Define o índice de busca usado para selecionar, a cada consulta, apenas
+        os trechos dos livros relevantes para o texto atual.
+        """
+        self.retriever = retriever
+        self.top_k = top_k
+    
+    def swap_knowledge(self, retriever=None, context=""):
+        """
+        Substitui o índice de busca e o contexto médico de uma só vez, por
+        exemplo depois de reprocessar a biblioteca em segundo plano. Consultas
+        em andamento terminam com a base anterior; as seguintes usam a nova.
+        """
+        with self._knowledge_lock:
+            self.retriever = retriever
+            self.medical_context = context
+    
+    def retrieve_passages(self, query, limit):
+        """
+        Busca os trechos mais relevantes para a consulta, já formatados com a
+        origem, do mais relevante para o menos. Sem índice, o contexto
+        completo é o único trecho.
+        """
+        with self._knowledge_lock:
+            retriever, medical_context = self.retriever, self.medical_context
+        if not retriever:
+            return [medical_context] if medical_context else []
+        
+        # A anotação inteira e cada um de seus parágrafos são buscados em um
+        # único lote; cada trecho fica com a melhor pontuação obtida
+        paragraphs = [paragraph for paragraph in query.split("\n\n") if paragraph.strip()]
+        queries = [query] + paragraphs if len(paragraphs) > 1 else [query]
+        best = {}
+        for results in retriever.search_batch(queries, limit):
+            for score, chunk in results:
+                if chunk["id"] not in best or score > best[chunk["id"]][0]:
+                    best[chunk["id"]] = (score, chunk)
+        ranked = sorted(best.values(), key=lambda item: item[0], reverse=True)[:limit]
+        
+        passages = []
+        for _, chunk in ranked:
+            source = chunk["book"]
+            if chunk.get("section"):
+                source += f", {chunk['section']}"
+            if chunk.get("page_start"):
+                source += f", p. {chunk['page_start']}-{chunk['page_end']}"
+            passages.append(f"[{source}]\n{chunk['text']}")
+        return passages
+    
+    def system_prompt(self, context=None, call_type="analysis"):
+        """
+        Monta o prompt do sistema de uma consulta: as instruções e o
+        conhecimento médico. O texto do paciente vai na mensagem do usuário.
+        
+        Com o cache de prompts ativo, só a parte que se repete entre as
+        consultas é marcada para o cache: sem índice de busca, as instruções
+        e o contexto completo. Com índice, os trechos buscados para cada
+        anotação vão em um bloco separado, depois das instruções; as
+        instruções sozinhas ficam abaixo do prefixo mínimo da API, e essas
+        consultas não usam o cache (são contadas como "uncached" em
+        cache_stats).
+        
+        Se context não for informado, usa o contexto médico completo, cortado
+        no espaço dos trechos do tipo de chamada (sempre no mesmo ponto, para
+        que o prefixo se repita entre as consultas).
+        """
+        if context is None:
+            context = self.context_assembler.pack(
+                [self.medical_context], self.context_assembler.context_budget(call_type, SYSTEM_PROMPT))
+        if not self.prompt_caching:
+            return SYSTEM_PROMPT.format(context=context)
+        if self.retriever is None:
+            return cached_system_prompt(SYSTEM_PROMPT.format(context=context))
+        return cached_system_prompt(SYSTEM_INSTRUCTIONS, KNOWLEDGE_PROMPT.format(context=context))
+    
+    def get_completion(self, prompt, temperature=0.7, context=None, call_type="analysis"):
         """
         Obtém uma resposta do modelo Claude baseada no prompt fornecido.
+        
+        Se context não for informado, usa o contexto médico completo. Uma
+        consulta repetida é respondida pelo cache de respostas, sem chamar a API.
         """
+        system_prompt = self.system_prompt(context, call_type)
+        key = self.completion_cache.key(self.model, system_prompt, prompt, temperature)
+        cached = self.completion_cache.get(key)
+        if cached is not None:
+            return cached
+        
         try:
-            system_prompt = f"Você é um assistente médico especializado. Use o seguinte conhecimento médico como referência: {self.medical_context}"
-            
             message = self.client.messages.create(
                 model=self.model,
                 max_tokens=self.max_tokens,
@@ -31,36 +155,145 @@ class AnthropicClient:
                     {"role": "user", "content": prompt}
                 ]
             )
-            return message.content[0].text
+            self.cache_stats.record(message.usage)
+            text = message.content[0].text
+            self.completion_cache.put(key, text)
+            return text
         except Exception as e:
             print(f"Erro ao comunicar com a API da Anthropic: {e}")
             return "Não foi possível obter uma resposta. Verifique sua conexão ou chave de API."
     
-    def get_medical_suggestions(self, current_text, patient_context=""):
+    def stream_completion(self, prompt, temperature=0.7, context=None, call_type="analysis"):
         """
-        Gera sugestões médicas com base no texto atual e no contexto do paciente.
+        Obtém uma resposta do modelo Claude em fluxo, entregando o texto à
+        medida que é gerado, em vez de esperar a resposta completa.
+        
+        Se context não for informado, usa o contexto médico completo. Uma
+        consulta repetida é respondida de uma só vez pelo cache de respostas;
+        apenas respostas recebidas por inteiro são armazenadas.
+        
+        Yields:
+            str: Trechos do texto da resposta
         """
-        prompt = f"""
+        system_prompt = self.system_prompt(context, call_type)
+        key = self.completion_cache.key(self.model, system_prompt, prompt, temperature)
+        cached = self.completion_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        parts = []
+        stream = None
+        try:
+            stream = self.client.messages.create(
+                model=self.model,
+                max_tokens=self.max_tokens,
+                temperature=temperature,
+                system=system_prompt,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                stream=True
+            )
+            for event in stream:
+                if event.type == "message_start":
+                    # O uso dos tokens de entrada, inclusive do cache, vem no início do fluxo
+                    self.cache_stats.record(event.message.usage)
+                elif event.type == "content_block_delta":
+                    text = getattr(event.delta, "text", None)
+                    if text:
+                        parts.append(text)
+                        yield text
+            self.completion_cache.put(key, "".join(parts))
+        except Exception as e:
+            print(f"Erro ao comunicar com a API da Anthropic: {e}")
+            if parts:
+                yield "\n\n[Resposta interrompida. Verifique sua conexão.]"
+            else:
+                yield "Não foi possível obter uma resposta. Verifique sua conexão ou chave de API."
+        finally:
+            # Interromper a leitura (por exemplo, ao pedir novas sugestões)
+            # libera a conexão
+            if stream is not None:
+                stream.close()
+    
+    def suggestion_request(self, current_text, patient_context=""):
+        """
+        Monta o prompt e o contexto de uma consulta de sugestões, dentro do
+        orçamento de tokens das sugestões.
+        
+        Returns:
+            tuple: (prompt, contexto)
+        """
+        template = """
         Contexto do paciente: {patient_context}
         
-        Texto atual: {current_text}
+        Texto atual: {note}
         
         Com base no texto atual e no contexto do paciente, forneça sugestões médicas relevantes 
         para continuar o texto. Considere diagnósticos possíveis, tratamentos recomendados, 
         exames adicionais ou observações importantes a serem incluídas.
         """
-        return self.get_completion(prompt)
+        assembler = self.context_assembler
+        # O contexto do paciente é um resumo; limitá-lo preserva espaço para
+        # o texto sendo escrito
+        patient_context = assembler.truncate(patient_context, assembler.budget("suggestion") // 8)
+        passages = self.retrieve_passages(f"{patient_context}\n{current_text}", self.top_k)
+        fixed_text = SYSTEM_PROMPT + template.format(patient_context=patient_context, note="")
+        note, context = assembler.assemble("suggestion", fixed_text, current_text, passages)
+        return template.format(patient_context=patient_context, note=note), context
     
-    def analyze_patient_data(self, patient_data):
+    def analysis_request(self, patient_data):
         """
-        Analisa dados do paciente para fornecer insights médicos.
+        Monta o prompt e o contexto de uma análise dos dados do paciente,
+        dentro do orçamento de tokens da análise.
+        
+        Returns:
+            tuple: (prompt, contexto)
         """
-        prompt = f"""
+        template = """
         Analise os seguintes dados do paciente e forneça insights médicos relevantes:
         
-        {patient_data}
+        {note}
         
         Considere possíveis diagnósticos, recomendações de tratamento, e quaisquer 
         sinais de alerta que devam ser investigados.
         """
-        return self.get_completion(prompt)
+        passages = self.retrieve_passages(patient_data, self.top_k * ANALYSIS_DEPTH)
+        fixed_text = SYSTEM_PROMPT + template.format(note="")
+        note, context = self.context_assembler.assemble("analysis", fixed_text, patient_data, passages)
+        return template.format(note=note), context
+    
+    def get_medical_suggestions(self, current_text, patient_context=""):
+        """
+        Gera sugestões médicas com base no texto atual e no contexto do paciente.
+        """
+        prompt, context = self.suggestion_request(current_text, patient_context)
+        return self.get_completion(prompt, context=context, call_type="suggestion")
+    
+    def stream_medical_suggestions(self, current_text, patient_context=""):
+        """
+        Gera sugestões médicas em fluxo, como get_medical_suggestions.
+        
+        Returns:
+            generator: Trechos do texto das sugestões, à medida que chegam
+        """
+        prompt, context = self.suggestion_request(current_text, patient_context)
+        return self.stream_completion(prompt, context=context, call_type="suggestion")
+    
+    def analyze_patient_data(self, patient_data):
+        """
+        Analisa dados do paciente para fornecer insights médicos.
+        """
+        prompt, context = self.analysis_request(patient_data)
+        return self.get_completion(prompt, context=context, call_type="analysis")
+    
+    def stream_patient_analysis(self, patient_data):
+        """
+        Analisa dados do paciente em fluxo, como analyze_patient_data.
+        
+        Returns:
+            generator: Trechos do texto da análise, à medida que chegam
+        """
+        prompt, context = self.analysis_request(patient_data)
+        return self.stream_completion(prompt, context=context, call_type="analysis")
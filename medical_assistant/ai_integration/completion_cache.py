@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Versão do formato das chaves e das entradas gravadas em disco; alterá-la
+# invalida as respostas armazenadas
+CACHE_VERSION = 1
+
+# Respostas mantidas em memória
+DEFAULT_MAX_ENTRIES = 256
+
+# Validade das respostas gravadas em disco, em segundos
+DEFAULT_TTL = 24 * 3600
+
+def _normalize(text):
+    """
+    Normaliza os espaços de um texto, para que pequenas variações (espaços,
+    quebras de linha ao final) produzam a mesma chave.
+    
+    Args:
+        text (str): Texto
+        
+    Returns:
+        str: Texto com espaços simples
+    """
+    return " ".join(text.split())
+
+class CompletionCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, cache_dir=None, ttl=DEFAULT_TTL):
+        """
+        Cache das respostas do modelo, consultado antes de cada chamada à
+        API. As respostas mais recentes ficam em memória (LRU); com cache_dir,
+        também são gravadas em disco, uma por arquivo, e valem por ttl
+        segundos, sobrevivendo ao fechamento do programa.
+        
+        Args:
+            max_entries (int): Respostas mantidas em memória
+            cache_dir (str): Diretório das respostas gravadas (opcional)
+            ttl (float): Validade das respostas gravadas, em segundos
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+    
+    def key(self, model, system_prompt, prompt, temperature):
+        """
+        Calcula a chave de uma consulta. O prompt do sistema entra na chave
+        por inteiro (instruções e conhecimento médico), de modo que uma nova
+        versão das instruções ou da base de conhecimento não reaproveita
+        respostas antigas.
+        
+        Args:
+            model (str): Modelo
+            system_prompt (str ou list): Prompt do sistema, em texto ou blocos
+            prompt (str): Mensagem do usuário
+            temperature (float): Temperatura
+            
+        Returns:
+            str: Hash SHA-256 da consulta normalizada
+        """
+        if not isinstance(system_prompt, str):
+            system_prompt = " ".join(block.get("text", "") for block in system_prompt)
+        payload = json.dumps([CACHE_VERSION, model, _normalize(system_prompt), _normalize(prompt),
+                              round(float(temperature), 3)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _path(self, key):
+        """
+        Caminho do arquivo de uma resposta gravada.
+        
+        Args:
+            key (str): Chave da consulta
+            
+        Returns:
+            str: Caminho do arquivo
+        """
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+    
+    def _read_disk(self, key):
+        """
+        Lê uma resposta gravada em disco, se existir e estiver válida.
+        Respostas vencidas são removidas.
+        
+        Args:
+            key (str): Chave da consulta
+            
+        Returns:
+            str: Resposta, ou None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if entry.get("version") != CACHE_VERSION or time.time() - entry.get("created", 0) > self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry.get("text")
+    
+    def _write_disk(self, key, text):
+        """
+        Grava uma resposta em disco. A gravação passa por um arquivo
+        temporário, para que leituras simultâneas nunca vejam um arquivo
+        incompleto.
+        
+        Args:
+            key (str): Chave da consulta
+            text (str): Resposta
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump({"version": CACHE_VERSION, "created": time.time(), "text": text}, file,
+                          ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Erro ao gravar resposta no cache em {self.cache_dir}: {e}")
+    
+    def get(self, key):
+        """
+        Busca a resposta de uma consulta, primeiro em memória e depois em disco.
+        
+        Args:
+            key (str): Chave da consulta
+            
+        Returns:
+            str: Resposta armazenada, ou None
+        """
+        with self._lock:
+            text = self.entries.get(key)
+            if text is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return text
+        
+        text = self._read_disk(key) if self.cache_dir else None
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, text)
+        return text
+    
+    def put(self, key, text):
+        """
+        Armazena a resposta de uma consulta.
+        
+        Args:
+            key (str): Chave da consulta
+            text (str): Resposta completa do modelo
+        """
+        with self._lock:
+            self._remember(key, text)
+        if self.cache_dir:
+            self._write_disk(key, text)
+    
+    def _remember(self, key, text):
+        """
+        Guarda uma resposta em memória, descartando a usada há mais tempo se
+        o limite for excedido. Deve ser chamado com o lock adquirido.
+        
+        Args:
+            key (str): Chave da consulta
+            text (str): Resposta
+        """
+        self.entries[key] = text
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def report(self):
+        """
+        Descreve os contadores em uma linha, para exibição.
+        
+        Returns:
+            str: Resumo do uso do cache de respostas
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            rate = self.hits / total if total else 0.0
+            return (f"Cache de respostas: {self.hits} acertos ({self.disk_hits} do disco), "
+                    f"{self.misses} falhas ({rate:.0%}); {len(self.entries)} respostas em memória")
@@ -0,0 +1,191 @@
+import math
+import re
+
+# Caracteres por token na estimativa local. Texto médico em português
+# (acentos, termos técnicos, doses) rende menos caracteres por token que o
+# inglês; o valor é conservador para que o orçamento não seja ultrapassado.
+CHARS_PER_TOKEN = 3.2
+
+# Orçamento de tokens de entrada (prompt do sistema e mensagem) por tipo de
+# chamada: sugestões durante a digitação precisam de respostas rápidas; a
+# análise completa do paciente pode usar mais contexto.
+CONTEXT_BUDGETS = {
+    "suggestion": 4000,
+    "analysis": 16000
+}
+
+# Menor sobra, em tokens, que vale preencher com parte de um trecho que não
+# coube inteiro
+MIN_PARTIAL_TOKENS = 150
+
+# Fim de frase ou de linha, onde o texto pode ser cortado
+SENTENCE_BOUNDARY = re.compile(r'[.!?](?=\s)|\n')
+
+def estimate_tokens(text, chars_per_token=CHARS_PER_TOKEN):
+    """
+    Estima o número de tokens de um texto sem chamar a API nem carregar um
+    tokenizador.
+    
+    Args:
+        text (str): Texto
+        chars_per_token (float): Caracteres por token
+        
+    Returns:
+        int: Número estimado de tokens
+    """
+    return math.ceil(len(text) / chars_per_token)
+
+class ContextAssembler:
+    def __init__(self, budgets=None, note_share=0.5, chars_per_token=CHARS_PER_TOKEN):
+        """
+        Monta o contexto de cada chamada ao modelo dentro de um orçamento de
+        tokens: os trechos dos livros, do mais relevante para o menos, ocupam
+        uma parcela fixa do orçamento e a anotação do paciente fica com o
+        restante. Como o espaço dos trechos não depende do tamanho da
+        anotação, o mesmo conhecimento produz o mesmo prefixo de prompt entre
+        consultas, aproveitado pelo cache de prompts da API. Os cortes são
+        feitos em fim de frase ou de linha.
+        
+        Args:
+            budgets (dict): Tipo de chamada -> orçamento de tokens de entrada
+                (padrão: CONTEXT_BUDGETS)
+            note_share (float): Fração do orçamento livre reservada à anotação;
+                o restante é o espaço dos trechos
+            chars_per_token (float): Caracteres por token na estimativa
+        """
+        self.budgets = dict(CONTEXT_BUDGETS if budgets is None else budgets)
+        self.note_share = note_share
+        self.chars_per_token = chars_per_token
+    
+    def estimate_tokens(self, text):
+        """
+        Estima o número de tokens de um texto.
+        
+        Args:
+            text (str): Texto
+            
+        Returns:
+            int: Número estimado de tokens
+        """
+        return estimate_tokens(text, self.chars_per_token)
+    
+    def budget(self, call_type):
+        """
+        Orçamento de tokens de entrada de um tipo de chamada.
+        
+        Args:
+            call_type (str): Tipo de chamada ("suggestion" ou "analysis")
+            
+        Returns:
+            int: Orçamento em tokens
+        """
+        return self.budgets[call_type]
+    
+    def context_budget(self, call_type, fixed_text):
+        """
+        Espaço dos trechos dos livros em uma chamada. Depende apenas do tipo
+        de chamada e das partes fixas do prompt, não da anotação.
+        
+        Args:
+            call_type (str): Tipo de chamada ("suggestion" ou "analysis")
+            fixed_text (str): Partes fixas do prompt, descontadas do orçamento
+            
+        Returns:
+            int: Espaço em tokens
+        """
+        available = max(self.budget(call_type) - self.estimate_tokens(fixed_text), 0)
+        return int(available * (1 - self.note_share))
+    
+    def truncate(self, text, max_tokens, keep_end=False):
+        """
+        Corta um texto para caber em um número de tokens, em fim de frase ou
+        de linha. Se não houver um fim de frase na metade final do espaço, o
+        corte é feito entre palavras.
+        
+        Args:
+            text (str): Texto
+            max_tokens (int): Número máximo de tokens
+            keep_end (bool): Manter o final do texto (o que foi escrito por
+                último) em vez do início
+                
+        Returns:
+            str: Texto cortado, ou o próprio texto se ele couber
+        """
+        if self.estimate_tokens(text) <= max_tokens:
+            return text
+        max_chars = int(max(max_tokens, 0) * self.chars_per_token)
+        if max_chars <= 0:
+            return ""
+        
+        if keep_end:
+            window = text[-max_chars:]
+            match = SENTENCE_BOUNDARY.search(window)
+            if match and match.end() <= max_chars // 2:
+                return window[match.end():].lstrip()
+            space = window.find(" ")
+            return window[space + 1:] if 0 <= space <= max_chars // 2 else window
+        
+        window = text[:max_chars]
+        cut = 0
+        for match in SENTENCE_BOUNDARY.finditer(window):
+            cut = match.end()
+        if cut >= max_chars // 2:
+            return window[:cut].rstrip()
+        space = window.rfind(" ")
+        return window[:space] if space >= max_chars // 2 else window
+    
+    def pack(self, passages, max_tokens, separator="\n\n"):
+        """
+        Seleciona os trechos que cabem em um número de tokens, na ordem de
+        relevância. Trechos que não cabem inteiros são pulados em favor dos
+        seguintes; se sobrar espaço, o mais relevante deles entra cortado.
+        
+        Args:
+            passages (list): Trechos, do mais relevante para o menos
+            max_tokens (int): Número máximo de tokens
+            separator (str): Separador entre os trechos
+            
+        Returns:
+            str: Trechos selecionados, na ordem de relevância
+        """
+        separator_tokens = self.estimate_tokens(separator)
+        selected = []
+        used = 0
+        skipped = None
+        for position, passage in enumerate(passages):
+            if not passage:
+                continue
+            cost = self.estimate_tokens(passage) + (separator_tokens if selected else 0)
+            if used + cost <= max_tokens:
+                selected.append((position, passage))
+                used += cost
+            elif skipped is None:
+                skipped = (position, passage)
+        
+        if skipped is not None:
+            remaining = max_tokens - used - (separator_tokens if selected else 0)
+            if remaining >= MIN_PARTIAL_TOKENS:
+                selected.append((skipped[0], self.truncate(skipped[1], remaining)))
+                selected.sort()
+        return separator.join(passage for _, passage in selected)
+    
+    def assemble(self, call_type, fixed_text, note, passages):
+        """
+        Distribui o orçamento de uma chamada entre a anotação do paciente e os
+        trechos dos livros. O espaço que os trechos não usam fica para a
+        anotação.
+        
+        Args:
+            call_type (str): Tipo de chamada ("suggestion" ou "analysis")
+            fixed_text (str): Partes fixas do prompt (instruções e prompt do
+                sistema), descontadas do orçamento
+            note (str): Anotação ou dados do paciente
+            passages (list): Trechos dos livros, do mais relevante para o menos
+            
+        Returns:
+            tuple: (anotação, cortada no início se necessário; contexto)
+        """
+        available = max(self.budget(call_type) - self.estimate_tokens(fixed_text), 0)
+        context = self.pack(passages, self.context_budget(call_type, fixed_text))
+        note = self.truncate(note, available - self.estimate_tokens(context), keep_end=True)
+        return note, context
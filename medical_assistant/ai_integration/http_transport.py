@@ -0,0 +1,134 @@
+import threading
+
+# Conexões mantidas abertas por servidor; cada consulta simultânea (sugestão
+# automática, análise, atualização em segundo plano) usa uma delas
+DEFAULT_POOL_SIZE = 4
+
+# Tempo máximo para abrir a conexão e para esperar a resposta, em segundos.
+# Uma resposta longa do modelo pode levar dezenas de segundos.
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 120.0
+
+class HTTPTransport:
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT):
+        """
+        Conexões HTTP persistentes (keep-alive) compartilhadas pelos clientes
+        da API. A primeira consulta abre a conexão (TCP e TLS); as seguintes
+        a reutilizam, inclusive a partir de outras threads, sem repetir o
+        handshake.
+        
+        As sessões são criadas na primeira consulta: requests para os
+        clientes HTTP diretos e httpx para o SDK da Anthropic.
+        
+        Args:
+            pool_size (int): Conexões mantidas abertas por servidor
+            connect_timeout (float): Segundos para abrir uma conexão
+            read_timeout (float): Segundos de espera pela resposta
+        """
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._session = None
+        self._httpx_client = None
+        self._lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """
+        Sessão requests com o pool de conexões, usada pelos clientes HTTP diretos.
+        """
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+    
+    def httpx_client(self):
+        """
+        Cliente httpx com o pool de conexões, para ser passado ao SDK da
+        Anthropic (argumento http_client).
+        
+        Returns:
+            httpx.Client: Cliente compartilhado
+        """
+        if self._httpx_client is None:
+            with self._lock:
+                if self._httpx_client is None:
+                    import httpx
+                    self._httpx_client = httpx.Client(
+                        limits=httpx.Limits(max_connections=self.pool_size,
+                                            max_keepalive_connections=self.pool_size),
+                        timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+                    )
+        return self._httpx_client
+    
+    def post(self, url, **kwargs):
+        """
+        Envia uma requisição POST por uma conexão do pool.
+        
+        Args:
+            url (str): Endereço
+            **kwargs: Argumentos de requests (headers, json, stream...)
+            
+        Returns:
+            requests.Response: Resposta
+        """
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+        return self.session.post(url, **kwargs)
+    
+    def close(self):
+        """
+        Fecha as conexões abertas. O transporte pode ser usado de novo depois;
+        as conexões são reabertas na próxima consulta.
+        """
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+            if self._httpx_client is not None:
+                self._httpx_client.close()
+                self._httpx_client = None
+
+_shared_transport = None
+_shared_lock = threading.Lock()
+
+def shared_transport():
+    """
+    Transporte compartilhado por todos os clientes do processo.
+    
+    Returns:
+        HTTPTransport: Transporte compartilhado
+    """
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = HTTPTransport()
+        return _shared_transport
+
+def configure_transport(pool_size=DEFAULT_POOL_SIZE, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                        read_timeout=DEFAULT_READ_TIMEOUT):
+    """
+    Substitui o transporte compartilhado por um com outra configuração.
+    Clientes criados antes continuam usando o transporte anterior.
+    
+    Args:
+        pool_size (int): Conexões mantidas abertas por servidor
+        connect_timeout (float): Segundos para abrir uma conexão
+        read_timeout (float): Segundos de espera pela resposta
+        
+    Returns:
+        HTTPTransport: Novo transporte compartilhado
+    """
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is not None:
+            _shared_transport.close()
+        _shared_transport = HTTPTransport(pool_size, connect_timeout, read_timeout)
+        return _shared_transport
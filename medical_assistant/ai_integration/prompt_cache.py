@@ -0,0 +1,139 @@
+import threading
+
+from ai_integration.context_assembler import estimate_tokens
+
+# Marca um bloco do prompt como prefixo armazenável no cache de prompts da API
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Custo das leituras e gravações do cache, em fração do preço normal dos
+# tokens de entrada
+CACHE_READ_COST = 0.1
+CACHE_WRITE_COST = 1.25
+
+# Menor prefixo, em tokens, que a API armazena no cache (modelos Sonnet e
+# Opus); prefixos menores são processados normalmente, sem cache
+MIN_CACHED_TOKENS = 1024
+
+def cached_system_prompt(text, variable_text="", min_tokens=MIN_CACHED_TOKENS):
+    """
+    Monta o prompt do sistema com a parte estável como bloco armazenável no
+    cache de prompts. Consultas seguintes com a mesma parte estável
+    reaproveitam o processamento do prefixo, em vez de reprocessar todo o
+    conhecimento médico. A parte que muda a cada consulta (os trechos
+    buscados para a anotação) vai em um bloco depois do ponto de cache, para
+    não gravar no cache um prefixo que nunca se repete.
+    
+    A parte estável só é marcada para o cache se tiver pelo menos o tamanho
+    mínimo aceito pela API: um prefixo menor nunca seria armazenado.
+    
+    Args:
+        text (str): Parte estável do prompt do sistema (instruções e, sem
+            índice de busca, o conhecimento médico)
+        variable_text (str): Parte que muda a cada consulta (opcional)
+        min_tokens (int): Menor parte estável, em tokens estimados, marcada
+            para o cache
+            
+    Returns:
+        list: Blocos do prompt do sistema, no formato da API de mensagens
+    """
+    blocks = [{"type": "text", "text": text}]
+    if estimate_tokens(text) >= min_tokens:
+        blocks[0]["cache_control"] = dict(CACHE_CONTROL)
+    if variable_text:
+        blocks.append({"type": "text", "text": variable_text})
+    return blocks
+
+def _usage_value(usage, field):
+    """
+    Lê um campo de uso de tokens de uma resposta do SDK (objeto) ou da API
+    HTTP (dicionário).
+    
+    Args:
+        usage: Uso de tokens da resposta
+        field (str): Nome do campo
+        
+    Returns:
+        int: Valor do campo, 0 se ausente
+    """
+    if isinstance(usage, dict):
+        value = usage.get(field)
+    else:
+        value = getattr(usage, field, None)
+    return value or 0
+
+class PromptCacheStats:
+    def __init__(self):
+        """
+        Contadores de acertos e falhas do cache de prompts, a partir dos
+        campos de uso de tokens das respostas da API. Uma consulta que lê o
+        prefixo do cache é um acerto; uma que o grava é uma falha. Consultas
+        sem leitura nem gravação (prefixo curto demais para o cache) são
+        contadas à parte.
+        """
+        self.requests = 0
+        self.hits = 0
+        self.misses = 0
+        self.input_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self._lock = threading.Lock()
+    
+    def record(self, usage):
+        """
+        Registra o uso de tokens de uma resposta.
+        
+        Args:
+            usage: Campo usage da resposta (objeto do SDK ou dicionário)
+        """
+        if usage is None:
+            return
+        read = _usage_value(usage, "cache_read_input_tokens")
+        written = _usage_value(usage, "cache_creation_input_tokens")
+        with self._lock:
+            self.requests += 1
+            self.input_tokens += _usage_value(usage, "input_tokens")
+            self.cache_read_tokens += read
+            self.cache_write_tokens += written
+            if read:
+                self.hits += 1
+            elif written:
+                self.misses += 1
+    
+    def summary(self):
+        """
+        Resume os contadores.
+        
+        Returns:
+            dict: Consultas, acertos, falhas, taxa de acerto, tokens lidos e
+                gravados no cache e a economia estimada em tokens de entrada
+                (leituras custam 10% e gravações 125% do preço normal)
+        """
+        with self._lock:
+            cached = self.hits + self.misses
+            saved = (self.cache_read_tokens * (1 - CACHE_READ_COST)
+                     - self.cache_write_tokens * (CACHE_WRITE_COST - 1))
+            return {
+                "requests": self.requests,
+                "hits": self.hits,
+                "misses": self.misses,
+                "uncached": self.requests - cached,
+                "hit_rate": self.hits / cached if cached else 0.0,
+                "input_tokens": self.input_tokens,
+                "cache_read_tokens": self.cache_read_tokens,
+                "cache_write_tokens": self.cache_write_tokens,
+                "saved_input_tokens": int(saved)
+            }
+    
+    def report(self):
+        """
+        Descreve os contadores em uma linha, para exibição.
+        
+        Returns:
+            str: Resumo do uso do cache de prompts
+        """
+        summary = self.summary()
+        return (f"Cache de prompts: {summary['hits']} acertos, {summary['misses']} falhas "
+                f"({summary['hit_rate']:.0%}) em {summary['requests']} consultas; "
+                f"{summary['cache_read_tokens']} tokens lidos do cache, "
+                f"{summary['cache_write_tokens']} gravados; economia estimada de "
+                f"{summary['saved_input_tokens']} tokens de entrada")
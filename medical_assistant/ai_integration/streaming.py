@@ -0,0 +1,54 @@
+import json
+
+def iter_sse_events(lines):
+    """
+    Lê os eventos de uma resposta em Server-Sent Events (SSE), como a da API
+    de mensagens com "stream": true.
+    
+    Args:
+        lines (iterable): Linhas da resposta, já decodificadas
+        
+    Yields:
+        tuple: (nome do evento, dados decodificados do JSON)
+    """
+    event = None
+    data = []
+    for line in lines:
+        if not line:
+            # Linha vazia: fim do evento
+            if data:
+                yield event, json.loads("\n".join(data))
+            event = None
+            data = []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+    if data:
+        yield event, json.loads("\n".join(data))
+
+def iter_text_deltas(events, on_usage=None):
+    """
+    Extrai o texto gerado dos eventos da API de mensagens, à medida que chega.
+    
+    Args:
+        events (iterable): Eventos (nome, dados) de iter_sse_events
+        on_usage (callable): Recebe o uso de tokens de entrada informado no
+            início da resposta (opcional)
+            
+    Yields:
+        str: Trechos de texto da resposta
+    """
+    for event, data in events:
+        kind = data.get("type", event)
+        if kind == "message_start":
+            if on_usage:
+                on_usage(data.get("message", {}).get("usage"))
+        elif kind == "content_block_delta":
+            text = data.get("delta", {}).get("text")
+            if text:
+                yield text
+        elif kind == "error":
+            raise RuntimeError(data.get("error", {}).get("message", "erro no fluxo de resposta"))
+        elif kind == "message_stop":
+            return
@@ -0,0 +1,294 @@
+import os
+import re
+import json
+import hashlib
+
+from book_processor.processor import PageRecord
+
+# Aproximação local de tokens: palavras e sinais de pontuação isolados
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Divisão de sentenças usada quando o modelo punkt do NLTK não está instalado
+FALLBACK_SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-ZÀ-Ý0-9])")
+
+def count_tokens(text):
+    """
+    Estima o número de tokens de um texto.
+    
+    Args:
+        text (str): Texto a medir
+        
+    Returns:
+        int: Número aproximado de tokens
+    """
+    return len(TOKEN_PATTERN.findall(text))
+
+class TextChunker:
+    def __init__(self, max_tokens=256, overlap_tokens=48, language='portuguese'):
+        """
+        Inicializa o divisor de texto em trechos sobrepostos.
+        
+        Args:
+            max_tokens (int): Tamanho máximo de cada trecho em tokens
+            overlap_tokens (int): Tokens repetidos do fim de um trecho no início do próximo
+            language (str): Idioma usado pelo tokenizador de sentenças do NLTK
+        """
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.language = language
+        self.use_punkt = True
+    
+    def split_sentences(self, text):
+        """
+        Divide um texto em sentenças usando o tokenizador do NLTK.
+        
+        Args:
+            text (str): Texto a dividir
+            
+        Returns:
+            list: Lista de sentenças
+        """
+        text = text.strip()
+        if not text:
+            return []
+        
+        if self.use_punkt:
+            try:
+                from nltk.tokenize import sent_tokenize
+                return sent_tokenize(text, language=self.language)
+            except (ImportError, LookupError):
+                print("Modelo punkt do NLTK indisponível. Usando divisão simplificada de sentenças.")
+                self.use_punkt = False
+        
+        return [sentence for sentence in FALLBACK_SENTENCE_PATTERN.split(text) if sentence.strip()]
+    
+    def sentence_spans(self, text):
+        """
+        Localiza as sentenças de um texto.
+        
+        Args:
+            text (str): Texto a dividir
+            
+        Returns:
+            list: Tuplas (início, fim) com a posição de cada sentença no texto
+        """
+        spans = []
+        cursor = 0
+        for sentence in self.split_sentences(text):
+            start = text.find(sentence, cursor)
+            if start < 0:
+                continue
+            spans.append((start, start + len(sentence)))
+            cursor = start + len(sentence)
+        return spans
+    
+    def _split_long_span(self, text, start, end):
+        """
+        Divide uma sentença maior que o tamanho máximo em partes menores.
+        
+        Args:
+            text (str): Texto que contém a sentença
+            start (int): Posição inicial da sentença
+            end (int): Posição final da sentença
+            
+        Returns:
+            list: Tuplas (início, fim, tokens), cada parte com no máximo max_tokens tokens
+        """
+        parts = []
+        part_start = None
+        part_end = None
+        part_tokens = 0
+        for word in re.finditer(r"\S+", text[start:end]):
+            word_tokens = count_tokens(word.group())
+            if part_start is not None and part_tokens + word_tokens > self.max_tokens:
+                parts.append((part_start, part_end, part_tokens))
+                part_start = None
+                part_tokens = 0
+            if part_start is None:
+                part_start = start + word.start()
+            part_end = start + word.end()
+            part_tokens += word_tokens
+        if part_start is not None:
+            parts.append((part_start, part_end, part_tokens))
+        return parts
+    
+    def _make_chunk(self, book_name, items, texts, seen_ids):
+        """
+        Cria um trecho a partir de uma sequência de sentenças.
+        
+        O texto do trecho é o intervalo original do livro entre a primeira e a
+        última sentença, e start/end são suas posições em bytes (UTF-8) no
+        texto do livro, de modo que o trecho pode ser lido diretamente do texto
+        armazenado. O identificador depende apenas do livro, da página inicial
+        e do texto, e permanece estável entre reprocessamentos.
+        
+        Args:
+            book_name (str): Nome do livro
+            items (list): Tuplas (registro, início, fim, byte inicial, byte final, tokens, página)
+            texts (dict): Texto de cada registro ainda referenciado
+            seen_ids (set): Identificadores já usados no livro
+            
+        Returns:
+            dict: Trecho com id, livro, intervalo de páginas, tokens, posição e texto
+        """
+        first = items[0]
+        last = items[-1]
+        if first[0] == last[0]:
+            text = texts[first[0]][first[1]:last[2]]
+        else:
+            parts = [texts[first[0]][first[1]:]]
+            parts.extend(texts[index] for index in range(first[0] + 1, last[0]))
+            parts.append(texts[last[0]][:last[2]])
+            text = "".join(parts)
+        
+        page_start = first[6]
+        digest = hashlib.sha1(f"{book_name}\x00{page_start}\x00{text}".encode('utf-8')).hexdigest()[:16]
+        chunk_id = digest
+        suffix = 1
+        while chunk_id in seen_ids:
+            suffix += 1
+            chunk_id = f"{digest}-{suffix}"
+        seen_ids.add(chunk_id)
+        
+        return {
+            "id": chunk_id,
+            "book": book_name,
+            "page_start": page_start,
+            "page_end": last[6],
+            "tokens": sum(item[5] for item in items),
+            "start": first[3],
+            "end": last[4],
+            "text": text
+        }
+    
+    def chunk_records(self, records):
+        """
+        Divide registros de texto em trechos sobrepostos, respeitando os
+        limites das sentenças. Os registros são consumidos em fluxo; apenas os
+        registros do trecho em construção ficam na memória.
+        
+        Args:
+            records (iterator): Registros (livro, página, texto) da extração
+            
+        Yields:
+            dict: Trechos com id, livro, intervalo de páginas, tokens, posição e texto
+        """
+        book_name = None
+        buffer = []
+        buffer_tokens = 0
+        seen_ids = set()
+        texts = {}
+        record_index = -1
+        book_bytes = 0
+        
+        for record in records:
+            if record.book != book_name:
+                if buffer:
+                    yield self._make_chunk(book_name, buffer, texts, seen_ids)
+                book_name = record.book
+                buffer = []
+                buffer_tokens = 0
+                seen_ids = set()
+                texts = {}
+                record_index = -1
+                book_bytes = 0
+            
+            record_index += 1
+            text = record.text
+            texts[record_index] = text
+            char_cursor = 0
+            byte_cursor = book_bytes
+            
+            for sentence_start, sentence_end in self.sentence_spans(text):
+                tokens = count_tokens(text[sentence_start:sentence_end])
+                if tokens <= self.max_tokens:
+                    pieces = [(sentence_start, sentence_end, tokens)]
+                else:
+                    pieces = self._split_long_span(text, sentence_start, sentence_end)
+                
+                for piece_start, piece_end, piece_tokens in pieces:
+                    # Converter as posições em caracteres para bytes de forma incremental
+                    byte_start = byte_cursor + len(text[char_cursor:piece_start].encode('utf-8'))
+                    byte_end = byte_start + len(text[piece_start:piece_end].encode('utf-8'))
+                    char_cursor = piece_end
+                    byte_cursor = byte_end
+                    
+                    if buffer and buffer_tokens + piece_tokens > self.max_tokens:
+                        yield self._make_chunk(book_name, buffer, texts, seen_ids)
+                        
+                        # Manter as últimas sentenças como sobreposição
+                        overlap = []
+                        overlap_tokens = 0
+                        for item in reversed(buffer):
+                            if overlap_tokens + item[5] > self.overlap_tokens:
+                                break
+                            overlap.insert(0, item)
+                            overlap_tokens += item[5]
+                        if overlap_tokens + piece_tokens > self.max_tokens:
+                            overlap = []
+                            overlap_tokens = 0
+                        buffer = overlap
+                        buffer_tokens = overlap_tokens
+                        
+                        # Descartar os registros que nenhum trecho ainda referencia
+                        oldest = buffer[0][0] if buffer else record_index
+                        for index in [index for index in texts if index < oldest]:
+                            del texts[index]
+                    
+                    buffer.append((record_index, piece_start, piece_end, byte_start, byte_end,
+                                   piece_tokens, record.page))
+                    buffer_tokens += piece_tokens
+            
+            book_bytes = byte_cursor + len(text[char_cursor:].encode('utf-8'))
+        
+        if buffer:
+            yield self._make_chunk(book_name, buffer, texts, seen_ids)
+    
+    def chunk_text(self, book_name, text):
+        """
+        Divide o texto completo de um livro em trechos.
+        
+        Args:
+            book_name (str): Nome do livro
+            text (str): Texto do livro
+            
+        Returns:
+            list: Trechos do livro (sem informação de página)
+        """
+        return list(self.chunk_records([PageRecord(book_name, None, text)]))
+    
+    def save_chunks(self, chunks, output_path):
+        """
+        Salva trechos em um arquivo JSON Lines, um trecho por linha.
+        
+        Args:
+            chunks (iterator): Trechos a salvar
+            output_path (str): Caminho do arquivo de saída
+            
+        Returns:
+            int: Número de trechos salvos
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        count = 0
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            for chunk in chunks:
+                file.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+                count += 1
+        os.replace(tmp_path, output_path)
+        return count
+
+def load_chunks(chunks_path):
+    """
+    Carrega os trechos de um arquivo JSON Lines, sob demanda.
+    
+    Args:
+        chunks_path (str): Caminho do arquivo de trechos
+        
+    Yields:
+        dict: Trechos salvos no arquivo
+    """
+    with open(chunks_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,188 @@
+import re
+import zlib
+import numpy as np
+
+# Palavras usadas para formar as sequências (shingles) comparadas
+WORD_PATTERN = re.compile(r"\w+")
+
+# Multiplicadores usados para combinar as palavras de uma sequência
+SHINGLE_MULTIPLIERS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9,
+                                0xD6E8FEB86659FD93, 0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53,
+                                0x94D049BB133111EB, 0xBF58476D1CE4E5B9], dtype=np.uint64)
+
+class NearDuplicateDetector:
+    def __init__(self, threshold=0.8, num_perm=128, bands=16, shingle_size=5, seed=1):
+        """
+        Detecta textos quase duplicados com assinaturas MinHash e LSH
+        (locality-sensitive hashing). Cada texto é comparado apenas com os
+        candidatos que compartilham alguma faixa da assinatura, de modo que o
+        custo total cresce de forma quase linear com o número de textos.
+        
+        Args:
+            threshold (float): Similaridade de Jaccard estimada a partir da qual
+                dois textos são considerados duplicados
+            num_perm (int): Número de funções de hash da assinatura
+            bands (int): Número de faixas do LSH (deve dividir num_perm)
+            shingle_size (int): Palavras por sequência comparada
+            seed (int): Semente das funções de hash
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm deve ser múltiplo de bands")
+        if not 1 <= shingle_size <= len(SHINGLE_MULTIPLIERS):
+            raise ValueError(f"shingle_size deve estar entre 1 e {len(SHINGLE_MULTIPLIERS)}")
+        
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+        
+        # Hash multiplicativo: (a * x + b) nos 64 bits, com a ímpar
+        rng = np.random.default_rng(seed)
+        self.a = (rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        # Multiplicadores que combinam os valores de uma faixa na sua chave do LSH
+        self.band_multipliers = (rng.integers(0, 2 ** 63, self.rows, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+        
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+    
+    def parameters(self):
+        """
+        Parâmetros que determinam as assinaturas; assinaturas gravadas com
+        outros parâmetros não podem ser comparadas.
+        
+        Returns:
+            list: num_perm, bands, shingle_size e seed
+        """
+        return [self.num_perm, self.bands, self.shingle_size, self.seed]
+    
+    def shingles(self, text):
+        """
+        Calcula o conjunto de sequências de palavras de um texto.
+        
+        Args:
+            text (str): Texto
+            
+        Returns:
+            numpy.ndarray: Hashes únicos das sequências (vazio se o texto for
+                menor que uma sequência)
+        """
+        words = WORD_PATTERN.findall(text.lower())
+        if len(words) < self.shingle_size:
+            return np.zeros(0, dtype=np.uint64)
+        
+        hashes = np.fromiter((zlib.crc32(word.encode('utf-8')) for word in words),
+                             dtype=np.uint64, count=len(words))
+        count = len(words) - self.shingle_size + 1
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset in range(self.shingle_size):
+            shingles += hashes[offset:offset + count] * SHINGLE_MULTIPLIERS[offset]
+        return np.unique(shingles)
+    
+    def signature(self, text):
+        """
+        Calcula a assinatura MinHash de um texto. Cada valor é guardado com
+        32 bits, que bastam para comparar assinaturas e reduzem à metade o
+        espaço das assinaturas gravadas.
+        
+        Args:
+            text (str): Texto
+            
+        Returns:
+            numpy.ndarray: Assinatura (num_perm valores) ou None se o texto for
+                curto demais para ser comparado
+        """
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+        return (np.outer(self.a, shingles) + self.b[:, None]).min(axis=1).astype(np.uint32)
+    
+    def band_keys(self, signatures):
+        """
+        Calcula as chaves do LSH de uma ou mais assinaturas, uma por faixa.
+        Chaves iguais com faixas diferentes são possíveis, mas raras, e só
+        acrescentam um candidato conferido pela assinatura.
+        
+        Args:
+            signatures (numpy.ndarray): Assinatura, ou matriz com uma por linha
+            
+        Returns:
+            numpy.ndarray: Chaves (bands valores por assinatura)
+        """
+        bands = signatures.reshape(signatures.shape[:-1] + (self.bands, self.rows)).astype(np.uint64)
+        return (bands * self.band_multipliers).sum(axis=-1, dtype=np.uint64)
+    
+    def query(self, signature, band_keys):
+        """
+        Procura um texto registrado quase duplicado de uma assinatura.
+        
+        Args:
+            signature (numpy.ndarray): Assinatura
+            band_keys (numpy.ndarray): Chaves do LSH da assinatura
+            
+        Returns:
+            Identificador da cópia canônica, ou None se não houver
+        """
+        checked = set()
+        for band, band_key in enumerate(band_keys.tolist()):
+            for candidate in self.buckets[band].get(band_key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if np.mean(self.signatures[candidate] == signature) >= self.threshold:
+                    return candidate
+        return None
+    
+    def insert(self, key, signature, band_keys):
+        """
+        Registra um texto inédito no índice, sem verificar duplicados.
+        
+        Args:
+            key: Identificador do texto
+            signature (numpy.ndarray): Assinatura
+            band_keys (numpy.ndarray): Chaves do LSH da assinatura
+        """
+        self.signatures[key] = signature
+        for band, band_key in enumerate(band_keys.tolist()):
+            self.buckets[band].setdefault(band_key, []).append(key)
+    
+    def add_signature(self, key, signature, band_keys=None):
+        """
+        Verifica se uma assinatura é quase duplicada de um texto registrado
+        antes e, se for inédita, a registra. Apenas textos inéditos entram no
+        índice, de modo que a primeira ocorrência é sempre a cópia canônica.
+        
+        Args:
+            key: Identificador do texto
+            signature (numpy.ndarray): Assinatura
+            band_keys (numpy.ndarray): Chaves do LSH da assinatura (calculadas
+                se não forem informadas)
+                
+        Returns:
+            Identificador da cópia canônica, ou None se o texto for inédito
+        """
+        if band_keys is None:
+            band_keys = self.band_keys(signature)
+        canonical = self.query(signature, band_keys)
+        if canonical is None:
+            self.insert(key, signature, band_keys)
+        return canonical
+    
+    def add(self, key, text):
+        """
+        Registra um texto e verifica se ele é quase duplicado de um texto
+        registrado antes.
+        
+        Args:
+            key: Identificador do texto
+            text (str): Texto
+            
+        Returns:
+            Identificador da cópia canônica, ou None se o texto for inédito
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        return self.add_signature(key, signature)
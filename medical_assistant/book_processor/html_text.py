@@ -0,0 +1,174 @@
+import re
+import html
+
+# Elementos cujo conteúdo não é texto do livro
+SKIP_TAGS = {"head", "title", "script", "style", "noscript", "template", "svg", "math", "iframe", "object"}
+
+# Elementos que separam parágrafos: terminam com uma linha em branco
+PARAGRAPH_TAGS = {"p", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "table",
+                  "ul", "ol", "dl", "figure", "section", "article", "aside", "header", "footer"}
+
+# Elementos de bloco que terminam apenas a linha atual
+LINE_TAGS = {"br", "div", "li", "dt", "dd", "tr", "caption", "figcaption", "hr", "body", "nav"}
+
+# Células de tabela: separadas por um espaço
+CELL_TAGS = {"td", "th"}
+
+# Marcadores das quebras no texto intermediário; não são espaços para str.split
+LINE_BREAK = "\x01"
+PARAGRAPH_BREAK = "\x02"
+
+# Texto que substitui cada tag estrutural
+TAG_SEPARATORS = {**{tag: PARAGRAPH_BREAK for tag in PARAGRAPH_TAGS},
+                  **{tag: LINE_BREAK for tag in LINE_TAGS},
+                  **{tag: " " for tag in CELL_TAGS}}
+
+# Comentários e seções CDATA
+SPECIAL_PATTERN = re.compile(r"<!(?:--.*?-->|\[CDATA\[(.*?)\]\]>)", re.S)
+
+# Prefixos de espaço de nomes declarados no documento (xmlns:svg="...")
+NAMESPACE_PATTERN = re.compile(r"xmlns:([\w.-]+)\s*=")
+
+# Padrões de tags já compilados, por prefixos de espaço de nomes
+TAG_PATTERNS = {}
+
+def name_pattern(name):
+    """
+    Padrão que reconhece um nome de tag em qualquer combinação de maiúsculas
+    e minúsculas.
+    
+    A primeira letra fica como alternativa literal (minúscula ou maiúscula),
+    não como classe de caracteres: assim a expressão regular descarta de
+    imediato as alternativas que não começam com o caractere seguinte a "<",
+    o que re.I não faz.
+    
+    Args:
+        name (str): Nome da tag, em minúsculas
+        
+    Returns:
+        str: Expressão regular do nome
+    """
+    rest = "".join(f"[{char}{char.upper()}]" if char.isalpha() else re.escape(char) for char in name[1:])
+    return f"{name[0]}{rest}|{name[0].upper()}{rest}"
+
+def tag_patterns(prefixes):
+    """
+    Compila os padrões de tags de um documento, com os prefixos de espaço de
+    nomes que ele declara.
+    
+    As tags cujo nome não começa com a inicial de uma tag tratada (em, i...)
+    são descartadas já no primeiro caractere, sem testar os nomes.
+    
+    Args:
+        prefixes (tuple): Prefixos de espaço de nomes declarados
+        
+    Returns:
+        tuple: (abertura de elemento sem texto, com o nome em "tag" e a barra
+            de elemento vazio em "empty"; fechamento de cada elemento sem
+            texto; padrão para re.split que divide o documento nas tags,
+            capturando o nome das tags estruturais)
+    """
+    patterns = TAG_PATTERNS.get(prefixes)
+    if patterns is None:
+        namespace = "(?:(?:" + "|".join(re.escape(prefix) for prefix in prefixes) + "):)?" if prefixes else ""
+        end = r"(?![\w:.-])"
+        
+        skip_initials = "".join(sorted({initial for tag in SKIP_TAGS for initial in (tag[0], tag[0].upper())}))
+        skip_names = "|".join(name_pattern(tag) for tag in sorted(SKIP_TAGS))
+        skip_open = re.compile(f"<(?={namespace}[{skip_initials}]){namespace}(?P<tag>{skip_names}){end}"
+                               f"[^>]*?(?P<empty>/?)>")
+        skip_close = {tag: re.compile(f"</{namespace}(?:{name_pattern(tag)})\\s*>") for tag in SKIP_TAGS}
+        
+        initials = "".join(sorted({initial for tag in TAG_SEPARATORS for initial in (tag[0], tag[0].upper())}))
+        structure = "|".join(name_pattern(tag) for tag in sorted(TAG_SEPARATORS, key=len, reverse=True))
+        split = re.compile(f"<(?:(?=/?{namespace}[{initials}])/?{namespace}({structure}){end}[^>]*|[^>]*)>")
+        
+        patterns = TAG_PATTERNS[prefixes] = (skip_open, skip_close, split)
+    return patterns
+
+def remove_skipped(content, prefixes):
+    """
+    Remove os elementos cujo conteúdo não é texto (head, script, style...).
+    
+    O fechamento de cada elemento é buscado a partir da abertura. Se um
+    elemento não é fechado no restante do documento (XHTML malformado), só a
+    tag de abertura é removida, e os demais elementos com o mesmo nome não
+    buscam o fechamento de novo: o documento é percorrido em tempo linear.
+    
+    Args:
+        content (str): Documento
+        prefixes (tuple): Prefixos de espaço de nomes declarados
+        
+    Returns:
+        str: Documento sem os elementos
+    """
+    skip_open, skip_close, _ = tag_patterns(prefixes)
+    match = skip_open.search(content)
+    if match is None:
+        return content
+    
+    pieces = []
+    position = 0
+    unclosed = set()
+    while match:
+        pieces.append(content[position:match.start()])
+        position = match.end()
+        tag = match.group("tag").lower()
+        if not match.group("empty") and tag not in unclosed:
+            close = skip_close[tag].search(content, position)
+            if close:
+                position = close.end()
+            else:
+                unclosed.add(tag)
+        match = skip_open.search(content, position)
+    pieces.append(content[position:])
+    return "".join(pieces)
+
+def html_to_text(content, encoding='utf-8'):
+    """
+    Converte um documento HTML/XHTML em texto.
+    
+    O conteúdo de elementos que não são texto (head, script, style...) é
+    descartado e o documento é dividido nas tags com uma única expressão
+    regular: as tags estruturais viram marcadores de quebra e as demais tags
+    são removidas. Depois, as entidades são decodificadas, os espaços
+    normalizados e os limites de parágrafos e títulos mantidos como linhas em
+    branco. Os nomes das tags são reconhecidos sem diferenciar maiúsculas de
+    minúsculas.
+    
+    Args:
+        content (bytes ou str): Documento
+        encoding (str): Codificação do documento, se fornecido em bytes
+        
+    Returns:
+        str: Texto do documento, terminado em quebra de linha
+    """
+    if isinstance(content, bytes):
+        content = content.decode(encoding, errors='replace')
+    
+    if "<!--" in content or "<![CDATA[" in content:
+        # O texto de CDATA é literal: escapá-lo evita que seja lido como marcação
+        content = SPECIAL_PATTERN.sub(lambda match: html.escape(match.group(1), quote=False)
+                                      if match.group(1) else "", content)
+    
+    prefixes = tuple(sorted(set(NAMESPACE_PATTERN.findall(content))))
+    content = remove_skipped(content, prefixes)
+    pieces = tag_patterns(prefixes)[2].split(content)
+    pieces[1::2] = [TAG_SEPARATORS[tag.lower()] if tag else "" for tag in pieces[1::2]]
+    content = "".join(pieces)
+    
+    if "&" in content:
+        content = html.unescape(content)
+    for space in ("\n", "\r", "\t", "\f", "\xa0"):
+        if space in content:
+            content = content.replace(space, " ")
+    while "  " in content:
+        content = content.replace("  ", " ")
+    
+    # Espaços junto às quebras e quebras de linha repetidas
+    content = content.replace(" " + LINE_BREAK, LINE_BREAK).replace(LINE_BREAK + " ", LINE_BREAK)
+    while LINE_BREAK * 2 in content:
+        content = content.replace(LINE_BREAK * 2, LINE_BREAK)
+    
+    paragraphs = [block.strip(" " + LINE_BREAK) for block in content.split(PARAGRAPH_BREAK)]
+    return "\n\n".join(filter(None, paragraphs)).replace(LINE_BREAK, "\n") + "\n"
@@ -0,0 +1,811 @@
+import os
+import re
+import json
+import mmap
+import lzma
+import zlib
+import bisect
+from collections import OrderedDict
+import numpy as np
+
+from book_processor.dedup import NearDuplicateDetector
+from book_processor.outline import section_spans, section_path
+
+# Índice das páginas de um segmento: número da página e posição no texto do livro
+PAGE_DTYPE = np.dtype([("page", "<u4"), ("start", "<u8"), ("end", "<u8")])
+
+# Índice dos trechos de um segmento: identificador, páginas, tokens e posição no texto do livro
+CHUNK_DTYPE = np.dtype([("id", "S24"), ("page_start", "<u4"), ("page_end", "<u4"),
+                        ("tokens", "<u4"), ("start", "<u8"), ("end", "<u8")])
+
+# Índice dos blocos de um segmento: posição no texto do livro e no arquivo de dados
+BLOCK_DTYPE = np.dtype([("start", "<u8"), ("offset", "<u8"), ("length", "<u4")])
+
+# Funções de compressão e descompressão de cada formato de bloco
+CODECS = {
+    "none": (lambda data: data, lambda data: data),
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=6), lzma.decompress)
+}
+
+# Arquivos que compõem um segmento
+SEGMENT_SUFFIXES = (".dat", ".blocks.npy", ".pages.npy", ".chunks.npy")
+
+# Sumário do livro (capítulos e seções com intervalos de páginas), gravado
+# apenas para os livros que têm um
+SECTIONS_SUFFIX = ".sections.json"
+
+# Assinaturas MinHash e chaves do LSH das páginas e dos trechos, gravadas na
+# deduplicação para que um segmento inalterado não seja lido e comparado de novo
+SIGNATURES_SUFFIX = ".minhash.npz"
+
+class BlockWriter:
+    def __init__(self, file, compression="zlib", block_size=64 * 1024):
+        """
+        Grava um fluxo de bytes em blocos comprimidos de forma independente.
+        
+        Args:
+            file: Arquivo binário de saída
+            compression (str): Formato dos blocos ("none", "zlib" ou "lzma")
+            block_size (int): Tamanho de cada bloco antes da compressão
+        """
+        self.file = file
+        self.compress = CODECS[compression][0]
+        self.block_size = block_size
+        self.buffer = bytearray()
+        self.position = 0
+        self.blocks = []
+    
+    def write(self, data):
+        """
+        Acrescenta bytes ao fluxo.
+        
+        Args:
+            data (bytes): Bytes a gravar
+        """
+        self.buffer += data
+        self.position += len(data)
+        while len(self.buffer) >= self.block_size:
+            self._flush_block(bytes(self.buffer[:self.block_size]))
+            del self.buffer[:self.block_size]
+    
+    def _flush_block(self, block):
+        """
+        Comprime e grava um bloco.
+        
+        Args:
+            block (bytes): Bytes do bloco
+        """
+        start = self.position - len(self.buffer)
+        compressed = self.compress(block)
+        self.blocks.append((start, self.file.tell(), len(compressed)))
+        self.file.write(compressed)
+    
+    def close(self):
+        """
+        Grava o último bloco, se houver.
+        
+        Returns:
+            numpy.ndarray: Índice dos blocos gravados
+        """
+        if self.buffer:
+            self._flush_block(bytes(self.buffer))
+            self.buffer = bytearray()
+        return np.array(self.blocks, dtype=BLOCK_DTYPE)
+
+class KnowledgeSegment:
+    def __init__(self, store_dir, name, book_name, compression="zlib", cache_blocks=8):
+        """
+        Abre um segmento (um livro) da base de conhecimento. O arquivo de dados
+        é mapeado em memória e os índices são carregados com mmap_mode, de modo
+        que nada é lido do disco até ser acessado. Apenas os blocos que contêm
+        o intervalo pedido são descomprimidos.
+        
+        Args:
+            store_dir (str): Diretório da base de conhecimento
+            name (str): Nome do segmento (prefixo dos arquivos)
+            book_name (str): Nome do livro
+            compression (str): Formato dos blocos ("none", "zlib" ou "lzma")
+            cache_blocks (int): Número de blocos descomprimidos mantidos em cache
+        """
+        self.book_name = book_name
+        self.decompress = CODECS[compression][1]
+        self.cache_blocks = cache_blocks
+        self._cache = OrderedDict()
+        
+        base = os.path.join(store_dir, name)
+        self.blocks = np.load(base + ".blocks.npy", mmap_mode='r')
+        self.pages = np.load(base + ".pages.npy", mmap_mode='r')
+        self.chunks = np.load(base + ".chunks.npy", mmap_mode='r')
+        self._block_starts = np.asarray(self.blocks["start"])
+        
+        with open(base + ".dat", 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        
+        self.sections = []
+        if os.path.exists(base + SECTIONS_SUFFIX):
+            with open(base + SECTIONS_SUFFIX, 'r', encoding='utf-8') as file:
+                self.sections = json.load(file)
+        self._section_starts = [section["page_start"] for section in self.sections]
+    
+    def _block(self, index):
+        """
+        Retorna um bloco descomprimido, usando o cache.
+        
+        Args:
+            index (int): Posição do bloco no índice
+            
+        Returns:
+            bytes: Conteúdo do bloco
+        """
+        block = self._cache.get(index)
+        if block is not None:
+            self._cache.move_to_end(index)
+            return block
+        
+        entry = self.blocks[index]
+        offset = int(entry["offset"])
+        block = self.decompress(self.data[offset:offset + int(entry["length"])])
+        self._cache[index] = block
+        if len(self._cache) > self.cache_blocks:
+            self._cache.popitem(last=False)
+        return block
+    
+    def read(self, start, end):
+        """
+        Lê um intervalo do texto do livro.
+        
+        Args:
+            start (int): Posição inicial em bytes
+            end (int): Posição final em bytes (exclusiva)
+            
+        Returns:
+            str: Texto do intervalo
+        """
+        start = int(start)
+        end = int(end)
+        if end <= start:
+            return ""
+        
+        first = int(np.searchsorted(self._block_starts, start, side='right')) - 1
+        last = int(np.searchsorted(self._block_starts, end, side='left')) - 1
+        data = b"".join(self._block(index) for index in range(first, last + 1))
+        offset = int(self._block_starts[first])
+        return data[start - offset:end - offset].decode('utf-8')
+    
+    def text(self):
+        """
+        Retorna o texto completo do livro.
+        
+        Returns:
+            str: Texto do livro
+        """
+        if not len(self.pages):
+            return ""
+        return self.read(self.pages[0]["start"], self.pages[-1]["end"])
+    
+    def page_text(self, page):
+        """
+        Retorna o texto de uma página (ou capítulo) do livro.
+        
+        Args:
+            page (int): Número da página, a partir de 1
+            
+        Returns:
+            str: Texto da página ou None se não existir
+        """
+        rows = np.nonzero(self.pages["page"] == page)[0]
+        if not len(rows):
+            return None
+        row = self.pages[rows[0]]
+        return self.read(row["start"], row["end"])
+    
+    def chunk(self, row):
+        """
+        Retorna um trecho do livro como dicionário.
+        
+        Args:
+            row (int): Posição do trecho no segmento
+            
+        Returns:
+            dict: Trecho com id, livro, páginas, tokens e texto
+        """
+        entry = self.chunks[row]
+        chunk = {
+            "id": entry["id"].decode('ascii'),
+            "book": self.book_name,
+            "page_start": int(entry["page_start"]) or None,
+            "page_end": int(entry["page_end"]) or None,
+            "tokens": int(entry["tokens"]),
+            "text": self.read(entry["start"], entry["end"])
+        }
+        if self.sections and chunk["page_start"]:
+            chunk["section"] = section_path(self.sections, chunk["page_start"], self._section_starts)
+        return chunk
+
+class KnowledgeStore:
+    # Versão do formato do catálogo
+    FORMAT_VERSION = 2
+    CATALOG_FILENAME = "catalog.json"
+    DUPLICATES_FILENAME = "duplicates.npz"
+    
+    def __init__(self, store_dir, compression="zlib", block_size=64 * 1024):
+        """
+        Abre a base de conhecimento segmentada: por livro, um arquivo de dados
+        em blocos comprimidos e índices de blocos, páginas e trechos, listados
+        em um catálogo. Abrir a base lê apenas o catálogo; cada segmento é
+        mapeado em memória no primeiro acesso, e processos diferentes
+        compartilham as mesmas páginas pelo cache do sistema operacional.
+        
+        Args:
+            store_dir (str): Diretório da base de conhecimento
+            compression (str): Formato dos blocos gravados ("none", "zlib" ou "lzma")
+            block_size (int): Tamanho de cada bloco antes da compressão
+        """
+        self.store_dir = store_dir
+        self.compression = compression
+        self.block_size = block_size
+        self.books = []
+        self._segments = {}
+        self._chunk_offsets = [0]
+        self._page_offsets = [0]
+        self.duplicate_pages = None
+        self.duplicate_chunks = None
+        self._positions = None
+        self.load_catalog()
+    
+    @classmethod
+    def exists(cls, store_dir):
+        """
+        Verifica se há uma base de conhecimento segmentada no diretório.
+        
+        Args:
+            store_dir (str): Diretório da base de conhecimento
+            
+        Returns:
+            bool: True se o catálogo existir
+        """
+        return os.path.exists(os.path.join(store_dir, cls.CATALOG_FILENAME))
+    
+    def load_catalog(self):
+        """
+        Carrega o catálogo de segmentos, se existir.
+        """
+        self.books = []
+        self._segments = {}
+        try:
+            with open(os.path.join(self.store_dir, self.CATALOG_FILENAME), 'r', encoding='utf-8') as file:
+                catalog = json.load(file)
+            if catalog.get("version") == self.FORMAT_VERSION:
+                self.books = catalog["books"]
+            else:
+                print(f"Versão da base de conhecimento incompatível em {self.store_dir}. Reprocesse a biblioteca.")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Erro ao carregar o catálogo da base de conhecimento: {e}")
+        
+        self._chunk_offsets = [0]
+        self._page_offsets = [0]
+        for book in self.books:
+            self._chunk_offsets.append(self._chunk_offsets[-1] + book["chunks"])
+            self._page_offsets.append(self._page_offsets[-1] + book["pages"])
+        self._load_duplicates()
+    
+    def _load_duplicates(self):
+        """
+        Carrega as marcações de páginas e trechos quase duplicados, se
+        existirem e tiverem sido calculadas sobre os livros atuais do catálogo.
+        """
+        self.duplicate_pages = None
+        self.duplicate_chunks = None
+        self._positions = None
+        state = self._read_duplicates()
+        if state is None:
+            return
+        if state["books"] != self._book_fingerprints():
+            return
+        if len(state["pages"]) != self._page_offsets[-1] or len(state["chunks"]) != self._chunk_offsets[-1]:
+            print("Marcações de duplicados não correspondem à base de conhecimento e serão ignoradas.")
+            return
+        self.duplicate_pages = state["pages"]
+        self.duplicate_chunks = state["chunks"]
+        self._positions = np.flatnonzero(~state["chunks"])
+    
+    def _read_duplicates(self):
+        """
+        Lê o arquivo de marcações de duplicados, mesmo que não corresponda
+        mais ao catálogo.
+        
+        Returns:
+            dict: Marcações de páginas e trechos, livros (nome e identificação
+                do segmento), limiar e parâmetros usados, ou None
+        """
+        path = os.path.join(self.store_dir, self.DUPLICATES_FILENAME)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if "books" not in data:
+                    return None
+                return {
+                    "pages": data["pages"],
+                    "chunks": data["chunks"],
+                    "books": [tuple(book) for book in json.loads(str(data["books"]))],
+                    "threshold": float(data["threshold"]),
+                    "parameters": data["parameters"].tolist()
+                }
+        except Exception as e:
+            print(f"Erro ao carregar as marcações de duplicados: {e}")
+            return None
+    
+    def segment_fingerprint(self, book_name):
+        """
+        Identifica a versão gravada do segmento de um livro: o arquivo de
+        dados é sempre substituído por um novo ao reprocessar o livro.
+        
+        Args:
+            book_name (str): Nome do livro
+            
+        Returns:
+            str: Tamanho e data de modificação do arquivo de dados, ou None
+        """
+        try:
+            stat = os.stat(os.path.join(self.store_dir, self.segment_name(book_name) + ".dat"))
+        except OSError:
+            return None
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+    
+    def _book_fingerprints(self):
+        """
+        Returns:
+            list: (nome, identificação do segmento) de cada livro do catálogo
+        """
+        return [(book_name, self.segment_fingerprint(book_name)) for book_name in self.book_names()]
+    
+    def clear_duplicates(self):
+        """
+        Remove as marcações de duplicados, voltando a usar todas as páginas e
+        trechos da base.
+        """
+        path = os.path.join(self.store_dir, self.DUPLICATES_FILENAME)
+        if os.path.exists(path):
+            os.remove(path)
+        self._load_duplicates()
+    
+    @property
+    def deduplicated(self):
+        """
+        Returns:
+            bool: True se a base tiver marcações de duplicados válidas
+        """
+        return self.duplicate_chunks is not None
+    
+    def segment_name(self, book_name):
+        """
+        Retorna o nome do segmento usado para um livro.
+        
+        Args:
+            book_name (str): Nome do livro
+            
+        Returns:
+            str: Nome do segmento (prefixo dos arquivos)
+        """
+        return re.sub(r'[^\w\-_.]', '_', book_name)
+    
+    def has_segment(self, book_name):
+        """
+        Verifica se o segmento de um livro existe em disco.
+        
+        Args:
+            book_name (str): Nome do livro
+            
+        Returns:
+            bool: True se os arquivos do segmento existirem
+        """
+        base = os.path.join(self.store_dir, self.segment_name(book_name))
+        return all(os.path.exists(base + suffix) for suffix in SEGMENT_SUFFIXES)
+    
+    def write_segment(self, book_name, records, chunker=None, outline=None):
+        """
+        Grava o segmento de um livro em fluxo. O texto é armazenado uma única
+        vez, em blocos comprimidos de forma independente; páginas e trechos são
+        apenas intervalos desse texto.
+        
+        Args:
+            book_name (str): Nome do livro
+            records (iterator): Registros de texto do livro
+            chunker (TextChunker): Divisor de texto em trechos (opcional)
+            outline (list): Sumário do livro, tuplas (nível, título, página
+                inicial), gravado com o intervalo de páginas de cada seção (opcional)
+                
+        Returns:
+            dict: Número de páginas e de trechos gravados
+        """
+        os.makedirs(self.store_dir, exist_ok=True)
+        base = os.path.join(self.store_dir, self.segment_name(book_name))
+        pages = []
+        chunks = []
+        
+        with open(base + ".dat.tmp", 'wb') as data:
+            writer = BlockWriter(data, self.compression, self.block_size)
+            
+            def written_records():
+                for record in records:
+                    start = writer.position
+                    writer.write(record.text.encode('utf-8'))
+                    pages.append((record.page or 0, start, writer.position))
+                    yield record
+            
+            if chunker:
+                for chunk in chunker.chunk_records(written_records()):
+                    chunks.append((chunk["id"].encode('ascii'), chunk["page_start"] or 0,
+                                   chunk["page_end"] or 0, chunk["tokens"], chunk["start"], chunk["end"]))
+            else:
+                for _ in written_records():
+                    pass
+            
+            block_index = writer.close()
+        
+        for suffix, index in ((".blocks.npy", block_index),
+                              (".pages.npy", np.array(pages, dtype=PAGE_DTYPE)),
+                              (".chunks.npy", np.array(chunks, dtype=CHUNK_DTYPE))):
+            with open(base + suffix + ".tmp", 'wb') as file:
+                np.save(file, index)
+        
+        sections = section_spans(outline, max((page for page, _, _ in pages), default=1)) if outline else []
+        if sections:
+            with open(base + SECTIONS_SUFFIX + ".tmp", 'w', encoding='utf-8') as file:
+                json.dump(sections, file, ensure_ascii=False)
+        
+        for suffix in SEGMENT_SUFFIXES:
+            os.replace(base + suffix + ".tmp", base + suffix)
+        if sections:
+            os.replace(base + SECTIONS_SUFFIX + ".tmp", base + SECTIONS_SUFFIX)
+        elif os.path.exists(base + SECTIONS_SUFFIX):
+            os.remove(base + SECTIONS_SUFFIX)
+        if os.path.exists(base + SIGNATURES_SUFFIX):
+            os.remove(base + SIGNATURES_SUFFIX)
+        
+        self._segments.pop(book_name, None)
+        return {"pages": len(pages), "chunks": len(chunks), "sections": len(sections)}
+    
+    def remove_segment(self, book_name):
+        """
+        Remove os arquivos do segmento de um livro.
+        
+        Args:
+            book_name (str): Nome do livro
+        """
+        self._segments.pop(book_name, None)
+        base = os.path.join(self.store_dir, self.segment_name(book_name))
+        for suffix in SEGMENT_SUFFIXES + (SECTIONS_SUFFIX, SIGNATURES_SUFFIX):
+            if os.path.exists(base + suffix):
+                os.remove(base + suffix)
+    
+    def save_catalog(self, book_names):
+        """
+        Grava o catálogo com os livros presentes, na ordem informada.
+        
+        Args:
+            book_names (list): Nomes dos livros, na ordem da biblioteca
+        """
+        books = []
+        for book_name in book_names:
+            if not self.has_segment(book_name):
+                continue
+            base = os.path.join(self.store_dir, self.segment_name(book_name))
+            pages = np.load(base + ".pages.npy", mmap_mode='r')
+            chunks = np.load(base + ".chunks.npy", mmap_mode='r')
+            books.append({
+                "name": book_name,
+                "segment": self.segment_name(book_name),
+                "compression": self.compression,
+                "pages": len(pages),
+                "chunks": len(chunks),
+                "bytes": os.path.getsize(base + ".dat")
+            })
+        
+        catalog_path = os.path.join(self.store_dir, self.CATALOG_FILENAME)
+        with open(catalog_path + ".tmp", 'w', encoding='utf-8') as file:
+            json.dump({"version": self.FORMAT_VERSION, "books": books}, file, ensure_ascii=False, indent=2)
+        os.replace(catalog_path + ".tmp", catalog_path)
+        # Marcações de duplicados anteriores continuam gravadas, mas só são
+        # usadas se os livros não mudaram; deduplicate aproveita a parte que vale
+        self.load_catalog()
+        print(f"Base de conhecimento salva em: {self.store_dir}")
+    
+    def segment_signatures(self, book_name, detector):
+        """
+        Retorna as assinaturas MinHash e as chaves do LSH das páginas e dos
+        trechos de um livro. Ficam gravadas junto ao segmento e só são
+        calculadas de novo, lendo o texto, quando o segmento muda.
+        
+        Args:
+            book_name (str): Nome do livro
+            detector (NearDuplicateDetector): Detector que calcula as assinaturas
+            
+        Returns:
+            dict: Para "page" e "chunk": assinaturas (uma linha por página ou
+                trecho), chaves do LSH e máscara dos textos longos o bastante
+                para serem comparados
+        """
+        path = os.path.join(self.store_dir, self.segment_name(book_name) + SIGNATURES_SUFFIX)
+        fingerprint = self.segment_fingerprint(book_name)
+        try:
+            with np.load(path) as data:
+                if (str(data["fingerprint"]) == fingerprint
+                        and data["parameters"].tolist() == detector.parameters()):
+                    return {kind: {field: data[f"{kind}_{field}"] for field in ("signatures", "bands", "valid")}
+                            for kind in ("page", "chunk")}
+        except (OSError, KeyError, ValueError):
+            pass
+        
+        segment = self.segment(book_name)
+        arrays = {"fingerprint": np.array(fingerprint), "parameters": np.array(detector.parameters())}
+        signatures = {}
+        for kind, index in (("page", segment.pages), ("chunk", segment.chunks)):
+            matrix = np.zeros((len(index), detector.num_perm), dtype=np.uint32)
+            valid = np.zeros(len(index), dtype=bool)
+            for row, entry in enumerate(index):
+                signature = detector.signature(segment.read(entry["start"], entry["end"]))
+                if signature is not None:
+                    matrix[row] = signature
+                    valid[row] = True
+            signatures[kind] = {"signatures": matrix, "bands": detector.band_keys(matrix), "valid": valid}
+            for field, array in signatures[kind].items():
+                arrays[f"{kind}_{field}"] = array
+        
+        with open(path + ".tmp", 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(path + ".tmp", path)
+        return signatures
+    
+    def _mark_duplicates(self, detector, signatures, offset, marks, compare):
+        """
+        Registra as páginas ou os trechos de um livro no LSH.
+        
+        Args:
+            detector (NearDuplicateDetector): Detector de páginas ou de trechos
+            signatures (dict): Assinaturas, chaves do LSH e máscara de textos comparáveis
+            offset (int): Posição da primeira página ou trecho do livro na base
+            marks (numpy.ndarray): Marcações de duplicados do livro, atualizadas
+                se compare for True
+            compare (bool): Comparar os textos com os já registrados; se False,
+                as marcações já valem e apenas as cópias canônicas são registradas
+        """
+        matrix = signatures["signatures"]
+        bands = signatures["bands"]
+        if not compare:
+            for row in np.flatnonzero(signatures["valid"] & ~marks).tolist():
+                detector.insert(offset + row, matrix[row], bands[row])
+            return
+        for row in np.flatnonzero(signatures["valid"]).tolist():
+            if detector.add_signature(offset + row, matrix[row], bands[row]) is not None:
+                marks[row] = True
+    
+    def deduplicate(self, threshold=0.8):
+        """
+        Marca as páginas e os trechos quase duplicados entre livros (por
+        exemplo, edições diferentes do mesmo livro) com MinHash e LSH. A
+        primeira ocorrência, na ordem do catálogo, é mantida como cópia
+        canônica; as demais deixam de aparecer nos trechos e no texto completo
+        da base. As marcações são gravadas junto ao catálogo.
+        
+        A marcação de um livro depende apenas dos livros anteriores no
+        catálogo. Os livros iniciais que não mudaram desde a última
+        deduplicação mantêm suas marcações, e suas cópias canônicas entram no
+        LSH a partir das assinaturas gravadas, sem ler o texto; apenas os
+        livros seguintes são comparados.
+        
+        Args:
+            threshold (float): Similaridade estimada a partir da qual dois
+                textos são considerados duplicados
+                
+        Returns:
+            dict: Totais e duplicados de páginas e trechos, bytes de texto
+                removidos e livros comparados
+        """
+        pages = np.zeros(self._page_offsets[-1], dtype=bool)
+        chunks = np.zeros(self._chunk_offsets[-1], dtype=bool)
+        page_detector = NearDuplicateDetector(threshold)
+        chunk_detector = NearDuplicateDetector(threshold)
+        books = self._book_fingerprints()
+        
+        # Livros iniciais inalterados desde a última deduplicação
+        reused = 0
+        previous = self._read_duplicates()
+        if (previous is not None and previous["threshold"] == threshold
+                and previous["parameters"] == page_detector.parameters()):
+            while (reused < min(len(books), len(previous["books"]))
+                   and books[reused] == previous["books"][reused]):
+                reused += 1
+            pages[:self._page_offsets[reused]] = previous["pages"][:self._page_offsets[reused]]
+            chunks[:self._chunk_offsets[reused]] = previous["chunks"][:self._chunk_offsets[reused]]
+        
+        removed_bytes = 0
+        total_bytes = 0
+        for book_index, (book_name, _) in enumerate(books):
+            segment = self.segment(book_name)
+            page_offset = self._page_offsets[book_index]
+            chunk_offset = self._chunk_offsets[book_index]
+            page_end = self._page_offsets[book_index + 1]
+            chunk_end = self._chunk_offsets[book_index + 1]
+            
+            # Se nenhum livro mudou, não há o que comparar
+            if reused < len(books):
+                signatures = self.segment_signatures(book_name, page_detector)
+                compare = book_index >= reused
+                self._mark_duplicates(page_detector, signatures["page"], page_offset,
+                                      pages[page_offset:page_end], compare)
+                self._mark_duplicates(chunk_detector, signatures["chunk"], chunk_offset,
+                                      chunks[chunk_offset:chunk_end], compare)
+            
+            sizes = (segment.pages["end"] - segment.pages["start"]).astype(np.int64)
+            total_bytes += int(sizes.sum())
+            removed_bytes += int(sizes[pages[page_offset:page_end]].sum())
+            book_pages = int(pages[page_offset:page_end].sum())
+            book_chunks = int(chunks[chunk_offset:chunk_end].sum())
+            if book_index >= reused and (book_pages or book_chunks):
+                print(f"{book_name}: {book_pages} páginas e {book_chunks} trechos quase duplicados")
+        
+        path = os.path.join(self.store_dir, self.DUPLICATES_FILENAME)
+        with open(path + ".tmp", 'wb') as file:
+            np.savez(file, pages=pages, chunks=chunks, books=np.array(json.dumps(books, ensure_ascii=False)),
+                     threshold=np.array(threshold), parameters=np.array(page_detector.parameters()))
+        os.replace(path + ".tmp", path)
+        self._load_duplicates()
+        
+        stats = {
+            "pages": len(pages),
+            "duplicate_pages": int(pages.sum()),
+            "chunks": len(chunks),
+            "duplicate_chunks": int(chunks.sum()),
+            "bytes": total_bytes,
+            "duplicate_bytes": removed_bytes,
+            "compared_books": len(books) - reused
+        }
+        shrink = 100.0 * removed_bytes / total_bytes if total_bytes else 0.0
+        print(f"Deduplicação: {stats['duplicate_pages']} de {stats['pages']} páginas e "
+              f"{stats['duplicate_chunks']} de {stats['chunks']} trechos removidos; "
+              f"texto reduzido em {shrink:.1f}% ({stats['compared_books']} de {len(books)} livros comparados).")
+        return stats
+    
+    def segment(self, book_name):
+        """
+        Retorna o segmento de um livro, abrindo-o no primeiro acesso.
+        
+        Args:
+            book_name (str): Nome do livro
+            
+        Returns:
+            KnowledgeSegment: Segmento do livro
+        """
+        segment = self._segments.get(book_name)
+        if segment is None:
+            compression = self.compression
+            for book in self.books:
+                if book["name"] == book_name:
+                    compression = book["compression"]
+                    break
+            segment = KnowledgeSegment(self.store_dir, self.segment_name(book_name), book_name, compression)
+            self._segments[book_name] = segment
+        return segment
+    
+    def open_segments(self):
+        """
+        Abre os segmentos de todos os livros do catálogo. Como os segmentos
+        são regravados em arquivos novos, uma base com todos os segmentos
+        abertos continua lendo a versão atual mesmo que outra instância
+        reprocesse ou remova livros no mesmo diretório.
+        """
+        for book_name in self.book_names():
+            self.segment(book_name)
+    
+    def position_range(self, book_name, first_row, end_row):
+        """
+        Converte um intervalo de trechos de um livro em posições da base,
+        descontando os trechos quase duplicados.
+        
+        Args:
+            book_name (str): Nome do livro
+            first_row (int): Primeiro trecho no segmento
+            end_row (int): Trecho final no segmento, exclusivo
+            
+        Returns:
+            tuple: (posição inicial, posição final exclusiva) na ordem de __getitem__
+        """
+        book_index = self.book_names().index(book_name)
+        start = self._chunk_offsets[book_index] + first_row
+        end = self._chunk_offsets[book_index] + end_row
+        if self._positions is not None:
+            start, end = (int(position) for position in np.searchsorted(self._positions, [start, end]))
+        return start, end
+    
+    def book_names(self):
+        """
+        Retorna os nomes dos livros da base, na ordem do catálogo.
+        
+        Returns:
+            list: Nomes dos livros
+        """
+        return [book["name"] for book in self.books]
+    
+    def page_text(self, book_name, page):
+        """
+        Retorna o texto de uma página de um livro.
+        
+        Args:
+            book_name (str): Nome do livro
+            page (int): Número da página, a partir de 1
+            
+        Returns:
+            str: Texto da página ou None se não existir
+        """
+        return self.segment(book_name).page_text(page)
+    
+    def __len__(self):
+        """
+        Returns:
+            int: Número de trechos da base, sem os quase duplicados
+        """
+        if self._positions is not None:
+            return len(self._positions)
+        return self._chunk_offsets[-1]
+    
+    def __getitem__(self, position):
+        """
+        Retorna um trecho pela sua posição na base. Trechos quase duplicados
+        não ocupam posições.
+        
+        Args:
+            position (int): Posição do trecho, na ordem do catálogo
+            
+        Returns:
+            dict: Trecho com id, livro, páginas, tokens e texto
+        """
+        if position < 0 or position >= len(self):
+            raise IndexError(position)
+        if self._positions is not None:
+            position = int(self._positions[position])
+        book_index = bisect.bisect_right(self._chunk_offsets, position) - 1
+        book_name = self.books[book_index]["name"]
+        return self.segment(book_name).chunk(position - self._chunk_offsets[book_index])
+    
+    def iter_chunks(self):
+        """
+        Percorre os trechos da base na ordem do catálogo, sem os quase
+        duplicados, na mesma ordem das posições de __getitem__.
+        
+        Yields:
+            dict: Trechos da base
+        """
+        for book_index, book_name in enumerate(self.book_names()):
+            segment = self.segment(book_name)
+            offset = self._chunk_offsets[book_index]
+            for row in range(len(segment.chunks)):
+                if self.duplicate_chunks is None or not self.duplicate_chunks[offset + row]:
+                    yield segment.chunk(row)
+    
+    def full_text(self):
+        """
+        Monta o texto completo da base, no formato da antiga
+        medical_knowledge.txt, sem as páginas quase duplicadas. Lê todos os
+        segmentos; use apenas quando não houver índice de busca.
+        
+        Returns:
+            str: Texto completo da base de conhecimento
+        """
+        parts = []
+        for book_index, book_name in enumerate(self.book_names()):
+            parts.append(f"\n\n--- CONTEÚDO DE {book_name} ---\n\n")
+            segment = self.segment(book_name)
+            if self.duplicate_pages is None:
+                parts.append(segment.text())
+                continue
+            offset = self._page_offsets[book_index]
+            for row, entry in enumerate(segment.pages):
+                if not self.duplicate_pages[offset + row]:
+                    parts.append(segment.read(entry["start"], entry["end"]))
+        return "".join(parts)
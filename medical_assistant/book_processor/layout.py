@@ -0,0 +1,154 @@
+import re
+from collections import Counter, deque
+
+# Linhas que contêm apenas o número da página ("12", "Página 12", "12 de 340", "- 12 -")
+PAGE_NUMBER_PATTERN = re.compile(r"^[\s\-–|]*(?:p[áa]g(?:ina)?\.?\s*)?\d{1,4}(?:\s*(?:de|/)\s*\d{1,4})?[\s\-–|]*$",
+                                 re.IGNORECASE)
+
+DIGITS_PATTERN = re.compile(r"\d+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Cabeçalhos e rodapés numerados são curtos: em linhas mais longas os números
+# são mantidos na comparação, para não confundir linhas de texto parecidas
+# (uma tabela de doses, por exemplo) com ruído de diagramação
+MAX_NUMBERED_LENGTH = 50
+
+class LayoutNoiseFilter:
+    def __init__(self, edge_lines=3, window=16, lookahead=8, min_repeats=4):
+        """
+        Remove cabeçalhos, rodapés e números de página repetidos das páginas
+        de um livro em uma única passagem, junto com a extração. Uma linha no
+        topo ou no fim da página é considerada ruído de diagramação quando a
+        mesma linha (com os números trocados por um marcador, para aceitar a
+        numeração variável) aparece na mesma borda de várias páginas vizinhas.
+        Apenas as páginas da janela ficam na memória.
+        
+        Args:
+            edge_lines (int): Linhas examinadas no topo e no fim de cada página
+            window (int): Páginas vizinhas consideradas na contagem
+            lookahead (int): Páginas seguintes lidas antes de decidir uma página
+            min_repeats (int): Ocorrências na janela para considerar uma linha repetida
+        """
+        self.edge_lines = edge_lines
+        self.window = window
+        self.lookahead = min(lookahead, window - 1)
+        self.min_repeats = min_repeats
+        self.removed_lines = {}
+    
+    def line_key(self, line):
+        """
+        Normaliza uma linha para comparação entre páginas.
+        
+        Args:
+            line (str): Linha original
+            
+        Returns:
+            str: Linha em minúsculas, sem espaços repetidos e, se for curta,
+                com os números trocados por #
+        """
+        key = WHITESPACE_PATTERN.sub(" ", line.strip().lower())
+        if len(key) > MAX_NUMBERED_LENGTH:
+            return key
+        return DIGITS_PATTERN.sub("#", key)
+    
+    def _edge_keys(self, lines):
+        """
+        Calcula as chaves das linhas das bordas de uma página.
+        
+        Args:
+            lines (list): Linhas não vazias da página
+            
+        Returns:
+            set: Chaves ("top" ou "bottom", linha normalizada)
+        """
+        keys = set()
+        for line in lines[:self.edge_lines]:
+            keys.add(("top", self.line_key(line)))
+        for line in lines[-self.edge_lines:]:
+            keys.add(("bottom", self.line_key(line)))
+        return keys
+    
+    def _is_noise(self, edge, line, counts):
+        """
+        Verifica se uma linha da borda é ruído de diagramação.
+        
+        Args:
+            edge (str): "top" ou "bottom"
+            line (str): Linha original
+            counts (Counter): Ocorrências de cada chave na janela
+            
+        Returns:
+            bool: True se a linha for um número de página ou se repetir na janela
+        """
+        if PAGE_NUMBER_PATTERN.match(line):
+            return True
+        return counts[(edge, self.line_key(line))] >= self.min_repeats
+    
+    def _clean(self, record, lines, counts):
+        """
+        Remove as linhas de ruído das bordas de uma página, de fora para dentro.
+        
+        Args:
+            record (PageRecord): Registro original
+            lines (list): Linhas da página
+            counts (Counter): Ocorrências de cada chave na janela
+            
+        Returns:
+            tuple: (PageRecord limpo, número de linhas removidas)
+        """
+        content = [index for index, line in enumerate(lines) if line.strip()]
+        first = 0
+        while (first < min(self.edge_lines, len(content))
+               and self._is_noise("top", lines[content[first]], counts)):
+            first += 1
+        last = len(content)
+        while (last > max(first, len(content) - self.edge_lines)
+               and self._is_noise("bottom", lines[content[last - 1]], counts)):
+            last -= 1
+        
+        removed = first + len(content) - last
+        if not removed:
+            return record, 0
+        if first == last:
+            return record._replace(text="\n"), removed
+        kept = lines[content[first]:content[last - 1] + 1]
+        return record._replace(text="\n".join(kept) + "\n"), removed
+    
+    def filter(self, book_name, records):
+        """
+        Filtra os registros de um livro, entregando-os na ordem original.
+        
+        Args:
+            book_name (str): Nome do livro
+            records (iterator): Registros de texto do livro
+            
+        Yields:
+            PageRecord: Registros sem cabeçalhos, rodapés e números de página
+        """
+        counts = Counter()
+        history = deque()
+        pending = deque()
+        removed = 0
+        
+        for record in records:
+            lines = record.text.split("\n")
+            keys = self._edge_keys([line for line in lines if line.strip()])
+            counts.update(keys)
+            history.append(keys)
+            pending.append((record, lines))
+            
+            if len(history) > self.window:
+                counts.subtract(history.popleft())
+            if len(pending) > self.lookahead:
+                cleaned, count = self._clean(*pending.popleft(), counts)
+                removed += count
+                yield cleaned
+        
+        while pending:
+            cleaned, count = self._clean(*pending.popleft(), counts)
+            removed += count
+            yield cleaned
+        
+        self.removed_lines[book_name] = removed
+        if removed:
+            print(f"{book_name}: {removed} linhas de cabeçalho, rodapé ou numeração removidas")
@@ -0,0 +1,160 @@
+import os
+import json
+import hashlib
+
+class LibraryManifest:
+    def __init__(self, manifest_path, extractor_version):
+        """
+        Inicializa o manifesto da biblioteca, que registra o estado de cada
+        livro já processado para permitir o reprocessamento incremental.
+        
+        Args:
+            manifest_path (str): Caminho para o arquivo JSON do manifesto
+            extractor_version (str): Versão atual do extrator de texto
+        """
+        self.manifest_path = manifest_path
+        self.extractor_version = extractor_version
+        self.books = {}
+        self._hashes = {}
+        self.load()
+    
+    def load(self):
+        """
+        Carrega o manifesto do disco, se existir.
+        """
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                self.books = json.load(file).get("books", {})
+        except FileNotFoundError:
+            self.books = {}
+        except Exception as e:
+            print(f"Erro ao carregar o manifesto {self.manifest_path}: {e}")
+            self.books = {}
+    
+    def save(self):
+        """
+        Salva o manifesto no disco de forma atômica.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({"extractor_version": self.extractor_version, "books": self.books},
+                      file, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def clear(self):
+        """
+        Esquece todos os livros registrados, forçando o reprocessamento completo.
+        """
+        self.books = {}
+    
+    @staticmethod
+    def hash_file(path, block_size=1024 * 1024):
+        """
+        Calcula o hash SHA-256 do conteúdo de um arquivo, lendo em blocos.
+        
+        Args:
+            path (str): Caminho para o arquivo
+            block_size (int): Tamanho de cada bloco lido
+            
+        Returns:
+            str: Hash hexadecimal do conteúdo
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def file_hash(self, path):
+        """
+        Calcula o hash SHA-256 de um arquivo uma única vez por execução: o
+        hash fica guardado enquanto o tamanho e a data de modificação do
+        arquivo não mudarem, e é reaproveitado pela comparação com o
+        manifesto, pelo cache de páginas e pelo registro do livro processado.
+        
+        Args:
+            path (str): Caminho para o arquivo
+            
+        Returns:
+            str: Hash hexadecimal do conteúdo
+        """
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        digest = self._hashes.get(key)
+        if digest is None:
+            digest = self._hashes[key] = self.hash_file(path)
+        return digest
+    
+    def diff(self, library_path, books):
+        """
+        Compara os livros encontrados na biblioteca com o manifesto.
+        
+        O hash do conteúdo só é calculado quando o tamanho ou a data de
+        modificação mudaram, de modo que livros inalterados custam apenas um stat.
+        
+        Args:
+            library_path (str): Caminho para a biblioteca
+            books (list): Caminhos dos livros encontrados na biblioteca
+            
+        Returns:
+            tuple: (livros novos ou alterados, entradas de livros removidos)
+        """
+        changed = []
+        seen = set()
+        
+        for book_path in books:
+            key = os.path.relpath(book_path, library_path)
+            seen.add(key)
+            stat = os.stat(book_path)
+            entry = self.books.get(key)
+            
+            if entry is None or entry.get("extractor_version") != self.extractor_version:
+                changed.append(book_path)
+                continue
+            
+            if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                continue
+            
+            if entry["size"] == stat.st_size and entry["sha256"] == self.file_hash(book_path):
+                # Apenas a data de modificação mudou (ex.: cópia do arquivo)
+                entry["mtime"] = stat.st_mtime
+                continue
+            
+            changed.append(book_path)
+        
+        removed = [self.books[key] for key in self.books if key not in seen]
+        return changed, removed
+    
+    def update(self, library_path, book_path, book_name, details=None):
+        """
+        Registra o estado atual de um livro recém-processado.
+        
+        Args:
+            library_path (str): Caminho para a biblioteca
+            book_path (str): Caminho para o livro
+            book_name (str): Nome do livro usado na base de conhecimento
+            details (dict): Informações extras da extração a registrar
+                (ex.: codificação de um arquivo de texto) (opcional)
+        """
+        key = os.path.relpath(book_path, library_path)
+        stat = os.stat(book_path)
+        self.books[key] = {
+            "path": key,
+            "book_name": book_name,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": self.file_hash(book_path),
+            "extractor_version": self.extractor_version
+        }
+        if details:
+            self.books[key].update(details)
+    
+    def remove(self, entry):
+        """
+        Remove um livro do manifesto.
+        
+        Args:
+            entry (dict): Entrada do manifesto a remover
+        """
+        self.books.pop(entry["path"], None)
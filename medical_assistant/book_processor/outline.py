@@ -0,0 +1,210 @@
+import bisect
+import posixpath
+from urllib.parse import unquote
+from xml.etree import ElementTree
+
+# Espaços de nomes dos documentos de navegação de EPUBs (nav do EPUB 3 e NCX
+# do EPUB 2)
+OUTLINE_NAMESPACES = {
+    "container": "urn:oasis:names:tc:opendocument:xmlns:container",
+    "opf": "http://www.idpf.org/2007/opf",
+    "xhtml": "http://www.w3.org/1999/xhtml",
+    "epub": "http://www.idpf.org/2007/ops",
+    "ncx": "http://www.daisy.org/z3986/2005/ncx/"
+}
+
+def _clean_title(title):
+    """
+    Normaliza os espaços do título de uma seção.
+    
+    Args:
+        title (str): Título original
+        
+    Returns:
+        str: Título em uma única linha
+    """
+    return " ".join((title or "").split())
+
+def pdf_outline(reader):
+    """
+    Lê os marcadores (outline) de um PDF.
+    
+    Args:
+        reader (PyPDF2.PdfReader): PDF aberto
+        
+    Returns:
+        list: Tuplas (nível, título, página inicial numerada a partir de 1),
+            na ordem do documento
+    """
+    entries = []
+    
+    def walk(items, level):
+        for item in items:
+            if isinstance(item, list):
+                walk(item, level + 1)
+                continue
+            try:
+                page = reader.get_destination_page_number(item)
+            except Exception:
+                continue
+            title = _clean_title(getattr(item, "title", ""))
+            if title and page is not None and page >= 0:
+                entries.append((level, title, page + 1))
+    
+    walk(reader.outline, 1)
+    return entries
+
+def _resolve_href(base_path, href):
+    """
+    Resolve um link de um documento do EPUB para o caminho dentro do arquivo,
+    sem o fragmento.
+    
+    Args:
+        base_path (str): Caminho do documento que contém o link
+        href (str): Link relativo
+        
+    Returns:
+        str: Caminho do documento apontado
+    """
+    href = unquote(href.split("#", 1)[0])
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_path), href))
+
+def _nav_entries(element, nav_path, level, entries):
+    """
+    Percorre uma lista <ol> do documento nav do EPUB 3.
+    
+    Args:
+        element (Element): Lista <ol>
+        nav_path (str): Caminho do documento nav
+        level (int): Nível dos itens da lista
+        entries (list): Recebe tuplas (nível, título, documento)
+    """
+    for item in element.iterfind("xhtml:li", OUTLINE_NAMESPACES):
+        link = item.find("xhtml:a", OUTLINE_NAMESPACES)
+        if link is not None and link.get("href"):
+            entries.append((level, _clean_title("".join(link.itertext())), _resolve_href(nav_path, link.get("href"))))
+        for child in item.iterfind("xhtml:ol", OUTLINE_NAMESPACES):
+            _nav_entries(child, nav_path, level + 1, entries)
+
+def _ncx_entries(element, ncx_path, level, entries):
+    """
+    Percorre os navPoint do NCX do EPUB 2.
+    
+    Args:
+        element (Element): Elemento navMap ou navPoint
+        ncx_path (str): Caminho do NCX
+        level (int): Nível dos navPoint filhos
+        entries (list): Recebe tuplas (nível, título, documento)
+    """
+    for point in element.iterfind("ncx:navPoint", OUTLINE_NAMESPACES):
+        label = point.find("ncx:navLabel/ncx:text", OUTLINE_NAMESPACES)
+        content = point.find("ncx:content", OUTLINE_NAMESPACES)
+        if label is not None and content is not None and content.get("src"):
+            entries.append((level, _clean_title(label.text), _resolve_href(ncx_path, content.get("src"))))
+        _ncx_entries(point, ncx_path, level + 1, entries)
+
+def epub_outline(epub_file, documents):
+    """
+    Lê o sumário de um EPUB: o documento nav (EPUB 3) ou, na falta dele, o
+    NCX (EPUB 2). Cada entrada aponta para o documento em que a seção começa,
+    numerado como os capítulos extraídos.
+    
+    Args:
+        epub_file (zipfile.ZipFile): Arquivo EPUB aberto
+        documents (list): Documentos do EPUB, na ordem de extração
+        
+    Returns:
+        list: Tuplas (nível, título, capítulo inicial numerado a partir de 1)
+    """
+    container = ElementTree.fromstring(epub_file.read("META-INF/container.xml"))
+    opf_path = container.find(".//container:rootfile", OUTLINE_NAMESPACES).get("full-path")
+    package = ElementTree.fromstring(epub_file.read(opf_path))
+    
+    nav_path = None
+    ncx_path = None
+    for item in package.iterfind("opf:manifest/opf:item", OUTLINE_NAMESPACES):
+        path = _resolve_href(opf_path, item.get("href", ""))
+        if "nav" in (item.get("properties") or "").split():
+            nav_path = path
+        elif item.get("media-type") == "application/x-dtbncx+xml":
+            ncx_path = path
+    
+    links = []
+    if nav_path:
+        nav_document = ElementTree.fromstring(epub_file.read(nav_path))
+        for nav in nav_document.iter(f"{{{OUTLINE_NAMESPACES['xhtml']}}}nav"):
+            if nav.get(f"{{{OUTLINE_NAMESPACES['epub']}}}type") == "toc":
+                for element in nav.iterfind("xhtml:ol", OUTLINE_NAMESPACES):
+                    _nav_entries(element, nav_path, 1, links)
+                break
+    if not links and ncx_path:
+        nav_map = ElementTree.fromstring(epub_file.read(ncx_path)).find("ncx:navMap", OUTLINE_NAMESPACES)
+        if nav_map is not None:
+            _ncx_entries(nav_map, ncx_path, 1, links)
+    
+    chapters = {document: index + 1 for index, document in enumerate(documents)}
+    return [(level, title, chapters[document]) for level, title, document in links
+            if title and document in chapters]
+
+def section_spans(entries, last_page):
+    """
+    Converte as entradas de um sumário em seções com intervalo de páginas.
+    Cada seção vai da sua página inicial até a página anterior à próxima
+    seção do mesmo nível ou de nível superior (ou até o fim do livro). As
+    entradas são ordenadas pela página, mantendo a ordem do sumário entre as
+    que começam na mesma página.
+    
+    Args:
+        entries (list): Tuplas (nível, título, página inicial)
+        last_page (int): Última página do livro
+        
+    Returns:
+        list: Seções (dicionários com título, nível, páginas inicial e final
+            e a posição da seção pai, ou None), ordenadas pela página inicial
+    """
+    sections = []
+    open_sections = []
+    for level, title, page in sorted(entries, key=lambda entry: entry[2]):
+        # A nova seção encerra as seções abertas do mesmo nível ou mais internas
+        while open_sections and sections[open_sections[-1]]["level"] >= level:
+            closed = sections[open_sections.pop()]
+            closed["page_end"] = max(closed["page_start"], page - 1)
+        sections.append({
+            "title": title,
+            "level": level,
+            "page_start": page,
+            "page_end": max(page, last_page),
+            "parent": open_sections[-1] if open_sections else None
+        })
+        open_sections.append(len(sections) - 1)
+    return sections
+
+def section_path(sections, page, starts=None):
+    """
+    Encontra a seção mais interna que contém uma página.
+    
+    Args:
+        sections (list): Seções de um livro (section_spans)
+        page (int): Número da página
+        starts (list): Páginas iniciais das seções, para buscas repetidas (opcional)
+        
+    Returns:
+        str: Títulos da seção e de suas seções pai, separados por " > ", ou
+            None se nenhuma seção contiver a página
+    """
+    if starts is None:
+        starts = [section["page_start"] for section in sections]
+    
+    # A última seção que começa até a página é a mais interna candidata; se
+    # ela já terminou, a página pertence a uma de suas seções pai
+    position = bisect.bisect_right(starts, page) - 1
+    while position is not None and position >= 0 and sections[position]["page_end"] < page:
+        position = sections[position]["parent"]
+    if position is None or position < 0:
+        return None
+    
+    titles = []
+    while position is not None:
+        titles.append(sections[position]["title"])
+        position = sections[position]["parent"]
+    return " > ".join(reversed(titles))
@@ -0,0 +1,182 @@
+import os
+import struct
+
+from book_processor.manifest import LibraryManifest
+
+# Cabeçalho de cada registro do cache: tipo, número da página e tamanho do texto
+RECORD_HEADER = struct.Struct("<BII")
+
+# Tipos de registro: uma página extraída ou o fim do livro
+PAGE_RECORD = 0
+END_RECORD = 1
+
+class PageCacheEntry:
+    def __init__(self, path, book_name):
+        """
+        Cache de extração de um livro: um arquivo só de acréscimos com um
+        registro por página, gravado assim que a página é extraída. Um
+        registro incompleto no fim do arquivo (extração interrompida no meio
+        da gravação) é descartado ao abrir.
+        
+        Args:
+            path (str): Caminho do arquivo do cache
+            book_name (str): Nome do livro
+        """
+        self.path = path
+        self.book_name = book_name
+        self.pages = 0
+        self.complete = False
+        self.file = None
+        self._scan()
+    
+    def _scan(self):
+        """
+        Conta as páginas gravadas e verifica se o livro foi concluído, lendo
+        apenas os cabeçalhos dos registros.
+        """
+        if not os.path.exists(self.path):
+            return
+        
+        valid_end = 0
+        size = os.path.getsize(self.path)
+        with open(self.path, 'rb') as file:
+            while True:
+                header = file.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                kind, _, length = RECORD_HEADER.unpack(header)
+                if file.tell() + length > size:
+                    break
+                file.seek(length, os.SEEK_CUR)
+                valid_end = file.tell()
+                if kind == END_RECORD:
+                    self.complete = True
+                    break
+                self.pages += 1
+        
+        if valid_end < size:
+            with open(self.path, 'r+b') as file:
+                file.truncate(valid_end)
+    
+    def records(self, record_type):
+        """
+        Lê as páginas gravadas no cache, em ordem.
+        
+        Args:
+            record_type (type): Tipo dos registros criados (PageRecord)
+            
+        Yields:
+            PageRecord: Páginas do cache
+        """
+        if not self.pages:
+            return
+        with open(self.path, 'rb') as file:
+            for _ in range(self.pages):
+                _, page, length = RECORD_HEADER.unpack(file.read(RECORD_HEADER.size))
+                yield record_type(self.book_name, page, file.read(length).decode('utf-8'))
+    
+    def _write(self, kind, page, data):
+        """
+        Acrescenta um registro ao cache e o envia ao disco.
+        
+        Args:
+            kind (int): Tipo do registro
+            page (int): Número da página
+            data (bytes): Texto codificado
+        """
+        if self.file is None:
+            self.file = open(self.path, 'ab')
+        self.file.write(RECORD_HEADER.pack(kind, page, len(data)) + data)
+        self.file.flush()
+    
+    def append(self, record):
+        """
+        Grava uma página recém-extraída.
+        
+        Args:
+            record (PageRecord): Página extraída
+        """
+        self._write(PAGE_RECORD, record.page or 0, record.text.encode('utf-8'))
+        self.pages += 1
+    
+    def finish(self):
+        """
+        Marca o livro como concluído e fecha o arquivo.
+        """
+        self._write(END_RECORD, 0, b"")
+        self.complete = True
+        self.close()
+    
+    def close(self):
+        """
+        Fecha o arquivo do cache, se estiver aberto.
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class PageCache:
+    SUFFIX = ".pages"
+    
+    def __init__(self, cache_dir, extractor_version, hash_file=LibraryManifest.hash_file):
+        """
+        Cache em disco do texto extraído de cada página, identificado pelo
+        hash do conteúdo do livro, pelo número da página e pela versão do
+        extrator. Como cada página é gravada assim que é extraída, uma
+        ingestão interrompida recomeça da primeira página que falta. Depois
+        que as páginas de um livro são gravadas na base, o arquivo do livro é
+        removido com discard().
+        
+        Args:
+            cache_dir (str): Diretório do cache
+            extractor_version (str): Versão atual do extrator de texto
+            hash_file (callable): Calcula o hash SHA-256 de um livro; com
+                LibraryManifest.file_hash, o hash do manifesto é reaproveitado
+                em vez de ler o livro de novo
+        """
+        self.cache_dir = cache_dir
+        self.extractor_version = extractor_version
+        self.hash_file = hash_file
+        self._paths = {}
+    
+    def open(self, book_path):
+        """
+        Abre o cache de um livro.
+        
+        Args:
+            book_path (str): Caminho para o livro
+            
+        Returns:
+            PageCacheEntry: Cache do livro, possivelmente vazio
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        key = f"{self.hash_file(book_path)}-{self.extractor_version}"
+        path = self._paths[book_path] = os.path.join(self.cache_dir, key + self.SUFFIX)
+        return PageCacheEntry(path, os.path.basename(book_path))
+    
+    def discard(self, book_path):
+        """
+        Remove o cache de um livro cujas páginas já foram gravadas na base,
+        para que o texto extraído não fique guardado em duplicidade.
+        
+        Args:
+            book_path (str): Caminho para o livro
+        """
+        path = self._paths.pop(book_path, None)
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+    
+    def prune(self, book_hashes):
+        """
+        Remove do cache os livros que não estão mais na biblioteca ou que
+        foram extraídos por outra versão do extrator.
+        
+        Args:
+            book_hashes (set): Hashes SHA-256 dos livros atuais
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        keep = {f"{book_hash}-{self.extractor_version}{self.SUFFIX}" for book_hash in book_hashes}
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(self.SUFFIX) and name not in keep:
+                os.remove(os.path.join(self.cache_dir, name))
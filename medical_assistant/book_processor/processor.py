@@ -1,25 +1,155 @@
 import os
-import PyPDF2
-import ebooklib
-from ebooklib import epub
-import nltk
-from nltk.tokenize import sent_tokenize
+import sys
+import zipfile
+import posixpath
+from urllib.parse import unquote
+from xml.etree import ElementTree
 import re
 import json
+import time
+import shutil
+import tempfile
+from collections import namedtuple, deque
+
+from book_processor.html_text import html_to_text
+from book_processor.text_decoding import TextDecoder
+from book_processor.outline import pdf_outline, epub_outline
+
+# Versão do extrator de texto. Deve ser incrementada sempre que a extração
+# mudar, para que o manifesto force o reprocessamento dos livros.
+EXTRACTOR_VERSION = "6"
+
+# Registro produzido pela extração em fluxo: uma página (PDF), um capítulo
+# (EPUB) ou um grupo de linhas (TXT). A concatenação dos textos dos registros
+# de um livro reproduz exatamente o conteúdo extraído do livro.
+PageRecord = namedtuple("PageRecord", ["book", "page", "text"])
+
+# Extensões dos livros reconhecidos na biblioteca
+SUPPORTED_EXTENSIONS = ('.pdf', '.epub', '.txt')
+
+# Tamanho máximo, em caracteres, de cada registro de um arquivo de texto;
+# os registros terminam em fim de linha, exceto linhas maiores que o limite
+TXT_PAGE_CHARS = 16 * 1024
+
+# Capítulos por tarefa ao dividir EPUBs na ingestão paralela
+CHAPTERS_PER_TASK = 4
+
+# Tarefas enviadas por processo de trabalho e ainda não consumidas. Limita o
+# texto extraído que espera na memória quando os processos estão à frente da
+# gravação.
+PENDING_TASKS_PER_WORKER = 2
+
+# Espaços de nomes do container e do pacote OPF de um EPUB
+EPUB_NAMESPACES = {
+    "container": "urn:oasis:names:tc:opendocument:xmlns:container",
+    "opf": "http://www.idpf.org/2007/opf"
+}
+
+# Processador usado pelos processos de trabalho da ingestão paralela
+_worker_processor = None
+
+def _init_worker(library_path):
+    """
+    Inicializa um processo de trabalho com seu próprio BookProcessor.
+    
+    Args:
+        library_path (str): Caminho para a pasta contendo os livros médicos
+    """
+    global _worker_processor
+    _worker_processor = BookProcessor(library_path)
+
+def _run_task(book_path, start_page, end_page):
+    """
+    Extrai uma parte de um livro dentro de um processo de trabalho.
+    
+    Args:
+        book_path (str): Caminho para o livro
+        start_page (int): Primeira página, capítulo ou registro da parte
+        end_page (int): Página ou capítulo final, exclusivo (PDFs e EPUBs;
+            None para ir até o fim do livro)
+            
+    Returns:
+        tuple: (lista de PageRecord, tempo gasto em segundos, codificação
+            identificada se for um arquivo de texto)
+    """
+    started = time.perf_counter()
+    if end_page is None:
+        records = list(_worker_processor.iter_book(book_path, start_page))
+    elif book_path.lower().endswith('.epub'):
+        records = list(_worker_processor.iter_epub_chapters(book_path, start_page, end_page))
+    else:
+        records = list(_worker_processor.iter_pdf_pages(book_path, start_page, end_page))
+    encoding = _worker_processor.text_encodings.pop(os.path.basename(book_path), None)
+    return records, time.perf_counter() - started, encoding
+
+def peak_memory_mb():
+    """
+    Retorna o pico de memória residente do processo e dos processos de
+    trabalho já encerrados.
+    
+    Returns:
+        float: Pico de memória em MB, ou None se a plataforma não o informar
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = 0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        peak = max(peak, resource.getrusage(who).ru_maxrss)
+    # ru_maxrss é informado em KB no Linux e em bytes no macOS
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
 
 class BookProcessor:
-    def __init__(self, library_path):
+    def __init__(self, library_path, chunker=None, scorer=None, layout_filter=None, page_cache=None,
+                 memory_limit=None, spill_dir=None):
         """
         Inicializa o processador de livros com o caminho para a biblioteca.
         
         Args:
             library_path (str): Caminho para a pasta contendo os livros médicos
+            chunker (TextChunker): Divisor de texto em trechos (opcional)
+            scorer (RelevanceScorer): Filtro de relevância médica das páginas (opcional)
+            layout_filter (LayoutNoiseFilter): Remoção de cabeçalhos e rodapés dos PDFs (opcional)
+            page_cache (PageCache): Cache em disco das páginas extraídas, que permite
+                retomar uma ingestão interrompida (opcional)
+            memory_limit (int): Máximo de caracteres de texto mantidos em
+                processed_content; os livros que não cabem são gravados em
+                disco assim que extraídos (opcional, padrão: sem limite)
+            spill_dir (str): Diretório dos livros gravados em disco (opcional,
+                padrão: um diretório temporário)
         """
         self.library_path = library_path
+        self.chunker = chunker
+        self.scorer = scorer
+        self.layout_filter = layout_filter
+        self.page_cache = page_cache
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
         self.processed_content = {}
+        self.spilled_content = {}
+        self.book_order = []
+        self.memory_used = 0
+        self.book_stats = {}
+        self.relevance_stats = {}
+        self.text_encodings = {}
+        self.text_decoder = TextDecoder()
         self.knowledge_base = ""
+        self.resources_checked = False
+    
+    def ensure_resources(self):
+        """
+        Garante que os recursos do NLTK usados na divisão em sentenças estejam
+        disponíveis. A verificação é feita apenas quando há livros a processar,
+        para não atrasar a abertura de uma base já pronta.
+        """
+        if self.resources_checked:
+            return
+        self.resources_checked = True
         
-        # Garantir que os recursos do NLTK estejam disponíveis
+        import nltk
         try:
             nltk.data.find('tokenizers/punkt')
         except LookupError:
@@ -29,42 +159,180 @@ class BookProcessor:
         """
         Escaneia a biblioteca em busca de livros em formatos suportados.
         
+        Os livros são ordenados pelo caminho dentro da biblioteca, e não pela
+        ordem do sistema de arquivos: essa ordem vira a ordem do catálogo, que
+        decide qual edição de um trecho duplicado é mantida e quais livros a
+        deduplicação reaproveita de uma execução para outra.
+        
         Returns:
             list: Lista de caminhos para os livros encontrados
         """
-        supported_extensions = ['.pdf', '.epub', '.txt']
         books = []
         
         for root, _, files in os.walk(self.library_path):
             for file in files:
                 ext = os.path.splitext(file)[1].lower()
-                if ext in supported_extensions:
+                if ext in SUPPORTED_EXTENSIONS:
                     books.append(os.path.join(root, file))
+        books.sort(key=lambda book_path: os.path.relpath(book_path, self.library_path).split(os.sep))
         
         print(f"Encontrados {len(books)} livros na biblioteca.")
         return books
     
-    def process_pdf(self, pdf_path):
+    def count_pdf_pages(self, pdf_path):
         """
-        Extrai o texto de um arquivo PDF.
+        Conta as páginas de um arquivo PDF sem extrair o texto.
         
         Args:
             pdf_path (str): Caminho para o arquivo PDF
             
         Returns:
-            str: Texto extraído do PDF
+            int: Número de páginas (0 em caso de erro)
+        """
+        import PyPDF2
+        try:
+            with open(pdf_path, 'rb') as file:
+                return len(PyPDF2.PdfReader(file).pages)
+        except Exception as e:
+            print(f"Erro ao processar o PDF {pdf_path}: {e}")
+            return 0
+    
+    def iter_pdf_pages(self, pdf_path, start_page=0, end_page=None):
         """
-        text = ""
+        Extrai o texto de um arquivo PDF página por página, sob demanda.
+        
+        Args:
+            pdf_path (str): Caminho para o arquivo PDF
+            start_page (int): Primeira página a extrair
+            end_page (int): Página final, exclusiva (None para ir até o fim)
+            
+        Yields:
+            PageRecord: Texto de cada página, numerada a partir de 1
+        """
+        import PyPDF2
+        book_name = os.path.basename(pdf_path)
         try:
             with open(pdf_path, 'rb') as file:
                 reader = PyPDF2.PdfReader(file)
-                for page_num in range(len(reader.pages)):
-                    page = reader.pages[page_num]
-                    text += page.extract_text() + "\n"
+                if end_page is None:
+                    end_page = len(reader.pages)
+                for page_num in range(start_page, min(end_page, len(reader.pages))):
+                    # Uma página corrompida não interrompe o restante do livro
+                    try:
+                        text = reader.pages[page_num].extract_text()
+                    except Exception as e:
+                        print(f"Erro ao extrair a página {page_num + 1} de {pdf_path}: {e}")
+                        text = ""
+                    yield PageRecord(book_name, page_num + 1, text + "\n")
         except Exception as e:
             print(f"Erro ao processar o PDF {pdf_path}: {e}")
+    
+    def process_pdf(self, pdf_path, start_page=0, end_page=None):
+        """
+        Extrai o texto de um arquivo PDF.
+        
+        Args:
+            pdf_path (str): Caminho para o arquivo PDF
+            start_page (int): Primeira página a extrair
+            end_page (int): Página final, exclusiva (None para ir até o fim)
+            
+        Returns:
+            str: Texto extraído do PDF
+        """
+        return "".join(record.text for record in self.iter_pdf_pages(pdf_path, start_page, end_page))
+    
+    def list_epub_documents(self, epub_file):
+        """
+        Lista os documentos XHTML de um EPUB na ordem de leitura (spine do
+        pacote OPF), lendo apenas o container e o pacote OPF. Sem spine, os
+        documentos seguem a ordem do manifesto.
+        
+        Args:
+            epub_file (zipfile.ZipFile): Arquivo EPUB aberto
+            
+        Returns:
+            list: Nomes dos documentos dentro do arquivo
+        """
+        container = ElementTree.fromstring(epub_file.read("META-INF/container.xml"))
+        rootfile = container.find(".//container:rootfile", EPUB_NAMESPACES)
+        opf_path = rootfile.get("full-path")
+        package = ElementTree.fromstring(epub_file.read(opf_path))
+        
+        items = {}
+        for item in package.iterfind("opf:manifest/opf:item", EPUB_NAMESPACES):
+            if item.get("media-type") == "application/xhtml+xml":
+                items[item.get("id")] = posixpath.normpath(posixpath.join(posixpath.dirname(opf_path),
+                                                                          unquote(item.get("href"))))
+        
+        spine = [itemref.get("idref") for itemref in package.iterfind("opf:spine/opf:itemref", EPUB_NAMESPACES)]
+        documents = [items[idref] for idref in spine if idref in items]
+        return documents or list(items.values())
+    
+    def count_epub_chapters(self, epub_path):
+        """
+        Conta os documentos de um arquivo EPUB sem extrair o texto.
+        
+        Args:
+            epub_path (str): Caminho para o arquivo EPUB
+            
+        Returns:
+            int: Número de documentos (0 em caso de erro)
+        """
+        try:
+            with zipfile.ZipFile(epub_path) as epub_file:
+                return len(self.list_epub_documents(epub_file))
+        except Exception as e:
+            print(f"Erro ao processar o EPUB {epub_path}: {e}")
+            return 0
+    
+    def iter_epub_chapters(self, epub_path, start_chapter=0, end_chapter=None):
+        """
+        Extrai o texto de um arquivo EPUB capítulo por capítulo, sob demanda.
+        Cada documento é lido do arquivo apenas quando é sua vez e convertido
+        em texto em uma única passagem, sem carregar os demais capítulos.
+        
+        Args:
+            epub_path (str): Caminho para o arquivo EPUB
+            start_chapter (int): Primeiro documento a extrair
+            end_chapter (int): Documento final, exclusivo (None para ir até o fim)
+            
+        Yields:
+            PageRecord: Texto de cada documento do EPUB, numerado a partir de 1
+        """
+        book_name = os.path.basename(epub_path)
+        try:
+            with zipfile.ZipFile(epub_path) as epub_file:
+                documents = self.list_epub_documents(epub_file)
+                for chapter in range(start_chapter, min(len(documents) if end_chapter is None else end_chapter,
+                                                        len(documents))):
+                    yield PageRecord(book_name, chapter + 1, html_to_text(epub_file.read(documents[chapter])))
+        except Exception as e:
+            print(f"Erro ao processar o EPUB {epub_path}: {e}")
+    
+    def extract_outline(self, book_path):
+        """
+        Lê o sumário de um livro: os marcadores de um PDF ou a navegação de um
+        EPUB. Arquivos de texto não têm sumário.
         
-        return text
+        Args:
+            book_path (str): Caminho para o livro
+            
+        Returns:
+            list: Tuplas (nível, título, página ou capítulo inicial), vazia se
+                o livro não tiver sumário
+        """
+        ext = os.path.splitext(book_path)[1].lower()
+        try:
+            if ext == '.pdf':
+                import PyPDF2
+                with open(book_path, 'rb') as file:
+                    return pdf_outline(PyPDF2.PdfReader(file))
+            if ext == '.epub':
+                with zipfile.ZipFile(book_path) as epub_file:
+                    return epub_outline(epub_file, self.list_epub_documents(epub_file))
+        except Exception as e:
+            print(f"Erro ao ler o sumário de {book_path}: {e}")
+        return []
     
     def process_epub(self, epub_path):
         """
@@ -76,18 +344,34 @@ class BookProcessor:
         Returns:
             str: Texto extraído do EPUB
         """
-        text = ""
+        return "".join(record.text for record in self.iter_epub_chapters(epub_path))
+    
+    def iter_txt_blocks(self, txt_path):
+        """
+        Lê um arquivo de texto em blocos, identificando a codificação pelo
+        início do arquivo e decodificando em uma única leitura. A codificação
+        identificada fica registrada em text_encodings.
+        
+        Args:
+            txt_path (str): Caminho para o arquivo de texto
+            
+        Yields:
+            str: Blocos de texto decodificado
+        """
+        book_name = os.path.basename(txt_path)
+        stats = {}
         try:
-            book = epub.read_epub(epub_path)
-            for item in book.get_items():
-                if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                    content = item.get_content().decode('utf-8')
-                    # Remover tags HTML
-                    text += re.sub('<[^<]+?>', '', content) + "\n"
+            with open(txt_path, 'rb') as file:
+                yield from self.text_decoder.iter_text(file, stats)
         except Exception as e:
-            print(f"Erro ao processar o EPUB {epub_path}: {e}")
+            print(f"Erro ao processar o arquivo de texto {txt_path}: {e}")
+            return
         
-        return text
+        self.text_encodings[book_name] = stats
+        if stats["encoding"] == "mixed":
+            print(f"{book_name}: UTF-8 com {stats['legacy_lines']} linhas em outra codificação")
+        elif stats["encoding"] != "utf-8":
+            print(f"{book_name}: codificação {stats['encoding']}")
     
     def process_txt(self, txt_path):
         """
@@ -99,16 +383,76 @@ class BookProcessor:
         Returns:
             str: Conteúdo do arquivo de texto
         """
-        try:
-            with open(txt_path, 'r', encoding='utf-8') as file:
-                return file.read()
-        except UnicodeDecodeError:
-            try:
-                with open(txt_path, 'r', encoding='latin-1') as file:
-                    return file.read()
-            except Exception as e:
-                print(f"Erro ao processar o arquivo de texto {txt_path}: {e}")
-                return ""
+        return "".join(self.iter_txt_blocks(txt_path))
+    
+    def iter_txt_pages(self, txt_path, start_page=0):
+        """
+        Extrai o texto de um arquivo de texto em registros de até
+        TXT_PAGE_CHARS caracteres, à medida que os blocos são decodificados,
+        sem ler o arquivo inteiro.
+        
+        Args:
+            txt_path (str): Caminho para o arquivo de texto
+            start_page (int): Primeiro registro a entregar
+            
+        Yields:
+            PageRecord: Grupos de linhas do arquivo, numerados a partir de 1
+        """
+        book_name = os.path.basename(txt_path)
+        page = 0
+        pending = ""
+        for block in self.iter_txt_blocks(txt_path):
+            text = pending + block
+            offset = 0
+            while len(text) - offset >= TXT_PAGE_CHARS:
+                cut = text.rfind("\n", offset, offset + TXT_PAGE_CHARS) + 1
+                if cut <= offset:
+                    cut = offset + TXT_PAGE_CHARS
+                page += 1
+                if page > start_page:
+                    yield PageRecord(book_name, page, text[offset:cut])
+                offset = cut
+            pending = text[offset:]
+        
+        # O último registro (ou o único, de um arquivo vazio)
+        if pending or not page:
+            page += 1
+            if page > start_page:
+                yield PageRecord(book_name, page, pending)
+    
+    def iter_book(self, book_path, start=0):
+        """
+        Extrai o texto de um livro com base em sua extensão, sob demanda.
+        
+        Args:
+            book_path (str): Caminho para o livro
+            start (int): Primeira página (PDF), capítulo (EPUB) ou registro
+                (TXT) a extrair
+                
+        Yields:
+            PageRecord: Registros de texto do livro, na ordem original
+        """
+        ext = os.path.splitext(book_path)[1].lower()
+        
+        if ext == '.pdf':
+            yield from self.iter_pdf_pages(book_path, start)
+        elif ext == '.epub':
+            yield from self.iter_epub_chapters(book_path, start)
+        elif ext == '.txt':
+            yield from self.iter_txt_pages(book_path, start)
+        else:
+            print(f"Formato não suportado: {ext}")
+    
+    def iter_library(self):
+        """
+        Extrai o texto de todos os livros da biblioteca, sob demanda, sem
+        materializar nenhum livro inteiro na memória.
+        
+        Yields:
+            PageRecord: Registros de texto de todos os livros
+        """
+        for _, records in self.iter_books(self.scan_library()):
+            yield from records
     
     def process_book(self, book_path):
         """
@@ -120,37 +464,523 @@ class BookProcessor:
         Returns:
             str: Texto extraído do livro
         """
-        ext = os.path.splitext(book_path)[1].lower()
         book_name = os.path.basename(book_path)
         
         print(f"Processando: {book_name}")
+        self.ensure_resources()
         
-        if ext == '.pdf':
-            content = self.process_pdf(book_path)
-        elif ext == '.epub':
-            content = self.process_epub(book_path)
-        elif ext == '.txt':
-            content = self.process_txt(book_path)
-        else:
-            print(f"Formato não suportado: {ext}")
-            return None
-        
-        self.processed_content[book_name] = content
-        return content
+        records = self._track_stats(book_name, self.iter_book(book_path))
+        records = self.filter_records(book_name, self.strip_layout(book_path, records))
+        self.collect_book(book_name, records)
+        return self.get_book_content(book_name)
     
-    def process_all_books(self):
+    def process_all_books(self, workers=1, pages_per_task=50):
         """
         Processa todos os livros na biblioteca.
         
+        Args:
+            workers (int): Número de processos de trabalho (1 para processamento serial)
+            pages_per_task (int): Páginas por tarefa ao dividir PDFs grandes
+            
         Returns:
             dict: Dicionário com o conteúdo processado de cada livro
         """
         books = self.scan_library()
-        for book_path in books:
-            self.process_book(book_path)
+        return self.process_books(books, workers, pages_per_task)
+    
+    def process_books(self, books, workers=1, pages_per_task=50, output_dir=None, chunks_dir=None,
+                      store=None, book_saved=None):
+        """
+        Processa uma lista de livros, em série ou em paralelo.
+        
+        Se output_dir for informado, o texto de cada livro é gravado em disco
+        à medida que é extraído e não é mantido em processed_content. Sem
+        output_dir nem store, os livros ficam em processed_content até o
+        limite de memory_limit; os demais vão para arquivos temporários. Se
+        chunks_dir também for informado e houver um chunker, os trechos de
+        cada livro são gerados na mesma passagem e salvos nesse diretório.
+        Se store for informado, cada livro é gravado como um segmento da base
+        de conhecimento, com seu texto e seus trechos.
+        
+        Args:
+            books (list): Caminhos dos livros a processar
+            workers (int): Número de processos de trabalho (1 para processamento serial)
+            pages_per_task (int): Páginas por tarefa ao dividir PDFs grandes
+            output_dir (str): Diretório para gravar o texto de cada livro (opcional)
+            chunks_dir (str): Diretório para gravar os trechos de cada livro (opcional)
+            store (KnowledgeStore): Base de conhecimento segmentada (opcional)
+            book_saved (callable): Função chamada com o caminho de cada livro
+                assim que ele é processado, para registrar o progresso (opcional)
+                
+        Returns:
+            dict: Dicionário com o conteúdo processado de cada livro
+        """
+        started = time.perf_counter()
+        if books:
+            self.ensure_resources()
+        
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        
+        for book_path, records in self.iter_books(books, workers, pages_per_task):
+            book_name = os.path.basename(book_path)
+            records = self.filter_records(book_name, self.strip_layout(book_path, records))
+            if store is not None:
+                counts = store.write_segment(book_name, records, self.chunker, self.extract_outline(book_path))
+                print(f"{counts['chunks']} trechos e {counts['sections']} seções do sumário gravados para {book_name}")
+            elif output_dir:
+                chunks_path = None
+                if chunks_dir and self.chunker:
+                    chunks_path = os.path.join(chunks_dir, self.get_chunks_filename(book_name))
+                self.save_book_records(records, os.path.join(output_dir, self.get_output_filename(book_name)),
+                                       chunks_path)
+            else:
+                self.collect_book(book_name, records)
+            
+            if book_saved is not None:
+                book_saved(book_path)
+            # Com o livro gravado em disco, o cache das páginas não é mais necessário
+            if self.page_cache is not None and (store is not None or output_dir):
+                self.page_cache.discard(book_path)
         
+        self.report_throughput(time.perf_counter() - started)
+        self.report_relevance()
+        self.report_memory()
         return self.processed_content
     
+    def collect_book(self, book_name, records):
+        """
+        Guarda o texto de um livro em processed_content enquanto couber no
+        limite de memória. Quando o limite é atingido, o texto já lido e o
+        restante do livro são gravados em um arquivo temporário.
+        
+        Args:
+            book_name (str): Nome do livro
+            records (iterator): Registros de texto do livro
+        """
+        self.discard_book(book_name)
+        self.book_order.append(book_name)
+        
+        parts = []
+        size = 0
+        records = iter(records)
+        for record in records:
+            parts.append(record.text)
+            size += len(record.text)
+            if self.memory_limit is not None and self.memory_used + size > self.memory_limit:
+                self.spill_book(book_name, parts, records)
+                return
+        
+        self.processed_content[book_name] = "".join(parts)
+        self.memory_used += size
+    
+    def spill_book(self, book_name, parts, records):
+        """
+        Grava em disco o texto de um livro que não cabe no limite de memória.
+        
+        Args:
+            book_name (str): Nome do livro
+            parts (list): Texto já lido do livro
+            records (iterator): Registros restantes do livro
+        """
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="medical_spill_")
+        os.makedirs(self.spill_dir, exist_ok=True)
+        
+        path = os.path.join(self.spill_dir, self.get_output_filename(book_name))
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write("".join(parts))
+            parts.clear()
+            for record in records:
+                file.write(record.text)
+        self.spilled_content[book_name] = path
+        print(f"{book_name} excede o limite de memória; texto gravado em {path}")
+    
+    def discard_book(self, book_name):
+        """
+        Descarta o texto guardado de um livro, em memória ou em disco.
+        
+        Args:
+            book_name (str): Nome do livro
+        """
+        if book_name in self.processed_content:
+            self.memory_used -= len(self.processed_content.pop(book_name))
+        path = self.spilled_content.pop(book_name, None)
+        if path and os.path.exists(path):
+            os.remove(path)
+        if book_name in self.book_order:
+            self.book_order.remove(book_name)
+    
+    def iter_book_content(self, book_name, block_size=1024 * 1024):
+        """
+        Entrega o texto processado de um livro em blocos, lendo do disco os
+        livros que excederam o limite de memória.
+        
+        Args:
+            book_name (str): Nome do livro
+            block_size (int): Caracteres por bloco lido do disco
+            
+        Yields:
+            str: Blocos do texto do livro
+        """
+        if book_name in self.processed_content:
+            yield self.processed_content[book_name]
+            return
+        with open(self.spilled_content[book_name], 'r', encoding='utf-8') as file:
+            while True:
+                block = file.read(block_size)
+                if not block:
+                    break
+                yield block
+    
+    def get_book_content(self, book_name):
+        """
+        Retorna o texto processado de um livro, em memória ou em disco.
+        
+        Args:
+            book_name (str): Nome do livro
+            
+        Returns:
+            str: Texto do livro
+        """
+        return "".join(self.iter_book_content(book_name))
+    
+    def iter_knowledge_base(self):
+        """
+        Entrega a base de conhecimento em blocos, na ordem em que os livros
+        foram processados, sem montá-la inteira na memória.
+        
+        Yields:
+            str: Blocos da base de conhecimento
+        """
+        for book_name in self.book_order:
+            yield f"\n\n--- CONTEÚDO DE {book_name} ---\n\n"
+            yield from self.iter_book_content(book_name)
+    
+    def cleanup_spill(self):
+        """
+        Remove os arquivos temporários dos livros gravados em disco.
+        """
+        for book_name in list(self.spilled_content):
+            self.discard_book(book_name)
+    
+    def iter_books(self, books, workers=1, pages_per_task=50):
+        """
+        Extrai uma lista de livros, em série ou em paralelo, entregando os
+        registros de cada livro em fluxo e na ordem original.
+        
+        Args:
+            books (list): Caminhos dos livros a processar
+            workers (int): Número de processos de trabalho (1 para processamento serial)
+            pages_per_task (int): Páginas por tarefa ao dividir PDFs grandes
+            
+        Yields:
+            tuple: (caminho do livro, iterador de PageRecord do livro)
+        """
+        if workers > 1 and books:
+            yield from self._iter_books_parallel(books, workers, pages_per_task)
+            return
+        
+        for book_path in books:
+            book_name = os.path.basename(book_path)
+            print(f"Processando: {book_name}")
+            yield book_path, self.iter_book_cached(book_path)
+    
+    def iter_book_cached(self, book_path):
+        """
+        Extrai um livro usando o cache de páginas, se houver: as páginas já
+        extraídas são lidas do cache e a extração recomeça da primeira que
+        falta. Cada página nova é gravada no cache assim que é extraída. As
+        estatísticas de extração contam apenas as páginas extraídas.
+        
+        Args:
+            book_path (str): Caminho para o livro
+            
+        Yields:
+            PageRecord: Registros de texto do livro, na ordem original
+        """
+        book_name = os.path.basename(book_path)
+        if self.page_cache is None:
+            yield from self._track_stats(book_name, self.iter_book(book_path))
+            return
+        
+        entry = self.page_cache.open(book_path)
+        records = self._track_stats(book_name, self.iter_book(book_path, entry.pages))
+        yield from self._iter_cached_records(entry, records)
+    
+    def _iter_cached_records(self, entry, records):
+        """
+        Entrega as páginas do cache de um livro seguidas das páginas recém
+        extraídas, gravando estas no cache.
+        
+        Args:
+            entry (PageCacheEntry): Cache do livro
+            records (iterator): Registros extraídos a partir da primeira página ausente do cache
+            
+        Yields:
+            PageRecord: Registros de texto do livro, na ordem original
+        """
+        try:
+            if entry.pages:
+                state = "completo" if entry.complete else "parcial"
+                print(f"{entry.book_name}: {entry.pages} páginas recuperadas do cache ({state})")
+            yield from entry.records(PageRecord)
+            if entry.complete:
+                return
+            for record in records:
+                entry.append(record)
+                yield record
+            entry.finish()
+        finally:
+            entry.close()
+    
+    def _iter_books_parallel(self, books, workers, pages_per_task):
+        """
+        Distribui os livros entre processos de trabalho. PDFs grandes são
+        divididos em intervalos de páginas e EPUBs em grupos de capítulos; as
+        partes são reagrupadas na ordem original, de modo que o resultado é
+        idêntico ao do processamento serial.
+        
+        Fora da thread principal (atualização em segundo plano com o editor
+        aberto), os processos são iniciados com spawn: criar processos com
+        fork em um programa com várias threads pode travar o processo filho.
+        
+        Args:
+            books (list): Caminhos dos livros a processar
+            workers (int): Número de processos de trabalho
+            pages_per_task (int): Páginas por tarefa ao dividir PDFs grandes
+            
+        Yields:
+            tuple: (caminho do livro, iterador de PageRecord do livro)
+        """
+        import multiprocessing
+        import threading
+        from concurrent.futures import ProcessPoolExecutor
+        print(f"Processando {len(books)} livros com {workers} processos...")
+        
+        mp_context = None
+        if threading.current_thread() is not threading.main_thread():
+            mp_context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_init_worker,
+                                 initargs=(self.library_path,)) as executor:
+            book_plans = []
+            for book_path in books:
+                # Com o cache, apenas as páginas que faltam são distribuídas
+                entry = self.page_cache.open(book_path) if self.page_cache is not None else None
+                first = entry.pages if entry is not None else 0
+                if entry is not None and entry.complete:
+                    ranges = []
+                elif book_path.lower().endswith('.pdf'):
+                    page_count = self.count_pdf_pages(book_path)
+                    ranges = [(start, min(start + pages_per_task, page_count))
+                              for start in range(first, page_count, pages_per_task)]
+                elif book_path.lower().endswith('.epub'):
+                    chapter_count = self.count_epub_chapters(book_path)
+                    ranges = [(start, min(start + CHAPTERS_PER_TASK, chapter_count))
+                              for start in range(first, chapter_count, CHAPTERS_PER_TASK)]
+                else:
+                    # Arquivos de texto são lidos em uma única tarefa, a
+                    # partir do primeiro registro ausente do cache
+                    ranges = [(first, None)]
+                book_plans.append((book_path, entry, ranges))
+            
+            # As tarefas são enviadas aos poucos, à medida que as anteriores
+            # são consumidas, e nunca mais que algumas por processo
+            tasks = ((book_path, start, end) for book_path, _, ranges in book_plans for start, end in ranges)
+            pending = deque()
+            
+            def submit_tasks():
+                while len(pending) < workers * PENDING_TASKS_PER_WORKER:
+                    task = next(tasks, None)
+                    if task is None:
+                        break
+                    pending.append(executor.submit(_run_task, *task))
+            
+            submit_tasks()
+            for book_path, entry, ranges in book_plans:
+                records = self._iter_task_results(os.path.basename(book_path), pending, len(ranges), submit_tasks)
+                if entry is not None:
+                    records = self._iter_cached_records(entry, records)
+                yield book_path, records
+    
+    def _iter_task_results(self, book_name, pending, count, submit_tasks):
+        """
+        Entrega os registros das partes de um livro processadas em paralelo,
+        liberando cada parte assim que é consumida e enviando as próximas
+        tarefas em seu lugar.
+        
+        Args:
+            book_name (str): Nome do livro
+            pending (deque): Tarefas enviadas, na ordem das páginas; as do
+                livro estão no início
+            count (int): Número de tarefas do livro
+            submit_tasks (callable): Envia novas tarefas até o limite
+            
+        Yields:
+            PageRecord: Registros de texto do livro
+        """
+        pages = 0
+        chars = 0
+        elapsed = 0.0
+        for _ in range(count):
+            records, seconds, encoding = pending.popleft().result()
+            submit_tasks()
+            if encoding is not None:
+                self.text_encodings[book_name] = encoding
+            elapsed += seconds
+            for record in records:
+                pages += 1
+                chars += len(record.text)
+                yield record
+        
+        print(f"Processado: {book_name}")
+        self._record_stats(book_name, chars, pages, elapsed)
+    
+    def _track_stats(self, book_name, records):
+        """
+        Repassa os registros de um livro medindo apenas o tempo de extração.
+        
+        Args:
+            book_name (str): Nome do livro
+            records (iterator): Registros de texto do livro
+            
+        Yields:
+            PageRecord: Os mesmos registros recebidos
+        """
+        pages = 0
+        chars = 0
+        elapsed = 0.0
+        while True:
+            started = time.perf_counter()
+            record = next(records, None)
+            elapsed += time.perf_counter() - started
+            if record is None:
+                break
+            pages += 1
+            chars += len(record.text)
+            yield record
+        
+        self._record_stats(book_name, chars, pages, elapsed)
+    
+    def _record_stats(self, book_name, chars, pages, elapsed):
+        """
+        Registra as estatísticas de extração de um livro.
+        
+        Args:
+            book_name (str): Nome do livro
+            chars (int): Número de caracteres extraídos
+            pages (int): Número de páginas (ou capítulos) extraídos
+            elapsed (float): Tempo de extração em segundos
+        """
+        self.book_stats[book_name] = {
+            "pages": pages,
+            "chars": chars,
+            "seconds": elapsed
+        }
+    
+    def strip_layout(self, book_path, records):
+        """
+        Remove cabeçalhos, rodapés e números de página repetidos das páginas
+        de um PDF à medida que são extraídas. Os demais formatos não têm
+        paginação e são entregues sem alteração.
+        
+        Args:
+            book_path (str): Caminho do livro
+            records (iterator): Registros de texto do livro
+            
+        Yields:
+            PageRecord: Registros sem o ruído de diagramação
+        """
+        if self.layout_filter is None or not book_path.lower().endswith('.pdf'):
+            yield from records
+            return
+        
+        yield from self.layout_filter.filter(os.path.basename(book_path), records)
+    
+    def filter_records(self, book_name, records):
+        """
+        Descarta as páginas de baixo valor médico (índices, referências,
+        créditos, páginas em branco ou ilegíveis) à medida que são extraídas,
+        registrando quanto de cada livro foi mantido e descartado.
+        
+        Args:
+            book_name (str): Nome do livro
+            records (iterator): Registros de texto do livro
+            
+        Yields:
+            PageRecord: Registros com pontuação acima do limite do scorer
+        """
+        if self.scorer is None:
+            yield from records
+            return
+        
+        stats = {"kept_pages": 0, "pruned_pages": 0, "kept_chars": 0, "pruned_chars": 0}
+        for record in records:
+            if self.scorer.keep(record.text):
+                stats["kept_pages"] += 1
+                stats["kept_chars"] += len(record.text)
+                yield record
+            else:
+                stats["pruned_pages"] += 1
+                stats["pruned_chars"] += len(record.text)
+        
+        self.relevance_stats[book_name] = stats
+        total_chars = stats["kept_chars"] + stats["pruned_chars"]
+        pruned = 100.0 * stats["pruned_chars"] / total_chars if total_chars else 0.0
+        print(f"{book_name}: {stats['kept_pages']} páginas mantidas, {stats['pruned_pages']} descartadas "
+              f"por baixa relevância ({pruned:.1f}% do texto)")
+    
+    def report_relevance(self):
+        """
+        Exibe o total de páginas e caracteres mantidos e descartados pelo
+        filtro de relevância.
+        """
+        if not self.relevance_stats:
+            return
+        
+        kept_pages = sum(stats["kept_pages"] for stats in self.relevance_stats.values())
+        pruned_pages = sum(stats["pruned_pages"] for stats in self.relevance_stats.values())
+        kept_chars = sum(stats["kept_chars"] for stats in self.relevance_stats.values())
+        pruned_chars = sum(stats["pruned_chars"] for stats in self.relevance_stats.values())
+        total_chars = max(kept_chars + pruned_chars, 1)
+        print(f"Filtro de relevância: {kept_pages} páginas mantidas, {pruned_pages} descartadas; "
+              f"{pruned_chars} de {kept_chars + pruned_chars} caracteres removidos "
+              f"({100.0 * pruned_chars / total_chars:.1f}%).")
+    
+    def report_throughput(self, total_elapsed):
+        """
+        Exibe a vazão de extração por livro e total.
+        
+        Args:
+            total_elapsed (float): Tempo total (relógio) do processamento em segundos
+        """
+        total_pages = 0
+        total_chars = 0
+        for book_name, stats in self.book_stats.items():
+            seconds = max(stats["seconds"], 1e-9)
+            total_pages += stats["pages"]
+            total_chars += stats["chars"]
+            print(f"  {book_name}: {stats['pages']} páginas, {stats['chars']} caracteres em "
+                  f"{stats['seconds']:.2f}s ({stats['pages'] / seconds:.1f} páginas/s, "
+                  f"{stats['chars'] / seconds / 1024:.1f} KB/s)")
+        
+        total_elapsed = max(total_elapsed, 1e-9)
+        print(f"Total: {len(self.book_stats)} livros, {total_pages} páginas, {total_chars} caracteres em "
+              f"{total_elapsed:.2f}s ({total_pages / total_elapsed:.1f} páginas/s, "
+              f"{total_chars / total_elapsed / 1024:.1f} KB/s)")
+    
+    def report_memory(self):
+        """
+        Exibe o pico de memória do processamento e o texto mantido em memória
+        ou gravado em disco.
+        """
+        peak = peak_memory_mb()
+        if peak is not None:
+            print(f"Pico de memória: {peak:.1f} MB")
+        if self.spilled_content:
+            print(f"{len(self.processed_content)} livros em memória ({self.memory_used} caracteres), "
+                  f"{len(self.spilled_content)} gravados em {self.spill_dir}")
+    
     def extract_medical_knowledge(self):
         """
         Extrai conhecimento médico dos livros processados.
@@ -158,26 +988,116 @@ class BookProcessor:
         Returns:
             str: Base de conhecimento médico extraída
         """
-        all_text = ""
-        for book_name, content in self.processed_content.items():
-            all_text += f"\n\n--- CONTEÚDO DE {book_name} ---\n\n"
-            all_text += content
+        all_text = "".join(self.iter_knowledge_base())
         
-        # Aqui poderíamos implementar técnicas mais avançadas de NLP
-        # para extrair apenas informações médicas relevantes
+        # As páginas de baixo valor médico já foram descartadas durante a
+        # extração por filter_records, se houver um scorer
+        self.report_relevance()
         
         self.knowledge_base = all_text
         return self.knowledge_base
     
     def save_knowledge_base(self, output_path):
         """
-        Salva a base de conhecimento em um arquivo.
+        Salva a base de conhecimento em um arquivo. Se ela ainda não foi
+        montada por extract_medical_knowledge, é gravada em fluxo a partir do
+        texto de cada livro, sem ser montada na memória.
         
         Args:
             output_path (str): Caminho para salvar a base de conhecimento
         """
         with open(output_path, 'w', encoding='utf-8') as file:
-            file.write(self.knowledge_base)
+            if self.knowledge_base:
+                file.write(self.knowledge_base)
+            else:
+                for block in self.iter_knowledge_base():
+                    file.write(block)
+        
+        print(f"Base de conhecimento salva em: {output_path}")
+    
+    def get_output_filename(self, book_name):
+        """
+        Retorna o nome do arquivo usado para salvar o conteúdo de um livro.
+        
+        Args:
+            book_name (str): Nome do livro
+            
+        Returns:
+            str: Nome do arquivo de saída
+        """
+        safe_name = re.sub(r'[^\w\-_.]', '_', book_name)
+        return f"{safe_name}.txt"
+    
+    def save_book_records(self, records, output_path, chunks_path=None):
+        """
+        Grava os registros de um livro em disco à medida que são extraídos.
+        
+        O arquivo é escrito em um temporário e renomeado ao final, para que
+        uma interrupção nunca deixe um livro salvo pela metade.
+        
+        Args:
+            records (iterator): Registros de texto do livro
+            output_path (str): Caminho do arquivo de saída
+            chunks_path (str): Caminho para salvar os trechos do livro (opcional)
+        """
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            def written_records():
+                for record in records:
+                    file.write(record.text)
+                    yield record
+            
+            if chunks_path:
+                count = self.chunker.save_chunks(self.chunker.chunk_records(written_records()), chunks_path)
+                print(f"{count} trechos gerados para {os.path.basename(output_path)}")
+            else:
+                for _ in written_records():
+                    pass
+        os.replace(tmp_path, output_path)
+    
+    def get_chunks_filename(self, book_name):
+        """
+        Retorna o nome do arquivo usado para salvar os trechos de um livro.
+        
+        Args:
+            book_name (str): Nome do livro
+            
+        Returns:
+            str: Nome do arquivo de trechos
+        """
+        safe_name = re.sub(r'[^\w\-_.]', '_', book_name)
+        return f"{safe_name}.jsonl"
+    
+    def chunk_processed_content(self):
+        """
+        Divide o conteúdo processado de cada livro em trechos.
+        
+        Returns:
+            list: Trechos de todos os livros processados
+        """
+        chunks = []
+        for book_name in self.book_order:
+            chunks.extend(self.chunker.chunk_text(book_name, self.get_book_content(book_name)))
+        return chunks
+    
+    def save_knowledge_base_from_books(self, book_names, books_dir, output_path):
+        """
+        Monta a base de conhecimento a partir dos arquivos de cada livro já
+        salvos em disco, copiando-os em blocos sem carregá-los na memória.
+        
+        Args:
+            book_names (list): Nomes dos livros, na ordem desejada
+            books_dir (str): Diretório com o conteúdo processado de cada livro
+            output_path (str): Caminho para salvar a base de conhecimento
+        """
+        with open(output_path, 'w', encoding='utf-8') as output:
+            for book_name in book_names:
+                book_path = os.path.join(books_dir, self.get_output_filename(book_name))
+                if not os.path.exists(book_path):
+                    continue
+                output.write(f"\n\n--- CONTEÚDO DE {book_name} ---\n\n")
+                with open(book_path, 'r', encoding='utf-8') as book_file:
+                    shutil.copyfileobj(book_file, output)
         
         print(f"Base de conhecimento salva em: {output_path}")
     
@@ -190,11 +1110,11 @@ class BookProcessor:
         """
         os.makedirs(output_dir, exist_ok=True)
         
-        for book_name, content in self.processed_content.items():
-            safe_name = re.sub(r'[^\w\-_.]', '_', book_name)
-            output_path = os.path.join(output_dir, f"{safe_name}.txt")
+        for book_name in self.book_order:
+            output_path = os.path.join(output_dir, self.get_output_filename(book_name))
             
             with open(output_path, 'w', encoding='utf-8') as file:
-                file.write(content)
+                for block in self.iter_book_content(book_name):
+                    file.write(block)
         
         print(f"Conteúdo processado salvo em: {output_dir}")
@@ -0,0 +1,151 @@
+import re
+
+from retrieval.normalization import fold_accents, stem, PORTUGUESE_STOPWORDS
+
+# Termos médicos frequentes (sem acentos, no singular)
+MEDICAL_TERMS = {
+    "paciente", "doenca", "sindrome", "sintoma", "sinal", "diagnostico", "tratamento", "terapia",
+    "terapeutica", "prognostico", "etiologia", "fisiopatologia", "epidemiologia", "clinico", "clinica",
+    "exame", "laboratorial", "hemograma", "cultura", "radiografia", "tomografia", "ultrassonografia",
+    "ressonancia", "biopsia", "dose", "posologia", "medicamento", "farmaco", "droga", "antibiotico",
+    "analgesico", "antitermico", "corticoide", "vacina", "vacinacao", "infeccao", "infeccioso", "viral",
+    "bacteriano", "bacteria", "virus", "fungo", "febre", "tosse", "dor", "dispneia", "vomito", "diarreia",
+    "convulsao", "desidratacao", "hidratacao", "lactente", "neonato", "recem", "nascido", "crianca",
+    "adolescente", "gestante", "gestacao", "parto", "pediatria", "pediatrico", "neonatal", "pulmonar",
+    "cardiaco", "renal", "hepatico", "neurologico", "gastrointestinal", "respiratorio", "urinario",
+    "pele", "sangue", "plaqueta", "leucocito", "hemoglobina", "glicemia", "insulina", "pressao",
+    "arterial", "frequencia", "saturacao", "oxigenio", "internacao", "uti", "emergencia", "cirurgia",
+    "cirurgico", "agudo", "cronico", "grave", "leve", "moderado", "quadro", "evolucao", "complicacao",
+    "risco", "fator", "prevencao", "profilaxia", "triagem", "rastreamento", "crescimento",
+    "desenvolvimento", "nutricao", "aleitamento", "alimentacao", "peso", "estatura", "asma",
+    "pneumonia", "bronquiolite", "otite", "amigdalite", "faringite", "sinusite", "meningite",
+    "sepse", "choque", "anemia", "diabete", "hipertensao", "obesidade", "alergia", "alergico",
+    "paracetamol", "dipirona", "ibuprofeno", "amoxicilina", "azitromicina", "ceftriaxona",
+    "salbutamol", "prednisolona", "soro", "oral", "venoso", "intravenoso", "intramuscular",
+    "mg", "kg", "ml", "mcg", "ui", "mmhg", "bpm", "irpm", "dl"
+}
+
+# Terminações típicas de termos médicos
+MEDICAL_SUFFIXES = ("ite", "ose", "emia", "algia", "patia", "ectomia", "terapia", "grafia", "plasia",
+                    "trofia", "cardia", "logia", "oma", "uria", "penia", "cito", "scopia", "plegia",
+                    "micina", "cilina", "azol", "olol", "pril", "sartana")
+
+# Versão da pontuação; faz parte da versão do manifesto, de modo que uma
+# mudança nos critérios reprocessa os livros
+SCORER_VERSION = "3"
+
+# Marcas de páginas sem conteúdo clínico: créditos, catalogação e referências
+BOILERPLATE_PATTERN = re.compile(
+    r"isbn|copyright|©|todos os direitos reservados|ficha catalogr|dados internacionais de catalo"
+    r"|impresso no brasil|et al\.|doi:|disponível em:|acesso em:|editora",
+    re.IGNORECASE
+)
+
+# Linhas de sumário ou índice remissivo. Terminar em número não basta (é o
+# caso das linhas de tabelas de doses e sinais vitais); exige-se pontilhado
+# até o número da página ("Febre ........ 23") ou um termo sem números
+# seguido de uma lista de páginas após vírgula ("Febre, 23, 45-47")
+PAGE_NUMBER = r"\d{1,4}(?:\s*[-–]\s*\d{1,4})?"
+INDEX_LINE_PATTERN = re.compile(
+    rf"(?:\.{{3,}}|…|(?:\s?\.\s){{3,}})\s*{PAGE_NUMBER}\s*$"
+    rf"|^[^\d,]*[^\W\d][^\d,]*,\s*{PAGE_NUMBER}(?:\s*[,;]\s*{PAGE_NUMBER})*\s*$"
+)
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+class RelevanceScorer:
+    def __init__(self, threshold=0.25, min_words=3, target_density=0.12, target_words=80):
+        """
+        Pontua a relevância médica de uma página ou trecho pela densidade de
+        termos médicos, pela qualidade do texto e pelo tamanho.
+        
+        Páginas curtas são penalizadas pelo tamanho, mas não descartadas: uma
+        tabela de doses, um fluxograma ou um quadro de conduta têm poucas
+        palavras e muitos termos médicos. Só textos com menos de min_words
+        palavras (cabeçalhos soltos, números de página) são zerados.
+        
+        Args:
+            threshold (float): Pontuação mínima para manter o texto (0 a 1)
+            min_words (int): Número mínimo de palavras para pontuar o texto
+            target_density (float): Fração de termos médicos considerada plena
+            target_words (int): Número de palavras a partir do qual o tamanho não penaliza
+        """
+        self.threshold = threshold
+        self.min_words = min_words
+        self.target_density = target_density
+        self.target_words = target_words
+    
+    def is_medical(self, word):
+        """
+        Verifica se uma palavra normalizada é um termo médico.
+        
+        Args:
+            word (str): Palavra sem acentos e em minúsculas
+            
+        Returns:
+            bool: True se for um termo médico conhecido ou tiver terminação médica
+        """
+        if word in MEDICAL_TERMS or stem(word) in MEDICAL_TERMS:
+            return True
+        return len(word) > 5 and word.endswith(MEDICAL_SUFFIXES)
+    
+    def quality(self, text):
+        """
+        Estima a qualidade do texto: proporção de letras entre os caracteres
+        que não são números e de linhas de índice, sumário ou referência.
+        
+        Args:
+            text (str): Texto original
+            
+        Returns:
+            float: Qualidade entre 0 e 1
+        """
+        # Números não contam contra o texto: tabelas de doses, sinais vitais
+        # e valores de referência são quase só números. A proporção de letras
+        # é medida entre os demais caracteres, para detectar lixo de extração
+        visible = [char for char in text if not char.isspace() and not char.isdigit()]
+        if not visible:
+            return 0.0
+        letters = sum(char.isalpha() for char in visible) / len(visible)
+        
+        lines = [line for line in text.splitlines() if line.strip()]
+        index_lines = sum(1 for line in lines if INDEX_LINE_PATTERN.search(line))
+        index_ratio = index_lines / len(lines) if lines else 0.0
+        
+        boilerplate = len(BOILERPLATE_PATTERN.findall(text))
+        boilerplate_penalty = min(1.0, boilerplate / max(1.0, len(lines) / 4))
+        
+        return max(0.0, letters * (1 - index_ratio) * (1 - 0.8 * boilerplate_penalty))
+    
+    def score(self, text):
+        """
+        Calcula a pontuação de relevância de um texto.
+        
+        Args:
+            text (str): Texto da página ou trecho
+            
+        Returns:
+            float: Pontuação entre 0 e 1
+        """
+        words = [word for word in WORD_PATTERN.findall(fold_accents(text)) if not word.isdigit()]
+        if len(words) < self.min_words:
+            return 0.0
+        
+        content_words = [word for word in words if word not in PORTUGUESE_STOPWORDS]
+        medical = sum(1 for word in content_words if self.is_medical(word))
+        density = min(1.0, medical / max(1, len(content_words)) / self.target_density)
+        length = min(1.0, len(words) / self.target_words)
+        
+        return self.quality(text) * (0.2 + 0.8 * density) * (0.6 + 0.4 * length)
+    
+    def keep(self, text):
+        """
+        Verifica se um texto deve ser mantido na base de conhecimento.
+        
+        Args:
+            text (str): Texto da página ou trecho
+            
+        Returns:
+            bool: True se a pontuação atingir o limite
+        """
+        return self.score(text) >= self.threshold
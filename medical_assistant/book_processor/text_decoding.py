@@ -0,0 +1,142 @@
+import codecs
+
+# Marcas de ordem de bytes reconhecidas no início do arquivo
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16")
+)
+
+# Codificações de 8 bits tentadas, em ordem, no texto que não é UTF-8. O
+# cp1252 (exportações do Windows) não define alguns bytes; o latin-1 aceita
+# qualquer byte.
+LEGACY_ENCODINGS = ("cp1252", "latin-1")
+
+class TextDecoder:
+    def __init__(self, prefix_size=64 * 1024, block_size=1024 * 1024):
+        """
+        Decodifica arquivos de texto em fluxo, sem saber a codificação de
+        antemão e sem reler o arquivo.
+        
+        A codificação é identificada por um prefixo limitado: marca de ordem
+        de bytes, UTF-8 válido ou, caso contrário, uma codificação de 8 bits
+        (cp1252 ou, se não servir, latin-1). O restante é lido em blocos; cada bloco é
+        decodificado como UTF-8 e, se falhar, linha a linha, de modo que
+        linhas em outra codificação no meio de um arquivo UTF-8 (ou linhas em
+        UTF-8 em um arquivo antigo) são decodificadas sem recomeçar a leitura.
+        
+        Args:
+            prefix_size (int): Bytes do início do arquivo usados na identificação
+            block_size (int): Bytes lidos por vez
+        """
+        self.prefix_size = prefix_size
+        self.block_size = block_size
+    
+    def sniff(self, prefix):
+        """
+        Identifica a codificação de um arquivo a partir do seu início.
+        
+        Args:
+            prefix (bytes): Primeiros bytes do arquivo
+            
+        Returns:
+            str: Codificação identificada
+        """
+        for bom, encoding in BOMS:
+            if prefix.startswith(bom):
+                return encoding
+        
+        try:
+            # O prefixo pode terminar no meio de um caractere
+            codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+            return "utf-8"
+        except UnicodeDecodeError:
+            return self.decode_legacy(prefix)[1]
+    
+    def decode_legacy(self, data):
+        """
+        Decodifica texto na primeira codificação de 8 bits que o aceita.
+        
+        Args:
+            data (bytes): Texto codificado
+            
+        Returns:
+            tuple: (texto, codificação usada)
+        """
+        for encoding in LEGACY_ENCODINGS[:-1]:
+            try:
+                return data.decode(encoding), encoding
+            except UnicodeDecodeError:
+                pass
+        return data.decode(LEGACY_ENCODINGS[-1]), LEGACY_ENCODINGS[-1]
+    
+    def decode_lines(self, data, stats):
+        """
+        Decodifica um bloco de linhas completas, como UTF-8 sempre que
+        possível e, linha a linha, em uma codificação de 8 bits quando não.
+        
+        Args:
+            data (bytes): Bloco terminado em fim de linha (ou no fim do arquivo)
+            stats (dict): Contador de linhas em codificação de 8 bits, atualizado
+            
+        Returns:
+            str: Texto do bloco
+        """
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+        
+        lines = []
+        for line in data.splitlines(keepends=True):
+            try:
+                lines.append(line.decode("utf-8"))
+            except UnicodeDecodeError:
+                lines.append(self.decode_legacy(line)[0])
+                stats["legacy_lines"] += 1
+        return "".join(lines)
+    
+    def iter_text(self, file, stats):
+        """
+        Decodifica um arquivo aberto em modo binário, em blocos.
+        
+        Args:
+            file (file): Arquivo em modo binário
+            stats (dict): Recebe a codificação identificada e o número de
+                linhas decodificadas em codificação de 8 bits
+                
+        Yields:
+            str: Blocos de texto decodificado
+        """
+        prefix = file.read(self.prefix_size)
+        encoding = self.sniff(prefix)
+        stats.update({"encoding": encoding, "legacy_lines": 0})
+        
+        # Com marca de ordem de bytes, a codificação é conhecida e o arquivo
+        # é decodificado de forma incremental
+        if encoding in ("utf-8-sig", "utf-16"):
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            data = prefix
+            while data:
+                yield decoder.decode(data)
+                data = file.read(self.block_size)
+            yield decoder.decode(b"", final=True)
+            return
+        
+        pending = prefix
+        while True:
+            block = file.read(self.block_size)
+            if not block:
+                break
+            pending += block
+            # Apenas linhas completas são decodificadas; o resto aguarda o
+            # próximo bloco
+            cut = pending.rfind(b"\n") + 1
+            if cut:
+                yield self.decode_lines(pending[:cut], stats)
+                pending = pending[cut:]
+        if pending:
+            yield self.decode_lines(pending, stats)
+        
+        if encoding == "utf-8" and stats["legacy_lines"]:
+            stats["encoding"] = "mixed"
@@ -0,0 +1,109 @@
+import os
+import threading
+
+from book_processor.processor import SUPPORTED_EXTENSIONS
+
+class LibraryWatcher:
+    def __init__(self, library_path, on_change, interval=10.0):
+        """
+        Observa a pasta da biblioteca e chama on_change, em uma thread de
+        fundo, quando livros são adicionados, alterados ou removidos.
+        
+        A verificação usa apenas os metadados dos arquivos (tamanho e data de
+        modificação), sem ler o conteúdo nem depender de serviços do sistema.
+        Uma mudança só é entregue quando a pasta fica igual em duas
+        verificações seguidas, para não processar um livro ainda sendo copiado.
+        
+        Args:
+            library_path (str): Caminho para a biblioteca
+            on_change (callable): Função chamada, na thread de fundo, a cada
+                mudança estável da biblioteca
+            interval (float): Segundos entre as verificações
+        """
+        self.library_path = library_path
+        self.on_change = on_change
+        self.interval = interval
+        self.state = None
+        self.pending = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def scan(self):
+        """
+        Lê os metadados dos livros da biblioteca.
+        
+        Returns:
+            dict: Caminho do livro -> (tamanho, data de modificação em ns)
+        """
+        state = {}
+        for root, _, files in os.walk(self.library_path):
+            for file in files:
+                if os.path.splitext(file)[1].lower() not in SUPPORTED_EXTENSIONS:
+                    continue
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # Arquivo removido durante a varredura
+                    continue
+                state[path] = (stat.st_size, stat.st_mtime_ns)
+        return state
+    
+    def poll(self):
+        """
+        Verifica a biblioteca uma vez.
+        
+        Returns:
+            bool: True se houver uma mudança estável desde a última entregue
+        """
+        state = self.scan()
+        if self.state is None:
+            self.state = state
+            return False
+        if state == self.state:
+            self.pending = None
+            return False
+        if state != self.pending:
+            # Mudança nova: espera a próxima verificação para confirmar
+            self.pending = state
+            return False
+        
+        self.state = state
+        self.pending = None
+        return True
+    
+    def run(self):
+        """
+        Laço da thread de fundo: verifica a biblioteca a cada intervalo até
+        ser interrompido. Erros no processamento de uma mudança são exibidos
+        e não encerram a observação.
+        """
+        while not self._stop.wait(self.interval):
+            try:
+                if self.poll():
+                    self.on_change()
+            except Exception as e:
+                print(f"Erro ao atualizar a biblioteca {self.library_path}: {e}")
+    
+    def start(self):
+        """
+        Registra o estado atual da biblioteca e inicia a observação em uma
+        thread de fundo.
+        """
+        self.state = self.scan()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="library-watcher", daemon=True)
+        self._thread.start()
+        print(f"Observando a biblioteca em {self.library_path} a cada {self.interval:g}s.")
+    
+    def stop(self, wait=True):
+        """
+        Interrompe a observação.
+        
+        Args:
+            wait (bool): Aguardar o fim de uma atualização em curso
+        """
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+            self._thread = None
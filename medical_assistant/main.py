@@ -4,9 +4,18 @@ import argparse
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
 
-from book_processor.processor import BookProcessor
+from book_processor.knowledge_store import KnowledgeStore
+from retrieval.snapshot import IndexSnapshot
+from retrieval.vectors import VectorIndex
+from retrieval.term_counts import TermCounts
+from retrieval.sections import SectionIndex, SectionRetriever
 from text_editor.editor import MedicalTextEditor
 from ai_integration.anthropic_client import AnthropicClient
+from ai_integration.http_transport import configure_transport, DEFAULT_POOL_SIZE, DEFAULT_READ_TIMEOUT
+from ai_integration.completion_cache import CompletionCache, DEFAULT_MAX_ENTRIES, DEFAULT_TTL
+
+# Diretório da base de conhecimento gerada a partir da biblioteca
+KNOWLEDGE_BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base")
 
 def parse_arguments():
     """
@@ -22,7 +31,34 @@ def parse_arguments():
     parser.add_argument("--library", "-l", help="Caminho para a biblioteca de livros médicos", default=default_lib_path)
     parser.add_argument("--api-key", "-k", help="Chave de API da Anthropic")
     parser.add_argument("--process-only", action="store_true", help="Apenas processar livros sem iniciar o editor")
-    parser.add_argument("--knowledge-base", "-kb", help="Caminho para a base de conhecimento pré-processada")
+    parser.add_argument("--knowledge-base", "-kb",
+                        help="Caminho para a base de conhecimento pré-processada (diretório ou arquivo .txt)")
+    parser.add_argument("--workers", "-w", type=int, default=1,
+                        help="Número de processos para o processamento paralelo dos livros (padrão: 1)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Reprocessar todos os livros, ignorando o manifesto da biblioteca")
+    parser.add_argument("--retrieval", choices=["bm25", "vector"], default="bm25",
+                        help="Método de busca dos trechos relevantes (padrão: bm25)")
+    parser.add_argument("--min-relevance", type=float, default=0,
+                        help="Pontuação mínima de relevância médica para manter uma página, de 0 a 1 "
+                             "(padrão: 0, mantém todas; ex.: 0.25 descarta sumários e créditos)")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="Manter páginas e trechos quase duplicados entre livros (ex.: edições diferentes)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Observar a biblioteca e incorporar livros novos ou alterados com o editor aberto")
+    parser.add_argument("--watch-interval", type=float, default=10.0,
+                        help="Segundos entre as verificações da biblioteca no modo --watch (padrão: 10)")
+    parser.add_argument("--http-pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help=f"Conexões persistentes com a API mantidas abertas (padrão: {DEFAULT_POOL_SIZE})")
+    parser.add_argument("--http-timeout", type=float, default=DEFAULT_READ_TIMEOUT,
+                        help=f"Segundos de espera pela resposta da API (padrão: {DEFAULT_READ_TIMEOUT:g})")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help=f"Respostas do modelo mantidas em memória para consultas repetidas "
+                             f"(padrão: {DEFAULT_MAX_ENTRIES})")
+    parser.add_argument("--cache-dir",
+                        help="Diretório para gravar as respostas do modelo e reaproveitá-las entre execuções")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL,
+                        help=f"Validade, em segundos, das respostas gravadas com --cache-dir (padrão: {DEFAULT_TTL})")
     
     return parser.parse_args()
 
@@ -75,39 +111,158 @@ def get_api_key():
     
     return api_key
 
-def process_library(library_path):
+def load_retriever(kb_dir, store, method="bm25"):
+    """
+    Carrega o índice de busca salvo em uma base de conhecimento.
+    
+    O índice BM25 é aberto do snapshot da base; se o snapshot não existir ou
+    estiver desatualizado, ele é reconstruído a partir dos trechos da base.
+    As buscas que mencionam um capítulo ou seção do sumário dos livros são
+    restringidas aos trechos dessa parte.
+    
+    Args:
+        kb_dir (str): Diretório da base de conhecimento
+        store (KnowledgeStore): Base usada para resolver os trechos encontrados
+        method (str): "bm25" para o índice invertido ou "vector" para o índice vetorial
+        
+    Returns:
+        SectionRetriever: Índice carregado, com a restrição por seções, ou
+            None se não existir
+    """
+    index = None
+    if method == "vector":
+        if VectorIndex.exists(kb_dir):
+            index = VectorIndex.load(kb_dir, store)
+    else:
+        snapshot = IndexSnapshot(kb_dir)
+        index = snapshot.load(store)
+        if index is None and len(store):
+            print("Reconstruindo o snapshot dos índices...")
+            index = snapshot.build(store)
+    
+    if index:
+        print(f"Índice de busca ({method}) carregado de: {kb_dir}")
+        index = SectionRetriever(index, SectionIndex(store))
+    return index
+
+def process_library(library_path, workers=1, rebuild=False, deduplicate=True, min_relevance=0):
     """
     Processa a biblioteca de livros médicos.
     
+    Apenas os livros novos ou alterados desde a última execução são
+    reprocessados; livros removidos da biblioteca são excluídos da base.
+    
     Args:
         library_path (str): Caminho para a biblioteca
-        
+        workers (int): Número de processos de trabalho para a extração
+        rebuild (bool): Reprocessar todos os livros, ignorando o manifesto
+        deduplicate (bool): Remover páginas e trechos quase duplicados entre livros
+        min_relevance (float): Pontuação mínima de relevância médica das páginas
+            mantidas (0 mantém todas)
+            
     Returns:
-        str: Caminho para a base de conhecimento gerada
+        str: Diretório da base de conhecimento gerada
     """
+    # Os módulos de extração são carregados apenas quando a biblioteca é
+    # processada, para não atrasar a abertura de uma base já pronta
+    from book_processor.processor import BookProcessor, EXTRACTOR_VERSION, peak_memory_mb
+    from book_processor.manifest import LibraryManifest
+    from book_processor.chunker import TextChunker
+    from book_processor.relevance import RelevanceScorer, SCORER_VERSION
+    from book_processor.layout import LayoutNoiseFilter
+    from book_processor.page_cache import PageCache
+    
     print(f"Processando biblioteca em: {library_path}")
     
-    processor = BookProcessor(library_path)
-    processor.process_all_books()
+    scorer = RelevanceScorer(threshold=min_relevance) if min_relevance > 0 else None
     
     # Criar diretório para armazenar a base de conhecimento
-    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base")
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir = KNOWLEDGE_BASE_DIR
+    
+    # O limite e os critérios de relevância fazem parte da versão: alterá-los
+    # reprocessa os livros
+    manifest = LibraryManifest(os.path.join(output_dir, "manifest.json"),
+                               f"{EXTRACTOR_VERSION}-relevance{min_relevance:g}-v{SCORER_VERSION}")
+    if rebuild:
+        manifest.clear()
+    
+    # O texto extraído de cada página fica em cache até o livro ser gravado na
+    # base: uma execução interrompida recomeça da página onde parou. O cache
+    # usa o hash de cada livro calculado pelo manifesto.
+    page_cache = PageCache(os.path.join(output_dir, "page_cache"), EXTRACTOR_VERSION,
+                           hash_file=manifest.file_hash)
+    processor = BookProcessor(library_path, chunker=TextChunker(), scorer=scorer,
+                              layout_filter=LayoutNoiseFilter(), page_cache=page_cache)
+    store = KnowledgeStore(os.path.join(output_dir, "store"))
+    os.makedirs(store.store_dir, exist_ok=True)
+    
+    books = processor.scan_library()
+    changed, removed = manifest.diff(library_path, books)
     
-    # Extrair e salvar a base de conhecimento
-    processor.extract_medical_knowledge()
-    kb_path = os.path.join(output_dir, "medical_knowledge.txt")
-    processor.save_knowledge_base(kb_path)
+    # Livros cujo segmento sumiu também precisam ser refeitos
+    for book_path in books:
+        if book_path not in changed and not store.has_segment(os.path.basename(book_path)):
+            changed.append(book_path)
     
-    # Salvar conteúdo processado de cada livro
-    books_dir = os.path.join(output_dir, "books")
-    processor.save_processed_content(books_dir)
+    print(f"{len(changed)} livros novos ou alterados, {len(removed)} removidos, "
+          f"{len(books) - len(changed)} inalterados.")
     
-    return kb_path
+    for entry in removed:
+        store.remove_segment(entry["book_name"])
+        manifest.remove(entry)
+    
+    # O snapshot deixa de valer quando o manifesto muda; como o manifesto é
+    # gravado a cada livro, uma execução interrompida antes de atualizar o
+    # catálogo e os índices não é confundida com uma base atualizada
+    snapshot = IndexSnapshot(output_dir)
+    if (not changed and not removed and KnowledgeStore.exists(store.store_dir)
+            and store.deduplicated == deduplicate and VectorIndex.exists(output_dir)
+            and snapshot.is_valid()):
+        print("Base de conhecimento já está atualizada.")
+        return output_dir
+    
+    def book_saved(book_path):
+        # A codificação identificada de cada arquivo de texto fica no manifesto
+        book_name = os.path.basename(book_path)
+        encoding = processor.text_encodings.get(book_name)
+        manifest.update(library_path, book_path, book_name, {"encoding": encoding} if encoding else None)
+        manifest.save()
+    
+    # Processar apenas os livros novos ou alterados, gravando o texto e os
+    # trechos de cada um em seu segmento à medida que é extraído. Cada livro
+    # concluído é registrado no manifesto, para que uma nova execução após
+    # uma interrupção não o processe de novo.
+    processor.process_books(changed, workers=workers, store=store, book_saved=book_saved)
+    page_cache.prune({entry["sha256"] for entry in manifest.books.values()})
+    
+    store.save_catalog([os.path.basename(book_path) for book_path in books])
+    if deduplicate:
+        store.deduplicate()
+    else:
+        store.clear_duplicates()
+    
+    # Reconstruir os índices de busca a partir das contagens de termos dos
+    # trechos; apenas os livros novos ou alterados são tokenizados. O snapshot
+    # é gravado depois do manifesto, cujo conteúdo faz parte da sua chave.
+    term_counts = TermCounts(output_dir).collect(store)
+    VectorIndex().build_from_terms(term_counts, output_dir, documents=store)
+    manifest.save()
+    snapshot.build(store, term_counts)
+    
+    # Índice BM25 do formato anterior, substituído pelo snapshot
+    legacy_index = os.path.join(output_dir, "bm25_index.json")
+    if os.path.exists(legacy_index):
+        os.remove(legacy_index)
+    
+    peak = peak_memory_mb()
+    if peak is not None:
+        print(f"Pico de memória da ingestão: {peak:.1f} MB")
+    
+    return output_dir
 
 def load_knowledge_base(kb_path):
     """
-    Carrega a base de conhecimento de um arquivo.
+    Carrega a base de conhecimento de um arquivo de texto.
     
     Args:
         kb_path (str): Caminho para o arquivo da base de conhecimento
@@ -122,6 +277,98 @@ def load_knowledge_base(kb_path):
         print(f"Erro ao carregar a base de conhecimento: {e}")
         return ""
 
+def open_knowledge(kb_path, retrieval="bm25", pin_segments=False):
+    """
+    Abre a base de conhecimento usada nas consultas.
+    
+    Args:
+        kb_path (str): Diretório da base segmentada ou, no formato antigo, arquivo de texto
+        retrieval (str): Método de busca dos trechos relevantes ("bm25" ou "vector")
+        pin_segments (bool): Abrir todos os segmentos já, para que a base
+            aberta não seja afetada por um reprocessamento em segundo plano
+            
+    Returns:
+        tuple: (índice de busca ou None, contexto médico completo usado sem índice)
+    """
+    # Carregar base de conhecimento: um diretório com a base segmentada ou,
+    # no formato antigo, um único arquivo de texto
+    if not os.path.isdir(kb_path):
+        return None, load_knowledge_base(kb_path)
+    
+    store = KnowledgeStore(os.path.join(kb_path, "store"))
+    if pin_segments:
+        store.open_segments()
+    
+    # Usar o índice de busca, se disponível, para enviar apenas os trechos
+    # relevantes; sem índice, o texto completo da base é usado como contexto
+    index = load_retriever(kb_path, store, retrieval)
+    if index:
+        return index, ""
+    return None, store.full_text()
+
+def load_assistant(kb_path, api_key, retrieval="bm25", pin_segments=False, completion_cache=None):
+    """
+    Cria o cliente da API com a base de conhecimento carregada.
+    
+    Args:
+        kb_path (str): Diretório da base segmentada ou, no formato antigo, arquivo de texto
+        api_key (str): Chave de API da Anthropic
+        retrieval (str): Método de busca dos trechos relevantes ("bm25" ou "vector")
+        pin_segments (bool): Abrir todos os segmentos da base (modo --watch)
+        completion_cache (CompletionCache): Cache das respostas do modelo
+            (padrão: apenas em memória)
+            
+    Returns:
+        AnthropicClient: Cliente pronto para as consultas do editor
+    """
+    ai_client = AnthropicClient(api_key, completion_cache=completion_cache)
+    index, context = open_knowledge(kb_path, retrieval, pin_segments)
+    if index:
+        ai_client.set_retriever(index)
+    else:
+        ai_client.set_medical_context(context)
+    
+    print(f"Base de conhecimento carregada de: {kb_path}")
+    return ai_client
+
+def watch_library(ai_client, library_path, retrieval="bm25", interval=10.0, **options):
+    """
+    Observa a biblioteca em segundo plano. A cada mudança, os livros novos ou
+    alterados são processados na thread de fundo e a base atualizada é
+    trocada no cliente de uma só vez; o editor continua respondendo e as
+    consultas usam a base anterior até a troca.
+    
+    Args:
+        ai_client (AnthropicClient): Cliente usado pelo editor
+        library_path (str): Caminho para a biblioteca
+        retrieval (str): Método de busca dos trechos relevantes ("bm25" ou "vector")
+        interval (float): Segundos entre as verificações da biblioteca
+        **options: Argumentos repassados a process_library
+        
+    Returns:
+        LibraryWatcher: Observador iniciado
+    """
+    from book_processor.watcher import LibraryWatcher
+    
+    def refresh():
+        print("Mudanças na biblioteca detectadas; atualizando a base de conhecimento...")
+        previous_key = IndexSnapshot(KNOWLEDGE_BASE_DIR).source_key()
+        kb_dir = process_library(library_path, **options)
+        
+        # O manifesto e o catálogo só mudam quando algum livro mudou
+        if IndexSnapshot(kb_dir).source_key() == previous_key:
+            print("Nenhum livro novo ou alterado.")
+            return
+        index, context = open_knowledge(kb_dir, retrieval, pin_segments=True)
+        ai_client.swap_knowledge(index, context)
+        # O snapshot anterior só é apagado quando o cliente já usa o novo
+        IndexSnapshot(kb_dir).prune()
+        print(f"Base de conhecimento atualizada: {kb_dir}")
+    
+    watcher = LibraryWatcher(library_path, refresh, interval)
+    watcher.start()
+    return watcher
+
 def main():
     """
     Função principal do programa.
@@ -143,29 +390,48 @@ def main():
         if not api_key:
             return
     
-    # Inicializar cliente da API
-    ai_client = AnthropicClient(api_key)
-    
     # Processar biblioteca ou carregar base de conhecimento existente
     kb_path = args.knowledge_base
     if not kb_path:
-        kb_path = process_library(library_path)
-    
-    # Carregar base de conhecimento
-    knowledge_base = load_knowledge_base(kb_path)
-    ai_client.set_medical_context(knowledge_base)
-    
-    print(f"Base de conhecimento carregada de: {kb_path}")
+        kb_path = process_library(library_path, args.workers, args.rebuild, not args.keep_duplicates,
+                                  args.min_relevance)
+        # Nenhum snapshot está aberto ainda: os anteriores podem ser apagados
+        IndexSnapshot(kb_path).prune()
     
     # Se a flag --process-only estiver definida, encerrar após o processamento
     if args.process_only:
         print("Processamento concluído. Encerrando.")
         return
     
-    # Iniciar o editor de texto
+    # O modo --watch atualiza a base gerada a partir da biblioteca
+    watch = args.watch and not args.knowledge_base
+    if args.watch and not watch:
+        print("O modo --watch requer o processamento da biblioteca e o editor; ignorando.")
+    
+    configure_transport(pool_size=args.http_pool_size, read_timeout=args.http_timeout)
+    completion_cache = CompletionCache(args.cache_size, args.cache_dir, args.cache_ttl)
+    ai_client = load_assistant(kb_path, api_key, args.retrieval, pin_segments=watch,
+                               completion_cache=completion_cache)
+    
+    watcher = None
+    if watch:
+        watcher = watch_library(ai_client, library_path, args.retrieval, args.watch_interval,
+                                workers=args.workers, deduplicate=not args.keep_duplicates,
+                                min_relevance=args.min_relevance)
+    
+    # Iniciar o editor de texto, carregando o cliente da API em segundo plano
     print("Iniciando o editor de texto...")
+    ai_client.warm_up()
     editor = MedicalTextEditor(ai_client)
     editor.run()
+    
+    # Uma atualização interrompida é retomada na próxima execução
+    if watcher:
+        watcher.stop(wait=False)
+    
+    if ai_client.cache_stats.requests:
+        print(ai_client.cache_stats.report())
+    print(ai_client.completion_cache.report())
 
 if __name__ == "__main__":
     main()
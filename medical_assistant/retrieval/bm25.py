@@ -0,0 +1,346 @@
+import os
+import math
+import mmap
+import bisect
+from array import array
+import numpy as np
+
+from retrieval.normalization import tokenize
+
+class TermTable:
+    def __init__(self, data, offsets):
+        """
+        Vocabulário ordenado guardado como um único bloco de texto UTF-8 e as
+        posições de cada termo. Funciona como uma sequência de termos, de modo
+        que a busca binária (bisect) não precisa montar um dicionário ao abrir
+        o índice: com os arquivos mapeados em memória, abrir custa o mesmo para
+        qualquer tamanho de vocabulário.
+        
+        Args:
+            data (bytes ou mmap): Termos concatenados, em ordem
+            offsets (numpy.ndarray): Posição inicial de cada termo e o fim do último
+        """
+        self.data = data
+        self.offsets = offsets
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, position):
+        return self.data[int(self.offsets[position]):int(self.offsets[position + 1])].decode('utf-8')
+    
+    def find(self, term):
+        """
+        Localiza um termo no vocabulário.
+        
+        Args:
+            term (str): Termo normalizado
+            
+        Returns:
+            int: Posição do termo ou -1 se não existir
+        """
+        position = bisect.bisect_left(self, term)
+        if position < len(self) and self[position] == term:
+            return position
+        return -1
+
+class BM25Index:
+    # Versão do formato salvo em disco
+    FORMAT_VERSION = 3
+    
+    # Arquivos do índice, todos abertos com mmap ao carregar
+    TERMS_FILENAME = "bm25_terms.dat"
+    ARRAY_FILENAMES = {
+        "term_offsets": "bm25_term_offsets.npy",
+        "posting_offsets": "bm25_posting_offsets.npy",
+        "doc_ids": "bm25_doc_ids.npy",
+        "counts": "bm25_counts.npy",
+        "length_norms": "bm25_length_norms.npy"
+    }
+    
+    def __init__(self, k1=1.5, b=0.75, max_query_terms=32):
+        """
+        Inicializa um índice invertido com ranqueamento BM25.
+        
+        Depois de construído, o índice fica em arranjos planos: o vocabulário
+        ordenado, as listas de documentos de todos os termos concatenadas e a
+        normalização de cada documento, prontos para serem gravados e abertos
+        com mmap.
+        
+        Args:
+            k1 (float): Saturação da frequência dos termos
+            b (float): Peso da normalização pelo tamanho do documento
+            max_query_terms (int): Máximo de termos da consulta considerados,
+                escolhidos entre os mais raros do corpus
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_query_terms = max_query_terms
+        self.documents = []
+        self.terms = TermTable(b"", np.zeros(1, dtype=np.uint64))
+        self.posting_offsets = np.zeros(1, dtype=np.uint64)
+        self.doc_ids = np.zeros(0, dtype=np.uint32)
+        self.counts = np.zeros(0, dtype=np.uint32)
+        self.length_norms = np.zeros(0, dtype=np.float32)
+        self.avg_length = 0.0
+    
+    def build(self, chunks, documents=None):
+        """
+        Constrói o índice a partir de trechos da base de conhecimento.
+        
+        Args:
+            chunks (iterator): Trechos (dicionários com id, livro, páginas e texto)
+            documents (sequence): Sequência que resolve as posições dos trechos
+                (ex.: KnowledgeStore). Se omitida, os trechos ficam em memória.
+                
+        Returns:
+            BM25Index: O próprio índice
+        """
+        postings = {}
+        doc_lengths = array('I')
+        self.documents = [] if documents is None else documents
+        for doc_id, chunk in enumerate(chunks):
+            if documents is None:
+                self.documents.append(chunk)
+            
+            term_counts = {}
+            terms = tokenize(chunk["text"])
+            for term in terms:
+                term_counts[term] = term_counts.get(term, 0) + 1
+            doc_lengths.append(len(terms))
+            
+            for term, count in term_counts.items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = (array('I'), array('I'))
+                entry[0].append(doc_id)
+                entry[1].append(count)
+        
+        self._finalize(postings, doc_lengths)
+        print(f"Índice BM25 construído: {len(self.documents)} trechos, {len(self.terms)} termos.")
+        return self
+    
+    def build_from_terms(self, term_counts, documents):
+        """
+        Constrói o índice a partir das contagens de termos da base, sem ler
+        nem tokenizar o texto: as listas de documentos de cada termo são
+        montadas com uma ordenação estável das contagens por termo.
+        
+        Args:
+            term_counts (TermCounts): Contagens de termos dos trechos, na
+                ordem das posições de documents
+            documents (sequence): Sequência que resolve as posições dos trechos
+                (ex.: KnowledgeStore)
+                
+        Returns:
+            BM25Index: O próprio índice
+        """
+        self.documents = documents
+        encoded = [term.encode('utf-8') for term in term_counts.terms]
+        term_offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        term_offsets[1:] = np.cumsum([len(term) for term in encoded])
+        self.terms = TermTable(b"".join(encoded), term_offsets)
+        
+        doc_ids = np.repeat(np.arange(len(term_counts), dtype=np.uint32),
+                            np.diff(term_counts.doc_offsets).astype(np.int64))
+        order = np.argsort(term_counts.term_ids, kind='stable')
+        self.doc_ids = doc_ids[order]
+        self.counts = term_counts.counts[order]
+        self.posting_offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        self.posting_offsets[1:] = np.cumsum(np.bincount(term_counts.term_ids, minlength=len(encoded)))
+        
+        self._set_lengths(term_counts.doc_lengths())
+        print(f"Índice BM25 construído: {len(term_counts)} trechos, {len(self.terms)} termos.")
+        return self
+    
+    def _finalize(self, postings, doc_lengths):
+        """
+        Converte as listas de documentos em arranjos planos, com o vocabulário
+        em ordem, e pré-calcula a normalização de cada documento.
+        
+        Args:
+            postings (dict): Termo -> (documentos, frequências)
+            doc_lengths (array): Número de termos de cada documento
+        """
+        vocabulary = sorted(postings)
+        encoded = [term.encode('utf-8') for term in vocabulary]
+        term_offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        term_offsets[1:] = np.cumsum([len(term) for term in encoded])
+        self.terms = TermTable(b"".join(encoded), term_offsets)
+        
+        sizes = [len(postings[term][0]) for term in vocabulary]
+        self.posting_offsets = np.zeros(len(vocabulary) + 1, dtype=np.uint64)
+        self.posting_offsets[1:] = np.cumsum(sizes)
+        total = int(self.posting_offsets[-1])
+        self.doc_ids = np.zeros(total, dtype=np.uint32)
+        self.counts = np.zeros(total, dtype=np.uint32)
+        for position, term in enumerate(vocabulary):
+            start, end = int(self.posting_offsets[position]), int(self.posting_offsets[position + 1])
+            self.doc_ids[start:end] = postings[term][0]
+            self.counts[start:end] = postings[term][1]
+        
+        self._set_lengths(np.frombuffer(doc_lengths, dtype=np.uint32) if len(doc_lengths) else np.zeros(0))
+    
+    def _set_lengths(self, lengths):
+        """
+        Pré-calcula a normalização de cada documento pelo seu tamanho.
+        
+        Args:
+            lengths (numpy.ndarray): Número de termos de cada documento
+        """
+        self.avg_length = float(lengths.mean()) if len(lengths) else 0.0
+        avg_length = self.avg_length or 1.0
+        self.length_norms = (self.k1 * (1 - self.b + self.b * lengths / avg_length)).astype(np.float32)
+    
+    def idf(self, position):
+        """
+        Calcula o IDF (variante BM25, sempre positivo) de um termo.
+        
+        Args:
+            position (int): Posição do termo no vocabulário
+            
+        Returns:
+            float: IDF do termo
+        """
+        doc_freq = int(self.posting_offsets[position + 1] - self.posting_offsets[position])
+        return math.log(1 + (len(self.documents) - doc_freq + 0.5) / (doc_freq + 0.5))
+    
+    def search(self, query, top_k=5, candidates=None):
+        """
+        Busca os trechos mais relevantes para uma consulta.
+        
+        Args:
+            query (str): Texto da consulta (ex.: a anotação atual do paciente)
+            top_k (int): Número de trechos a retornar
+            candidates (list): Intervalos (início, fim exclusivo) de posições
+                aos quais a busca se restringe (opcional, padrão: toda a base)
+                
+        Returns:
+            list: Tuplas (pontuação, trecho), da mais relevante para a menos
+        """
+        positions = set()
+        for term in set(tokenize(query)):
+            position = self.terms.find(term)
+            if position >= 0:
+                positions.add(position)
+        if not positions:
+            return []
+        
+        # Consultas longas são limitadas aos termos mais discriminativos
+        weighted = sorted(((self.idf(position), position) for position in positions), reverse=True)
+        weighted = weighted[:self.max_query_terms]
+        
+        # Contribuições de todos os termos, somadas por documento
+        doc_ids = []
+        contributions = []
+        for idf, position in weighted:
+            start, end = int(self.posting_offsets[position]), int(self.posting_offsets[position + 1])
+            ids = self.doc_ids[start:end]
+            counts = self.counts[start:end]
+            if candidates is not None:
+                # As listas estão em ordem de posição: cada intervalo é uma
+                # fatia encontrada por busca binária
+                bounds = np.searchsorted(ids, np.asarray(candidates, dtype=np.int64).ravel())
+                slices = [slice(bounds[index], bounds[index + 1]) for index in range(0, len(bounds), 2)]
+                ids = np.concatenate([ids[part] for part in slices])
+                counts = np.concatenate([counts[part] for part in slices])
+            counts = counts.astype(np.float32)
+            doc_ids.append(ids)
+            contributions.append(idf * (self.k1 + 1) * counts / (counts + self.length_norms[ids]))
+        
+        ids, inverse = np.unique(np.concatenate(doc_ids), return_inverse=True)
+        if not len(ids):
+            return []
+        scores = np.bincount(inverse, weights=np.concatenate(contributions))
+        
+        top_k = min(top_k, len(ids))
+        if top_k <= 0:
+            return []
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(float(scores[row]), self.documents[int(ids[row])]) for row in best]
+    
+    def search_batch(self, queries, top_k=5, candidates=None):
+        """
+        Busca os trechos mais relevantes para várias consultas.
+        
+        Args:
+            queries (list): Textos das consultas
+            top_k (int): Número de trechos por consulta
+            candidates (list): Intervalos de posições aos quais a busca se
+                restringe (opcional)
+                
+        Returns:
+            list: Para cada consulta, tuplas (pontuação, trecho)
+        """
+        return [self.search(query, top_k, candidates) for query in queries]
+    
+    def save(self, directory):
+        """
+        Grava os arranjos do índice em um diretório. O texto dos trechos não é
+        salvo; ao carregar, as posições são resolvidas pela base de conhecimento.
+        
+        Args:
+            directory (str): Diretório de saída
+            
+        Returns:
+            dict: Parâmetros do índice, necessários para carregá-lo
+        """
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, self.TERMS_FILENAME), 'wb') as file:
+            file.write(bytes(self.terms.data))
+        arrays = {
+            "term_offsets": self.terms.offsets,
+            "posting_offsets": self.posting_offsets,
+            "doc_ids": self.doc_ids,
+            "counts": self.counts,
+            "length_norms": self.length_norms
+        }
+        for name, filename in self.ARRAY_FILENAMES.items():
+            np.save(os.path.join(directory, filename), arrays[name])
+        
+        return {"version": self.FORMAT_VERSION, "k1": self.k1, "b": self.b, "avg_length": self.avg_length}
+    
+    @classmethod
+    def load(cls, directory, params, documents):
+        """
+        Abre um índice gravado com save(), mapeando os arranjos em memória.
+        
+        Args:
+            directory (str): Diretório do índice
+            params (dict): Parâmetros retornados por save()
+            documents (sequence): Sequência que resolve as posições dos trechos
+                (ex.: KnowledgeStore)
+                
+        Returns:
+            BM25Index: Índice carregado ou None em caso de erro
+        """
+        if params.get("version") != cls.FORMAT_VERSION:
+            print(f"Versão do índice BM25 incompatível em {directory}.")
+            return None
+        
+        try:
+            arrays = {name: np.load(os.path.join(directory, filename), mmap_mode='r')
+                      for name, filename in cls.ARRAY_FILENAMES.items()}
+            terms_path = os.path.join(directory, cls.TERMS_FILENAME)
+            terms = b""
+            if os.path.getsize(terms_path):
+                with open(terms_path, 'rb') as file:
+                    terms = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception as e:
+            print(f"Erro ao carregar o índice BM25 de {directory}: {e}")
+            return None
+        
+        if len(arrays["length_norms"]) != len(documents):
+            print(f"Índice BM25 em {directory} não corresponde à base de conhecimento.")
+            return None
+        
+        index = cls(k1=params["k1"], b=params["b"])
+        index.documents = documents
+        index.terms = TermTable(terms, arrays["term_offsets"])
+        index.posting_offsets = arrays["posting_offsets"]
+        index.doc_ids = arrays["doc_ids"]
+        index.counts = arrays["counts"]
+        index.length_norms = arrays["length_norms"]
+        index.avg_length = params["avg_length"]
+        return index
@@ -0,0 +1,77 @@
+import re
+import unicodedata
+
+# Palavras muito frequentes em português que não ajudam na busca
+PORTUGUESE_STOPWORDS = {
+    "a", "ao", "aos", "aquela", "aquelas", "aquele", "aqueles", "aquilo", "as", "ate",
+    "com", "como", "da", "das", "de", "dela", "delas", "dele", "deles", "depois", "do",
+    "dos", "e", "ela", "elas", "ele", "eles", "em", "entre", "era", "eram", "essa",
+    "essas", "esse", "esses", "esta", "estas", "este", "estes", "eu", "foi", "foram",
+    "ha", "isso", "isto", "ja", "lhe", "lhes", "mais", "mas", "me", "mesmo", "meu",
+    "minha", "muito", "na", "nas", "nem", "no", "nos", "nossa", "nosso", "num", "numa",
+    "o", "os", "ou", "para", "pela", "pelas", "pelo", "pelos", "por", "qual", "quando",
+    "que", "quem", "se", "seja", "sem", "ser", "seu", "seus", "so", "sua", "suas",
+    "tambem", "te", "tem", "ter", "teu", "tua", "um", "uma", "umas", "uns", "voce",
+    "sao", "sera", "pode", "podem", "deve", "devem", "cada", "apos", "sobre", "onde"
+}
+
+# Terminações de plural e sua forma singular, da mais longa para a mais curta
+PLURAL_SUFFIXES = [
+    ("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"),
+    ("ns", "m")
+]
+
+# Plurais em -es de palavras terminadas em r, z ou s (dores, vezes, meses)
+CONSONANT_PLURAL_SUFFIXES = ("res", "zes", "ses")
+
+VOWELS = "aeiou"
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+def fold_accents(text):
+    """
+    Converte o texto para minúsculas e remove acentos.
+    
+    Args:
+        text (str): Texto original
+        
+    Returns:
+        str: Texto sem acentos e em minúsculas
+    """
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def stem(word):
+    """
+    Reduz uma palavra portuguesa ao singular com regras leves de sufixo.
+    
+    Args:
+        word (str): Palavra normalizada
+        
+    Returns:
+        str: Palavra reduzida
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+    for suffix, replacement in PLURAL_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + replacement
+    if word.endswith(CONSONANT_PLURAL_SUFFIXES) and word[-4] in VOWELS:
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("is", "us")):
+        return word[:-1]
+    return word
+
+def tokenize(text):
+    """
+    Normaliza um texto em português para indexação e busca: remove acentos,
+    converte para minúsculas, descarta palavras vazias e reduz plurais.
+    
+    Args:
+        text (str): Texto a normalizar
+        
+    Returns:
+        list: Termos normalizados
+    """
+    return [stem(word) for word in WORD_PATTERN.findall(fold_accents(text))
+            if word not in PORTUGUESE_STOPWORDS and (len(word) > 1 or word.isdigit())]
@@ -0,0 +1,152 @@
+import math
+import numpy as np
+
+from retrieval.normalization import tokenize
+
+class SectionIndex:
+    def __init__(self, store, min_coverage=0.6, max_share=0.5):
+        """
+        Índice dos títulos do sumário (capítulos e seções) dos livros da base.
+        Para uma consulta, encontra as seções cujo título ela menciona e
+        devolve os intervalos de trechos que elas cobrem. O índice é montado
+        na primeira consulta, a partir dos sumários gravados com cada segmento.
+        
+        Args:
+            store (KnowledgeStore): Base de conhecimento
+            min_coverage (float): Fração mínima do título (ponderada pelo IDF
+                dos termos) presente na consulta para selecionar a seção
+            max_share (float): Fração máxima da base coberta pelas seções
+                selecionadas; acima dela a busca não é restringida
+        """
+        self.store = store
+        self.min_coverage = min_coverage
+        self.max_share = max_share
+        self.sections = None
+        self.term_sections = {}
+        self.idf = {}
+    
+    def build(self):
+        """
+        Lê os sumários dos livros e monta o índice invertido dos títulos.
+        """
+        sections = []
+        term_sections = {}
+        for book_name in self.store.book_names():
+            segment = self.store.segment(book_name)
+            if not segment.sections:
+                continue
+            page_starts = np.asarray(segment.chunks["page_start"])
+            for section in segment.sections:
+                # Números soltos ("Capítulo 5") não identificam o assunto
+                terms = {term for term in tokenize(section["title"]) if not term.isdigit()}
+                first = int(np.searchsorted(page_starts, section["page_start"], side='left'))
+                end = int(np.searchsorted(page_starts, section["page_end"], side='right'))
+                if not terms or first >= end:
+                    continue
+                for term in terms:
+                    term_sections.setdefault(term, []).append(len(sections))
+                sections.append((terms, self.store.position_range(book_name, first, end)))
+        
+        self.sections = sections
+        self.term_sections = term_sections
+        self.idf = {term: math.log(1 + len(sections) / len(positions))
+                    for term, positions in term_sections.items()}
+    
+    def narrow(self, query):
+        """
+        Seleciona as seções mencionadas em uma consulta.
+        
+        Args:
+            query (str): Texto da consulta
+            
+        Returns:
+            list: Intervalos (início, fim exclusivo) de posições dos trechos
+                das seções selecionadas, em ordem e sem sobreposição, ou None
+                se nenhuma seção for selecionada
+        """
+        if self.sections is None:
+            self.build()
+        if not self.sections:
+            return None
+        
+        query_terms = set(tokenize(query))
+        matched = {}
+        for term in query_terms:
+            for position in self.term_sections.get(term, ()):
+                matched[position] = matched.get(position, 0.0) + self.idf[term]
+        
+        ranges = []
+        for position, weight in matched.items():
+            terms, positions = self.sections[position]
+            if weight >= self.min_coverage * sum(self.idf[term] for term in terms):
+                ranges.append(positions)
+        if not ranges:
+            return None
+        
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        if sum(end - start for start, end in merged) > self.max_share * len(self.store):
+            return None
+        return merged
+
+class SectionRetriever:
+    def __init__(self, retriever, sections):
+        """
+        Restringe a busca às seções dos livros mencionadas em cada consulta
+        (por exemplo, ao capítulo de neonatologia) antes de pontuar os trechos.
+        Quando nenhuma seção é mencionada, ou a seção não tem trechos
+        suficientes, a busca percorre a base inteira.
+        
+        Args:
+            retriever (BM25Index ou VectorIndex): Índice de busca da base
+            sections (SectionIndex): Índice dos sumários da mesma base
+        """
+        self.retriever = retriever
+        self.sections = sections
+        self.documents = retriever.documents
+    
+    def search_batch(self, queries, top_k=5):
+        """
+        Busca os trechos mais relevantes para várias consultas.
+        
+        Args:
+            queries (list): Textos das consultas
+            top_k (int): Número de trechos por consulta
+            
+        Returns:
+            list: Para cada consulta, tuplas (pontuação, trecho)
+        """
+        results = [None] * len(queries)
+        unrestricted = []
+        for position, query in enumerate(queries):
+            candidates = self.sections.narrow(query)
+            if candidates:
+                found = self.retriever.search_batch([query], top_k, candidates)[0]
+                if len(found) >= top_k:
+                    results[position] = found
+                    continue
+            unrestricted.append(position)
+        
+        # As consultas sem seção são buscadas juntas, em um único lote
+        if unrestricted:
+            found = self.retriever.search_batch([queries[position] for position in unrestricted], top_k)
+            for position, hits in zip(unrestricted, found):
+                results[position] = hits
+        return results
+    
+    def search(self, query, top_k=5):
+        """
+        Busca os trechos mais relevantes para uma consulta.
+        
+        Args:
+            query (str): Texto da consulta
+            top_k (int): Número de trechos a retornar
+            
+        Returns:
+            list: Tuplas (pontuação, trecho), da mais relevante para a menos
+        """
+        return self.search_batch([query], top_k)[0]
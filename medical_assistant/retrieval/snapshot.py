@@ -0,0 +1,234 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+
+from retrieval.bm25 import BM25Index
+from retrieval.term_counts import TermCounts
+
+# Tabela de trechos: para cada trecho buscável, o livro (posição no catálogo)
+# e a linha do trecho no segmento do livro
+CHUNK_TABLE_DTYPE = np.dtype([("book", "<u4"), ("row", "<u4")])
+
+class ChunkTable:
+    def __init__(self, store, table):
+        """
+        Resolve as posições dos índices de busca em trechos da base a partir
+        da tabela gravada no snapshot, sem recalcular nada ao abrir.
+        
+        Args:
+            store (KnowledgeStore): Base de conhecimento
+            table (numpy.ndarray): Tabela de trechos (CHUNK_TABLE_DTYPE)
+        """
+        self.store = store
+        self.table = table
+        self.book_names = store.book_names()
+    
+    def __len__(self):
+        return len(self.table)
+    
+    def __getitem__(self, position):
+        if position < 0 or position >= len(self.table):
+            raise IndexError(position)
+        entry = self.table[position]
+        return self.store.segment(self.book_names[entry["book"]]).chunk(int(entry["row"]))
+
+class IndexSnapshot:
+    # Versão do formato do snapshot
+    FORMAT_VERSION = 1
+    DIRNAME = "snapshot"
+    CURRENT_FILENAME = "snapshot.current"
+    HEADER_FILENAME = "snapshot.json"
+    CHUNKS_FILENAME = "chunks.npy"
+    
+    # Arquivos de origem cujo conteúdo define a validade do snapshot. O
+    # manifesto registra a versão do extrator e o estado de cada livro.
+    SOURCE_FILES = ("manifest.json", os.path.join("store", "catalog.json"), os.path.join("store", "duplicates.npz"))
+    
+    def __init__(self, kb_dir):
+        """
+        Snapshot das estruturas derivadas da base de conhecimento (tabela de
+        trechos, vocabulário e índice BM25), gravadas em arranjos que são
+        abertos com mmap. Abrir o snapshot custa o mesmo para qualquer tamanho
+        de biblioteca. O snapshot guarda uma chave calculada a partir do
+        manifesto e do catálogo da base e é descartado quando eles mudam.
+        
+        Cada snapshot é gravado em um diretório numerado novo, e o arquivo
+        snapshot.current aponta para o atual. Um snapshot aberto (com os
+        arranjos mapeados em memória) nunca é sobrescrito: os anteriores só
+        são apagados por prune(), depois que o cliente passou a usar o novo.
+        
+        Args:
+            kb_dir (str): Diretório da base de conhecimento
+        """
+        self.kb_dir = kb_dir
+    
+    @property
+    def snapshot_dir(self):
+        """
+        Diretório do snapshot atual (o de nome fixo, de versões anteriores,
+        se nenhum foi gravado com ponteiro).
+        """
+        try:
+            with open(os.path.join(self.kb_dir, self.CURRENT_FILENAME), 'r', encoding='utf-8') as file:
+                return os.path.join(self.kb_dir, file.read().strip())
+        except FileNotFoundError:
+            return os.path.join(self.kb_dir, self.DIRNAME)
+    
+    def _versions(self):
+        """
+        Returns:
+            dict: Número -> nome dos diretórios numerados de snapshots
+        """
+        versions = {}
+        if os.path.isdir(self.kb_dir):
+            for name in os.listdir(self.kb_dir):
+                prefix, _, number = name.partition("-")
+                if prefix == self.DIRNAME and number.isdigit():
+                    versions[int(number)] = name
+        return versions
+    
+    def source_key(self):
+        """
+        Calcula a chave dos arquivos de origem da base.
+        
+        Returns:
+            str: Hash SHA-256 do conteúdo dos arquivos de origem presentes
+        """
+        digest = hashlib.sha256()
+        for name in self.SOURCE_FILES:
+            path = os.path.join(self.kb_dir, name)
+            digest.update(name.encode('utf-8') + b"\0")
+            if os.path.exists(path):
+                with open(path, 'rb') as file:
+                    digest.update(hashlib.sha256(file.read()).digest())
+        return digest.hexdigest()
+    
+    def read_header(self):
+        """
+        Lê o cabeçalho do snapshot.
+        
+        Returns:
+            dict: Cabeçalho ou None se não existir ou for ilegível
+        """
+        try:
+            with open(os.path.join(self.snapshot_dir, self.HEADER_FILENAME), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Erro ao ler o snapshot de {self.snapshot_dir}: {e}")
+            return None
+    
+    def is_valid(self):
+        """
+        Verifica se o snapshot existe e corresponde à base atual.
+        
+        Returns:
+            bool: True se o snapshot puder ser usado
+        """
+        header = self.read_header()
+        return (header is not None and header.get("version") == self.FORMAT_VERSION
+                and header.get("source_key") == self.source_key())
+    
+    def save(self, store, bm25):
+        """
+        Grava o snapshot de uma base e de seu índice BM25. Os arquivos são
+        gravados em um diretório numerado novo, com o cabeçalho (e a chave da
+        origem) por último; em seguida, o ponteiro passa para o novo
+        diretório. O snapshot anterior continua no disco até prune().
+        
+        Args:
+            store (KnowledgeStore): Base de conhecimento indexada
+            bm25 (BM25Index): Índice construído sobre os trechos da base
+        """
+        table = np.zeros(len(store), dtype=CHUNK_TABLE_DTYPE)
+        position = 0
+        offset = 0
+        for book_index, book_name in enumerate(store.book_names()):
+            rows = np.arange(len(store.segment(book_name).chunks))
+            if store.duplicate_chunks is not None:
+                rows = rows[~store.duplicate_chunks[offset:offset + len(rows)]]
+                offset += len(store.segment(book_name).chunks)
+            table["book"][position:position + len(rows)] = book_index
+            table["row"][position:position + len(rows)] = rows
+            position += len(rows)
+        
+        name = f"{self.DIRNAME}-{max(self._versions(), default=0) + 1}"
+        snapshot_dir = os.path.join(self.kb_dir, name)
+        os.makedirs(snapshot_dir)
+        np.save(os.path.join(snapshot_dir, self.CHUNKS_FILENAME), table)
+        header = {
+            "version": self.FORMAT_VERSION,
+            "source_key": self.source_key(),
+            "chunks": len(table),
+            "bm25": bm25.save(snapshot_dir)
+        }
+        with open(os.path.join(snapshot_dir, self.HEADER_FILENAME), 'w', encoding='utf-8') as file:
+            json.dump(header, file, indent=2)
+        
+        pointer = os.path.join(self.kb_dir, self.CURRENT_FILENAME)
+        with open(pointer + ".tmp", 'w', encoding='utf-8') as file:
+            file.write(name)
+        os.replace(pointer + ".tmp", pointer)
+        print(f"Snapshot dos índices salvo em: {snapshot_dir}")
+    
+    def prune(self):
+        """
+        Apaga os snapshots que não são o atual. Deve ser chamado quando nenhum
+        cliente usa mais os snapshots anteriores. Um diretório que não pode
+        ser apagado (arquivos ainda mapeados, no Windows) fica para a próxima
+        chamada.
+        """
+        current = os.path.basename(self.snapshot_dir)
+        stale = [name for name in self._versions().values() if name != current]
+        if current != self.DIRNAME:
+            stale.append(self.DIRNAME)
+        for name in stale:
+            shutil.rmtree(os.path.join(self.kb_dir, name), ignore_errors=True)
+    
+    def build(self, store, term_counts=None):
+        """
+        Constrói o índice BM25 da base e grava o snapshot.
+        
+        Args:
+            store (KnowledgeStore): Base de conhecimento
+            term_counts (TermCounts): Contagens de termos já montadas para a
+                base (opcional; sem elas, são montadas aqui, tokenizando apenas
+                os livros que mudaram)
+                
+        Returns:
+            BM25Index: Índice construído
+        """
+        if term_counts is None:
+            term_counts = TermCounts(self.kb_dir).collect(store)
+        bm25 = BM25Index().build_from_terms(term_counts, documents=store)
+        self.save(store, bm25)
+        return bm25
+    
+    def load(self, store):
+        """
+        Abre o snapshot de uma base, mapeando os arranjos em memória.
+        
+        Args:
+            store (KnowledgeStore): Base de conhecimento do snapshot
+            
+        Returns:
+            BM25Index: Índice com os trechos resolvidos pela tabela do
+                snapshot, ou None se o snapshot não existir ou estiver
+                desatualizado
+        """
+        header = self.read_header()
+        if header is None:
+            return None
+        if header.get("version") != self.FORMAT_VERSION or header.get("source_key") != self.source_key():
+            print(f"Snapshot em {self.snapshot_dir} desatualizado.")
+            return None
+        
+        try:
+            table = np.load(os.path.join(self.snapshot_dir, self.CHUNKS_FILENAME), mmap_mode='r')
+        except Exception as e:
+            print(f"Erro ao carregar o snapshot de {self.snapshot_dir}: {e}")
+            return None
+        return BM25Index.load(self.snapshot_dir, header["bm25"], ChunkTable(store, table))
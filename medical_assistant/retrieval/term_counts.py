@@ -0,0 +1,159 @@
+import os
+import numpy as np
+
+from retrieval.normalization import tokenize
+
+# Versão das contagens gravadas; deve mudar junto com a normalização dos termos
+TERMS_VERSION = 1
+
+class TermCounts:
+    DIRNAME = "terms"
+    
+    def __init__(self, kb_dir):
+        """
+        Contagens de termos dos trechos buscáveis da base, de onde são
+        construídos os índices BM25 e vetorial. As contagens de cada livro são
+        gravadas junto à base, identificadas pela versão do segmento: ao
+        atualizar a base, apenas os livros novos ou alterados são lidos e
+        tokenizados. Os trechos quase duplicados são descartados ao montar as
+        contagens da base, sem ler nem tokenizar de novo o livro.
+        
+        Depois de collect(), as contagens ficam em arranjos planos, na ordem
+        das posições da base: para cada trecho, os termos (posições no
+        vocabulário, em ordem) e suas frequências.
+        
+        Args:
+            kb_dir (str): Diretório da base de conhecimento
+        """
+        self.cache_dir = os.path.join(kb_dir, self.DIRNAME)
+        self.terms = []
+        self.doc_offsets = np.zeros(1, dtype=np.uint64)
+        self.term_ids = np.zeros(0, dtype=np.uint32)
+        self.counts = np.zeros(0, dtype=np.uint32)
+        self.tokenized_books = 0
+    
+    def __len__(self):
+        """
+        Returns:
+            int: Número de trechos
+        """
+        return len(self.doc_offsets) - 1
+    
+    def doc_lengths(self):
+        """
+        Returns:
+            numpy.ndarray: Número de termos de cada trecho
+        """
+        totals = np.zeros(len(self.counts) + 1, dtype=np.uint64)
+        np.cumsum(self.counts, out=totals[1:])
+        return np.diff(totals[self.doc_offsets.astype(np.int64)])
+    
+    def book_counts(self, store, book_name):
+        """
+        Retorna as contagens de termos de todos os trechos de um livro,
+        tokenizando o livro apenas se o segmento mudou desde a última vez.
+        
+        Args:
+            store (KnowledgeStore): Base de conhecimento
+            book_name (str): Nome do livro
+            
+        Returns:
+            tuple: (vocabulário do livro em ordem, início dos termos de cada
+                trecho, posições dos termos no vocabulário, frequências)
+        """
+        path = os.path.join(self.cache_dir, store.segment_name(book_name) + ".npz")
+        fingerprint = store.segment_fingerprint(book_name)
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) == TERMS_VERSION and str(data["fingerprint"]) == fingerprint:
+                    return data["terms"], data["row_offsets"], data["term_ids"], data["counts"]
+        except (OSError, KeyError, ValueError):
+            pass
+        
+        segment = store.segment(book_name)
+        rows = []
+        vocabulary = set()
+        for entry in segment.chunks:
+            term_counts = {}
+            for term in tokenize(segment.read(entry["start"], entry["end"])):
+                term_counts[term] = term_counts.get(term, 0) + 1
+            vocabulary.update(term_counts)
+            rows.append(term_counts)
+        
+        terms = sorted(vocabulary)
+        index = {term: position for position, term in enumerate(terms)}
+        row_offsets = np.zeros(len(rows) + 1, dtype=np.uint64)
+        row_offsets[1:] = np.cumsum([len(term_counts) for term_counts in rows])
+        term_ids = np.zeros(int(row_offsets[-1]), dtype=np.uint32)
+        counts = np.zeros(int(row_offsets[-1]), dtype=np.uint32)
+        for row, term_counts in enumerate(rows):
+            start = int(row_offsets[row])
+            for offset, term in enumerate(sorted(term_counts)):
+                term_ids[start + offset] = index[term]
+                counts[start + offset] = term_counts[term]
+        terms = np.array(terms, dtype=str)
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(path + ".tmp", 'wb') as file:
+            np.savez(file, version=np.array(TERMS_VERSION), fingerprint=np.array(fingerprint), terms=terms,
+                     row_offsets=row_offsets, term_ids=term_ids, counts=counts)
+        os.replace(path + ".tmp", path)
+        self.tokenized_books += 1
+        return terms, row_offsets, term_ids, counts
+    
+    def collect(self, store):
+        """
+        Monta as contagens de termos da base, na ordem das posições de
+        store.iter_chunks(), e remove as contagens gravadas de livros que
+        saíram do catálogo.
+        
+        Args:
+            store (KnowledgeStore): Base de conhecimento
+            
+        Returns:
+            TermCounts: O próprio objeto
+        """
+        self.tokenized_books = 0
+        books = []
+        chunk_offset = 0
+        for book_name in store.book_names():
+            terms, row_offsets, term_ids, counts = self.book_counts(store, book_name)
+            rows = len(row_offsets) - 1
+            lengths = np.diff(row_offsets).astype(np.int64)
+            if store.duplicate_chunks is not None:
+                # Trechos quase duplicados não ocupam posições na base
+                kept = ~store.duplicate_chunks[chunk_offset:chunk_offset + rows]
+                entries = np.repeat(kept, lengths)
+                term_ids = term_ids[entries]
+                counts = counts[entries]
+                lengths = lengths[kept]
+            books.append((terms, term_ids, counts, lengths))
+            chunk_offset += rows
+        
+        # Vocabulário da base apenas com os termos dos trechos buscáveis
+        used = set()
+        for terms, term_ids, _, _ in books:
+            used.update(terms[np.unique(term_ids)].tolist())
+        self.terms = sorted(used)
+        index = {term: position for position, term in enumerate(self.terms)}
+        
+        parts = []
+        for terms, term_ids, counts, _ in books:
+            mapping = np.array([index.get(term, 0) for term in terms.tolist()], dtype=np.uint32)
+            parts.append(mapping[term_ids])
+        self.term_ids = np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint32)
+        self.counts = (np.concatenate([counts for _, _, counts, _ in books]) if books
+                       else np.zeros(0, dtype=np.uint32))
+        lengths = np.concatenate([lengths for _, _, _, lengths in books]) if books else np.zeros(0, dtype=np.int64)
+        self.doc_offsets = np.zeros(len(lengths) + 1, dtype=np.uint64)
+        self.doc_offsets[1:] = np.cumsum(lengths)
+        
+        segments = {store.segment_name(book_name) + ".npz" for book_name in store.book_names()}
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name not in segments:
+                    os.remove(os.path.join(self.cache_dir, name))
+        
+        print(f"Contagens de termos: {len(self)} trechos; {self.tokenized_books} de "
+              f"{len(books)} livros tokenizados.")
+        return self
@@ -0,0 +1,317 @@
+import os
+import math
+import zlib
+from array import array
+import numpy as np
+
+from retrieval.normalization import tokenize
+
+class VectorIndex:
+    # Nomes dos arquivos do índice dentro do diretório da base de conhecimento
+    MATRIX_FILENAME = "vectors.npy"
+    IDF_FILENAME = "vectors_idf.npy"
+    
+    # Memória de um bloco de linhas da matriz (float32) lido na busca
+    BLOCK_BYTES = 32 * 1024 * 1024
+    
+    def __init__(self, dimensions=2048, block_rows=None):
+        """
+        Inicializa um índice vetorial denso, local e sem dependência de rede
+        ou GPU. Os trechos são projetados em vetores de dimensão fixa com o
+        truque de hashing, ponderados por TF-IDF e normalizados.
+        
+        Args:
+            dimensions (int): Dimensão dos vetores
+            block_rows (int): Linhas da matriz processadas por multiplicação
+                (padrão: as que cabem em BLOCK_BYTES; 4096 com 2048 dimensões)
+        """
+        self.dimensions = dimensions
+        self.block_rows = block_rows or max(1, self.BLOCK_BYTES // (4 * dimensions))
+        self.matrix = None
+        self.idf = np.ones(dimensions, dtype=np.float32)
+        self.documents = []
+    
+    def _hash_terms(self, text):
+        """
+        Projeta os termos de um texto nas posições do vetor.
+        
+        Args:
+            text (str): Texto a projetar
+            
+        Returns:
+            dict: Posição do vetor -> frequência com sinal
+        """
+        buckets = {}
+        for term in tokenize(text):
+            code = zlib.crc32(term.encode('utf-8'))
+            position = code % self.dimensions
+            sign = 1.0 if code & 0x80000000 else -1.0
+            buckets[position] = buckets.get(position, 0.0) + sign
+        return buckets
+    
+    def _weigh(self, buckets, out):
+        """
+        Aplica TF-IDF sublinear a uma projeção e a normaliza em um vetor.
+        
+        Args:
+            buckets (dict): Posição do vetor -> frequência com sinal
+            out (numpy.ndarray): Vetor de saída, preenchido com zeros
+        """
+        for position, count in buckets.items():
+            if count:
+                weight = 1.0 + math.log(abs(count))
+                out[position] = math.copysign(weight, count) * self.idf[position]
+        norm = np.linalg.norm(out)
+        if norm > 0:
+            out /= norm
+    
+    def embed(self, texts):
+        """
+        Converte uma lista de textos em uma matriz de vetores normalizados.
+        
+        Args:
+            texts (list): Textos a converter
+            
+        Returns:
+            numpy.ndarray: Matriz (len(texts), dimensions) em float32
+        """
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            self._weigh(self._hash_terms(text), vectors[row])
+        return vectors
+    
+    def build(self, chunks, output_dir, documents=None):
+        """
+        Constrói o índice a partir dos trechos e grava a matriz de vetores
+        como um .npy mapeado em memória.
+        
+        Args:
+            chunks (iterator): Trechos (dicionários com id, livro, páginas e texto)
+            output_dir (str): Diretório da base de conhecimento
+            documents (sequence): Sequência que resolve as posições dos trechos
+                (ex.: KnowledgeStore). Se omitida, os trechos ficam em memória.
+                
+        Returns:
+            VectorIndex: O próprio índice, com a matriz aberta em modo leitura
+        """
+        # Primeira passagem: projeções esparsas e frequência de documentos. As
+        # projeções ficam em arranjos planos (posições, frequências e o início
+        # de cada trecho), bem menores que um dicionário por trecho.
+        positions = array('I')
+        counts = array('f')
+        offsets = array('Q', [0])
+        doc_freq = np.zeros(self.dimensions, dtype=np.int64)
+        self.documents = [] if documents is None else documents
+        for chunk in chunks:
+            buckets = self._hash_terms(chunk["text"])
+            positions.extend(buckets)
+            counts.extend(buckets.values())
+            offsets.append(len(positions))
+            doc_freq[list(buckets)] += 1
+            if documents is None:
+                self.documents.append(chunk)
+        
+        total = len(offsets) - 1
+        self.idf = np.log((1 + total) / (1 + doc_freq)).astype(np.float32) + 1.0
+        
+        # Segunda passagem: grava as linhas ponderadas direto no arquivo mapeado
+        matrix_path = os.path.join(output_dir, self.MATRIX_FILENAME)
+        tmp_path = matrix_path + ".tmp.npy"
+        matrix = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32,
+                                           shape=(total, self.dimensions))
+        for row in range(total):
+            start, end = offsets[row], offsets[row + 1]
+            self._weigh(dict(zip(positions[start:end], counts[start:end])), matrix[row])
+        matrix.flush()
+        del matrix
+        os.replace(tmp_path, matrix_path)
+        
+        np.save(os.path.join(output_dir, self.IDF_FILENAME), self.idf)
+        
+        self.matrix = np.load(matrix_path, mmap_mode='r')
+        print(f"Índice vetorial construído: {total} trechos, {self.dimensions} dimensões.")
+        return self
+    
+    def _block_buckets(self, term_counts, term_positions, term_signs, start, end):
+        """
+        Projeta um bloco de trechos das contagens de termos nas posições do
+        vetor, somando os termos que caem na mesma posição.
+        
+        Args:
+            term_counts (TermCounts): Contagens de termos dos trechos
+            term_positions (numpy.ndarray): Posição do vetor de cada termo do vocabulário
+            term_signs (numpy.ndarray): Sinal de cada termo do vocabulário
+            start (int): Primeiro trecho do bloco
+            end (int): Trecho final do bloco, exclusivo
+            
+        Returns:
+            tuple: (trecho, relativo ao início do bloco; posição do vetor;
+                frequência com sinal) de cada posição ocupada
+        """
+        first, last = int(term_counts.doc_offsets[start]), int(term_counts.doc_offsets[end])
+        term_ids = term_counts.term_ids[first:last]
+        rows = np.repeat(np.arange(end - start, dtype=np.int64),
+                         np.diff(term_counts.doc_offsets[start:end + 1]).astype(np.int64))
+        keys, inverse = np.unique(rows * self.dimensions + term_positions[term_ids], return_inverse=True)
+        values = np.bincount(inverse, weights=term_signs[term_ids] * term_counts.counts[first:last],
+                             minlength=len(keys))
+        return keys // self.dimensions, keys % self.dimensions, values
+    
+    def build_from_terms(self, term_counts, output_dir, documents):
+        """
+        Constrói o índice a partir das contagens de termos da base, sem ler
+        nem tokenizar o texto, e grava a matriz de vetores como um .npy
+        mapeado em memória. O resultado é o mesmo de build() sobre os mesmos
+        trechos; as projeções são calculadas por blocos de linhas.
+        
+        Args:
+            term_counts (TermCounts): Contagens de termos dos trechos, na
+                ordem das posições de documents
+            output_dir (str): Diretório da base de conhecimento
+            documents (sequence): Sequência que resolve as posições dos trechos
+                (ex.: KnowledgeStore)
+                
+        Returns:
+            VectorIndex: O próprio índice, com a matriz aberta em modo leitura
+        """
+        self.documents = documents
+        codes = np.array([zlib.crc32(term.encode('utf-8')) for term in term_counts.terms], dtype=np.int64)
+        term_positions = codes % self.dimensions
+        term_signs = np.where(codes & 0x80000000, 1.0, -1.0)
+        total = len(term_counts)
+        blocks = [(start, min(start + self.block_rows, total)) for start in range(0, total, self.block_rows)]
+        
+        # Primeira passagem: frequência de documentos de cada posição
+        doc_freq = np.zeros(self.dimensions, dtype=np.int64)
+        for start, end in blocks:
+            _, positions, _ = self._block_buckets(term_counts, term_positions, term_signs, start, end)
+            doc_freq += np.bincount(positions, minlength=self.dimensions)
+        self.idf = np.log((1 + total) / (1 + doc_freq)).astype(np.float32) + 1.0
+        
+        # Segunda passagem: TF-IDF sublinear e normalização, bloco a bloco. O
+        # arquivo novo já vem zerado: só as posições ocupadas são gravadas,
+        # sem montar o bloco denso em memória.
+        matrix_path = os.path.join(output_dir, self.MATRIX_FILENAME)
+        tmp_path = matrix_path + ".tmp.npy"
+        matrix = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32,
+                                           shape=(total, self.dimensions))
+        for start, end in blocks:
+            rows, positions, values = self._block_buckets(term_counts, term_positions, term_signs, start, end)
+            occupied = values != 0
+            rows, positions, values = rows[occupied], positions[occupied], values[occupied]
+            weights = (np.sign(values) * (1.0 + np.log(np.abs(values))) * self.idf[positions]).astype(np.float32)
+            norms = np.sqrt(np.bincount(rows, weights=weights.astype(np.float64) ** 2, minlength=end - start))
+            matrix[start + rows, positions] = weights / np.where(norms > 0, norms, 1.0)[rows]
+        matrix.flush()
+        del matrix
+        os.replace(tmp_path, matrix_path)
+        
+        np.save(os.path.join(output_dir, self.IDF_FILENAME), self.idf)
+        
+        self.matrix = np.load(matrix_path, mmap_mode='r')
+        print(f"Índice vetorial construído: {total} trechos, {self.dimensions} dimensões.")
+        return self
+    
+    @classmethod
+    def exists(cls, output_dir):
+        """
+        Verifica se há um índice vetorial salvo no diretório.
+        
+        Args:
+            output_dir (str): Diretório da base de conhecimento
+            
+        Returns:
+            bool: True se todos os arquivos do índice existirem
+        """
+        return all(os.path.exists(os.path.join(output_dir, name))
+                   for name in (cls.MATRIX_FILENAME, cls.IDF_FILENAME))
+    
+    @classmethod
+    def load(cls, output_dir, documents):
+        """
+        Abre um índice salvo, mapeando a matriz de vetores em memória.
+        
+        Args:
+            output_dir (str): Diretório da base de conhecimento
+            documents (sequence): Sequência que resolve as posições dos trechos
+                (ex.: KnowledgeStore)
+                
+        Returns:
+            VectorIndex: Índice carregado ou None em caso de erro
+        """
+        try:
+            matrix = np.load(os.path.join(output_dir, cls.MATRIX_FILENAME), mmap_mode='r')
+            idf = np.load(os.path.join(output_dir, cls.IDF_FILENAME))
+        except Exception as e:
+            print(f"Erro ao carregar o índice vetorial de {output_dir}: {e}")
+            return None
+        
+        if matrix.shape[0] != len(documents):
+            print(f"Índice vetorial em {output_dir} não corresponde à base de conhecimento. Reprocesse a biblioteca.")
+            return None
+        
+        index = cls(dimensions=matrix.shape[1])
+        index.matrix = matrix
+        index.idf = idf
+        index.documents = documents
+        return index
+    
+    def search_batch(self, queries, top_k=5, candidates=None):
+        """
+        Busca os trechos mais similares (cosseno) para várias consultas de uma
+        vez, com uma multiplicação de matrizes por bloco de linhas e seleção
+        parcial com argpartition.
+        
+        Args:
+            queries (list): Textos das consultas (ex.: parágrafos de uma anotação)
+            top_k (int): Número de trechos por consulta
+            candidates (list): Intervalos (início, fim exclusivo) de linhas às
+                quais a busca se restringe; as demais linhas não são lidas
+                (opcional, padrão: toda a matriz)
+                
+        Returns:
+            list: Para cada consulta, tuplas (similaridade, trecho) em ordem decrescente
+        """
+        if self.matrix is None or not len(self.documents) or not queries:
+            return [[] for _ in queries]
+        
+        query_vectors = self.embed(queries)
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        
+        blocks = [(start, min(start + self.block_rows, range_end))
+                  for range_start, range_end in (candidates or [(0, self.matrix.shape[0])])
+                  for start in range(range_start, range_end, self.block_rows)]
+        for start, end in blocks:
+            block = self.matrix[start:end]
+            scores = query_vectors @ block.T
+            k = min(top_k, scores.shape[1])
+            rows = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, rows, axis=1)], axis=1)
+            best_rows = np.concatenate([best_rows, rows + start], axis=1)
+            
+            if best_scores.shape[1] > top_k:
+                keep = np.argpartition(-best_scores, top_k - 1, axis=1)[:, :top_k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+        
+        results = []
+        for scores, rows in zip(best_scores, best_rows):
+            order = np.argsort(-scores)
+            results.append([(float(scores[i]), self.documents[int(rows[i])]) for i in order if scores[i] > 0])
+        return results
+    
+    def search(self, query, top_k=5, candidates=None):
+        """
+        Busca os trechos mais similares para uma consulta.
+        
+        Args:
+            query (str): Texto da consulta
+            top_k (int): Número de trechos a retornar
+            candidates (list): Intervalos de linhas aos quais a busca se
+                restringe (opcional)
+                
+        Returns:
+            list: Tuplas (similaridade, trecho), da mais similar para a menos
+        """
+        return self.search_batch([query], top_k, candidates)[0]
@@ -1,8 +1,13 @@
 import tkinter as tk
 from tkinter import scrolledtext, filedialog, messagebox, Menu
 import threading
+import queue
 import time
 
+# Intervalo, em ms, em que a interface aplica as atualizações enviadas pelas
+# threads de consulta (trechos de texto recebidos, mensagens de status)
+UI_POLL_MS = 50
+
 class MedicalTextEditor:
     def __init__(self, ai_client):
         """
@@ -21,7 +26,8 @@ class MedicalTextEditor:
         self.last_text = ""
         self.suggestion_thread = None
         self.running = False
-        
+        self.ui_queue = queue.Queue()
+    
     def setup_ui(self):
         """
         Configura a interface do usuário do editor.
@@ -73,6 +79,76 @@ class MedicalTextEditor:
         self.status_bar = tk.Label(self.root, text="Pronto", bd=1, relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         
+        self.root.after(UI_POLL_MS, self.process_ui_queue)
+    
+    def call_in_ui(self, function, *args):
+        """
+        Agenda uma chamada na thread da interface. O Tkinter não pode ser
+        usado a partir das threads de consulta.
+        
+        Args:
+            function (callable): Função a chamar
+            *args: Argumentos da função
+        """
+        self.ui_queue.put((function, args))
+    
+    def process_ui_queue(self):
+        """
+        Aplica as atualizações pendentes da interface e agenda a próxima
+        verificação. Os trechos recebidos entre duas verificações são
+        inseridos de uma só vez.
+        """
+        while True:
+            try:
+                function, args = self.ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                function(*args)
+            except tk.TclError:
+                # A janela da resposta foi fechada antes do fim do fluxo
+                pass
+        if self.running:
+            self.root.after(UI_POLL_MS, self.process_ui_queue)
+    
+    def append_text(self, widget, text):
+        """
+        Acrescenta texto a uma área somente leitura, mantendo o final visível.
+        
+        Args:
+            widget (ScrolledText): Área de texto
+            text (str): Texto a acrescentar
+        """
+        widget.config(state=tk.NORMAL)
+        widget.insert(tk.END, text)
+        widget.see(tk.END)
+        widget.config(state=tk.DISABLED)
+    
+    def stream_into(self, widget, stream, label):
+        """
+        Insere em uma área de texto as partes de uma resposta em fluxo, na
+        thread de consulta, e mostra na barra de status o tempo até o
+        primeiro trecho e o tempo total.
+        
+        Args:
+            widget (ScrolledText): Área de texto, já limpa
+            stream (callable): Função que inicia a consulta e devolve os trechos
+            label (str): Nome da resposta nas mensagens de status
+        """
+        start = time.perf_counter()
+        first_token = None
+        for text in stream():
+            if first_token is None:
+                first_token = time.perf_counter() - start
+                self.call_in_ui(self.update_status, f"Recebendo {label}... (primeiro token em {first_token:.2f} s)")
+            self.call_in_ui(self.append_text, widget, text)
+        total = time.perf_counter() - start
+        if first_token is None:
+            self.call_in_ui(self.update_status, f"Nenhuma resposta recebida ({total:.1f} s)")
+        else:
+            self.call_in_ui(self.update_status, f"{label[0].upper()}{label[1:]}: primeiro token em "
+                                                f"{first_token:.2f} s, total {total:.1f} s")
+    
     def new_file(self):
         """
         Cria um novo arquivo.
@@ -81,7 +157,7 @@ class MedicalTextEditor:
         self.current_file = None
         self.root.title("Assistente Médico - Editor de Texto")
         self.update_status("Novo arquivo criado")
-        
+    
     def open_file(self):
         """
         Abre um arquivo existente.
@@ -171,21 +247,22 @@ class MedicalTextEditor:
         
         self.update_status("Analisando dados do paciente...")
         
+        # A janela abre de imediato e recebe a análise à medida que é gerada
+        analysis_window = tk.Toplevel(self.root)
+        analysis_window.title("Análise do Paciente")
+        analysis_window.geometry("800x600")
+        
+        analysis_text = scrolledtext.ScrolledText(analysis_window, wrap=tk.WORD, font=("Arial", 12))
+        analysis_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        analysis_text.config(state=tk.DISABLED)
+        
+        patient_context = self.patient_context
+        
         def analyze():
-            analysis = self.ai_client.analyze_patient_data(self.patient_context)
-            
-            analysis_window = tk.Toplevel(self.root)
-            analysis_window.title("Análise do Paciente")
-            analysis_window.geometry("800x600")
-            
-            analysis_text = scrolledtext.ScrolledText(analysis_window, wrap=tk.WORD, font=("Arial", 12))
-            analysis_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-            analysis_text.insert(tk.END, analysis)
-            analysis_text.config(state=tk.DISABLED)
-            
-            self.update_status("Análise do paciente concluída")
-        
-        threading.Thread(target=analyze).start()
+            self.stream_into(analysis_text, lambda: self.ai_client.stream_patient_analysis(patient_context),
+                             "análise do paciente")
+        
+        threading.Thread(target=analyze, daemon=True).start()
     
     def on_text_change(self, event=None):
         """
@@ -206,19 +283,19 @@ class MedicalTextEditor:
             return  # Já está atualizando
         
         self.update_status("Gerando sugestões médicas...")
+        current_text = self.text_area.get(1.0, tk.END).strip()
+        patient_context = self.patient_context
+        
+        self.suggestion_area.config(state=tk.NORMAL)
+        self.suggestion_area.delete(1.0, tk.END)
+        self.suggestion_area.config(state=tk.DISABLED)
         
         def get_suggestions():
-            current_text = self.text_area.get(1.0, tk.END).strip()
-            suggestions = self.ai_client.get_medical_suggestions(current_text, self.patient_context)
-            
-            self.suggestion_area.config(state=tk.NORMAL)
-            self.suggestion_area.delete(1.0, tk.END)
-            self.suggestion_area.insert(tk.END, suggestions)
-            self.suggestion_area.config(state=tk.DISABLED)
-            
-            self.update_status("Sugestões médicas atualizadas")
-        
-        self.suggestion_thread = threading.Thread(target=get_suggestions)
+            self.stream_into(self.suggestion_area,
+                             lambda: self.ai_client.stream_medical_suggestions(current_text, patient_context),
+                             "sugestões médicas")
+        
+        self.suggestion_thread = threading.Thread(target=get_suggestions, daemon=True)
         self.suggestion_thread.start()
     
     def update_status(self, message):
@@ -8,18 +8,30 @@ import sys
 import time
 import threading
 import PyPDF2
-import requests
 import json
 
+# Adicionar o diretório do assistente ao path para ler a base de conhecimento processada
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "medical_assistant"))
+from book_processor.knowledge_store import KnowledgeStore
+from ai_integration.context_assembler import ContextAssembler
+from ai_integration.http_transport import shared_transport
+from ai_integration.streaming import iter_sse_events, iter_text_deltas
+from ai_integration.prompt_cache import PromptCacheStats, cached_system_prompt
+from ai_integration.completion_cache import CompletionCache
+
 class MedicalCopilot:
-    def __init__(self, api_key):
+    def __init__(self, api_key, cache_dir=None):
         """
         Inicializa o Medical Copilot.
         
         Args:
             api_key (str): Chave de API da Anthropic
+            cache_dir (str): Diretório para gravar as respostas do modelo e
+                reaproveitá-las entre execuções (opcional; sem ele, as
+                respostas ficam apenas em memória)
         """
         self.api_key = api_key
+        self.transport = shared_transport()
         self.api_url = "https://api.anthropic.com/v1/messages"
         self.headers = {
             "x-api-key": api_key,
@@ -29,46 +41,68 @@ class MedicalCopilot:
         self.model = "claude-3-opus-20240229"
         self.max_tokens = 1000
         self.medical_knowledge = ""
+        self.context_assembler = ContextAssembler()
+        self.cache_stats = PromptCacheStats()
+        self.completion_cache = CompletionCache(cache_dir=cache_dir)
         self.current_text = ""
         self.current_file = None
         self.suggestion_thread = None
         self.running = True
-        
-    def process_pdf(self, pdf_path):
+    
+    def iter_pdf_pages(self, pdf_path):
         """
-        Extrai o texto de um arquivo PDF.
+        Extrai o texto de um arquivo PDF página por página, sob demanda.
         
         Args:
             pdf_path (str): Caminho para o arquivo PDF
             
-        Returns:
-            str: Texto extraído do PDF
+        Yields:
+            str: Texto de cada página
         """
-        text = ""
         try:
             with open(pdf_path, 'rb') as file:
                 reader = PyPDF2.PdfReader(file)
                 for page_num in range(len(reader.pages)):
                     page = reader.pages[page_num]
-                    text += page.extract_text() + "\n"
+                    yield page.extract_text() + "\n"
                     # Mostrar progresso
                     print(f"Processando {os.path.basename(pdf_path)}: {page_num+1}/{len(reader.pages)} páginas", end="\r")
         except Exception as e:
             print(f"Erro ao processar o PDF {pdf_path}: {e}")
+    
+    def process_pdf(self, pdf_path):
+        """
+        Extrai o texto de um arquivo PDF.
         
-        return text
+        Args:
+            pdf_path (str): Caminho para o arquivo PDF
+            
+        Returns:
+            str: Texto extraído do PDF
+        """
+        return "".join(self.iter_pdf_pages(pdf_path))
     
     def load_medical_books(self, books_path):
         """
         Carrega e processa os livros médicos.
         
         Args:
-            books_path (str): Caminho para a pasta contendo os livros médicos
+            books_path (str): Caminho para a pasta contendo os livros médicos ou a
+                base de conhecimento processada pelo assistente
         """
         if not os.path.exists(books_path):
             print(f"O caminho '{books_path}' não existe.")
             return False
         
+        # Carregar apenas o conhecimento que cabe no orçamento de tokens das sugestões
+        max_tokens = self.context_assembler.budget("suggestion")
+        max_chars = int(max_tokens * self.context_assembler.chars_per_token)
+        
+        # Usar a base de conhecimento já processada, se a pasta for uma
+        for store_dir in (os.path.join(books_path, "store"), books_path):
+            if KnowledgeStore.exists(store_dir):
+                return self.load_knowledge_store(store_dir, max_tokens)
+        
         print(f"Processando livros em: {books_path}")
         
         # Encontrar todos os PDFs na pasta
@@ -84,28 +118,79 @@ class MedicalCopilot:
         
         print(f"Encontrados {len(pdfs)} arquivos PDF.")
         
-        # Processar cada PDF
-        all_text = ""
+        # Processar cada PDF em fluxo, parando de extrair ao atingir o limite
+        parts = []
+        total_chars = 0
         for pdf_path in pdfs:
+            if total_chars >= max_chars:
+                print(f"Limite de {max_chars} caracteres atingido. Ignorando os demais livros.")
+                break
             print(f"Processando: {os.path.basename(pdf_path)}")
-            text = self.process_pdf(pdf_path)
-            all_text += f"\n\n--- CONTEÚDO DE {os.path.basename(pdf_path)} ---\n\n"
-            all_text += text
+            header = f"\n\n--- CONTEÚDO DE {os.path.basename(pdf_path)} ---\n\n"
+            parts.append(header)
+            total_chars += len(header)
+            for page_text in self.iter_pdf_pages(pdf_path):
+                parts.append(page_text)
+                total_chars += len(page_text)
+                if total_chars >= max_chars:
+                    break
             print(f"Concluído: {os.path.basename(pdf_path)}                    ")
         
-        # Limitar o tamanho do conhecimento médico para evitar tokens excessivos
-        max_chars = 100000  # Aproximadamente 25k tokens
+        all_text = "".join(parts)
         if len(all_text) > max_chars:
-            print(f"Texto extraído muito grande ({len(all_text)} caracteres). Limitando a {max_chars} caracteres.")
-            all_text = all_text[:max_chars]
+            print(f"Texto extraído muito grande ({len(all_text)} caracteres). Limitando a {max_tokens} tokens.")
+            all_text = self.context_assembler.truncate(all_text, max_tokens)
         
         self.medical_knowledge = all_text
         print(f"Processamento concluído. Extraídos {len(all_text)} caracteres de texto.")
         return True
     
-    def get_completion(self, prompt, system_prompt="", temperature=0.7):
+    def load_knowledge_store(self, store_dir, max_tokens=None):
         """
-        Obtém uma resposta do modelo Claude baseada no prompt fornecido.
+        Carrega o conhecimento médico de uma base processada pelo assistente.
+        Apenas os blocos necessários para atingir o limite são descomprimidos.
+        
+        Args:
+            store_dir (str): Diretório da base de conhecimento segmentada
+            max_tokens (int): Número máximo de tokens carregados (padrão: o
+                orçamento das sugestões)
+                
+        Returns:
+            bool: True se algum conteúdo foi carregado
+        """
+        store = KnowledgeStore(store_dir)
+        if not store.book_names():
+            print(f"Base de conhecimento em '{store_dir}' está vazia ou incompatível.")
+            return False
+        
+        print(f"Carregando base de conhecimento de: {store_dir}")
+        if max_tokens is None:
+            max_tokens = self.context_assembler.budget("suggestion")
+        max_chars = int(max_tokens * self.context_assembler.chars_per_token)
+        parts = []
+        total_chars = 0
+        for book_name in store.book_names():
+            if total_chars >= max_chars:
+                print(f"Limite de {max_chars} caracteres atingido. Ignorando os demais livros.")
+                break
+            header = f"\n\n--- CONTEÚDO DE {book_name} ---\n\n"
+            parts.append(header)
+            total_chars += len(header)
+            segment = store.segment(book_name)
+            for page in segment.pages:
+                page_text = segment.read(page["start"], page["end"])
+                parts.append(page_text)
+                total_chars += len(page_text)
+                if total_chars >= max_chars:
+                    break
+        
+        self.medical_knowledge = self.context_assembler.truncate("".join(parts), max_tokens)
+        print(f"Base de conhecimento carregada. {len(self.medical_knowledge)} caracteres de texto.")
+        return True
+    
+    def request_data(self, prompt, system_prompt="", temperature=0.7):
+        """
+        Monta o corpo de uma requisição à API de mensagens.
         
         Args:
             prompt (str): Prompt para o modelo
@@ -113,7 +198,7 @@ class MedicalCopilot:
             temperature (float): Temperatura para geração de texto
             
         Returns:
-            str: Resposta do modelo
+            dict: Corpo da requisição
         """
         data = {
             "model": self.model,
@@ -124,35 +209,105 @@ class MedicalCopilot:
             ]
         }
         
+        # O prompt do sistema (instruções e conhecimento dos livros) se repete
+        # entre as consultas e é reaproveitado pelo cache de prompts da API
         if system_prompt:
-            data["system"] = system_prompt
+            data["system"] = cached_system_prompt(system_prompt)
+        return data
+    
+    def get_completion(self, prompt, system_prompt="", temperature=0.7):
+        """
+        Obtém uma resposta do modelo Claude baseada no prompt fornecido.
+        
+        Args:
+            prompt (str): Prompt para o modelo
+            system_prompt (str): Prompt do sistema
+            temperature (float): Temperatura para geração de texto
+            
+        Returns:
+            str: Resposta do modelo
+        """
+        key = self.completion_cache.key(self.model, system_prompt, prompt, temperature)
+        cached = self.completion_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        data = self.request_data(prompt, system_prompt, temperature)
         
         try:
-            response = requests.post(self.api_url, headers=self.headers, json=data)
+            response = self.transport.post(self.api_url, headers=self.headers, json=data)
             response.raise_for_status()
             
             result = response.json()
-            return result["content"][0]["text"]
+            self.cache_stats.record(result.get("usage"))
+            text = result["content"][0]["text"]
+            self.completion_cache.put(key, text)
+            return text
         except Exception as e:
             print(f"Erro ao comunicar com a API da Anthropic: {e}")
             if 'response' in locals() and response:
                 print(f"Resposta da API: {response.text}")
             return "Não foi possível obter uma resposta. Verifique sua conexão ou chave de API."
     
-    def get_medical_suggestions(self, current_text):
+    def stream_completion(self, prompt, system_prompt="", temperature=0.7):
         """
-        Obtém sugestões médicas com base no texto atual.
+        Obtém uma resposta do modelo Claude em fluxo (Server-Sent Events),
+        entregando o texto à medida que é gerado.
+        
+        Args:
+            prompt (str): Prompt para o modelo
+            system_prompt (str): Prompt do sistema
+            temperature (float): Temperatura para geração de texto
+            
+        Yields:
+            str: Trechos do texto da resposta
+        """
+        key = self.completion_cache.key(self.model, system_prompt, prompt, temperature)
+        cached = self.completion_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        data = self.request_data(prompt, system_prompt, temperature)
+        data["stream"] = True
+        
+        response = None
+        parts = []
+        try:
+            response = self.transport.post(self.api_url, headers=self.headers, json=data, stream=True)
+            response.raise_for_status()
+            # O fluxo é sempre UTF-8, mesmo sem charset no Content-Type
+            response.encoding = "utf-8"
+            events = iter_sse_events(response.iter_lines(decode_unicode=True))
+            for text in iter_text_deltas(events, on_usage=self.cache_stats.record):
+                parts.append(text)
+                yield text
+            self.completion_cache.put(key, "".join(parts))
+        except Exception as e:
+            print(f"\nErro ao comunicar com a API da Anthropic: {e}")
+            if parts:
+                yield "\n\n[Resposta interrompida. Verifique sua conexão.]"
+            else:
+                yield "Não foi possível obter uma resposta. Verifique sua conexão ou chave de API."
+        finally:
+            if response is not None:
+                response.close()
+    
+    def suggestion_request(self, current_text):
+        """
+        Monta os prompts de uma consulta de sugestões, dentro do orçamento de
+        tokens das sugestões.
         
         Args:
             current_text (str): Texto atual
             
         Returns:
-            str: Sugestões médicas
+            tuple: (prompt, prompt do sistema)
         """
-        prompt = f"""
+        template = """
         Texto atual do prontuário médico:
         
-        {current_text}
+        {note}
         
         Com base no texto acima, forneça sugestões para continuar o prontuário, incluindo:
         1. Possíveis diagnósticos baseados nos sintomas e informações apresentadas
@@ -164,14 +319,50 @@ class MedicalCopilot:
         Forneça suas sugestões de forma concisa e direta, como um copilot médico que está auxiliando na escrita do prontuário.
         """
         
-        system_prompt = f"""Você é um assistente médico especializado que funciona como um copilot para ajudar médicos a escrever prontuários.
+        system_template = """Você é um assistente médico especializado que funciona como um copilot para ajudar médicos a escrever prontuários.
         Use seu conhecimento médico e as seguintes informações extraídas de livros médicos como referência:
         
-        {self.medical_knowledge[:10000]}  # Limitando para não exceder o limite de tokens
+        {context}
         """
         
+        # O prontuário e o conhecimento dos livros dividem o orçamento de tokens
+        passages = [self.medical_knowledge] if self.medical_knowledge else []
+        note, context = self.context_assembler.assemble(
+            "suggestion", template.format(note="") + system_template.format(context=""), current_text, passages)
+        return template.format(note=note), system_template.format(context=context)
+    
+    def get_medical_suggestions(self, current_text):
+        """
+        Obtém sugestões médicas com base no texto atual.
+        
+        Args:
+            current_text (str): Texto atual
+            
+        Returns:
+            str: Sugestões médicas
+        """
+        prompt, system_prompt = self.suggestion_request(current_text)
         return self.get_completion(prompt, system_prompt)
     
+    def print_suggestions(self):
+        """
+        Obtém sugestões para o texto atual e as exibe à medida que são
+        geradas, com o tempo até o primeiro trecho e o tempo total.
+        """
+        print("\nObtendo sugestões do copilot... Aguarde...")
+        start = time.time()
+        first_token = None
+        prompt, system_prompt = self.suggestion_request(self.current_text)
+        for text in self.stream_completion(prompt, system_prompt):
+            if first_token is None:
+                first_token = time.time() - start
+                print("\n=== SUGESTÕES DO COPILOT ===")
+            print(text, end="", flush=True)
+        print()
+        if first_token is not None:
+            print(f"(primeiro token em {first_token:.2f} s, total {time.time() - start:.1f} s)")
+        print("=" * 50)
+    
     def create_new_file(self):
         """
         Cria um novo arquivo de texto.
@@ -254,11 +445,7 @@ class MedicalCopilot:
             elif line == ":s":
                 self.save_file()
             elif line == ":c":
-                print("\nObtendo sugestões do copilot... Aguarde...")
-                suggestions = self.get_medical_suggestions(self.current_text)
-                print("\n=== SUGESTÕES DO COPILOT ===")
-                print(suggestions)
-                print("=" * 50)
+                self.print_suggestions()
             else:
                 if self.current_text and not self.current_text.endswith("\n"):
                     self.current_text += "\n"
@@ -266,11 +453,7 @@ class MedicalCopilot:
                 
                 # Obter sugestões automaticamente após cada parágrafo
                 if line.strip() == "":
-                    print("\nObtendo sugestões do copilot... Aguarde...")
-                    suggestions = self.get_medical_suggestions(self.current_text)
-                    print("\n=== SUGESTÕES DO COPILOT ===")
-                    print(suggestions)
-                    print("=" * 50)
+                    self.print_suggestions()
     
     def show_menu(self):
         """
@@ -298,6 +481,9 @@ class MedicalCopilot:
         elif choice == "5":
             self.save_file()
         elif choice == "6":
+            if self.cache_stats.requests:
+                print(self.cache_stats.report())
+            print(self.completion_cache.report())
             print("\nEncerrando o programa...")
             self.running = False
         else:
@@ -6,30 +6,40 @@ Script de inicialização para o Assistente Médico com IA.
 import os
 import sys
 import subprocess
+import importlib.util
+
+# Módulos exigidos pelo programa (nome de importação)
+REQUIRED_MODULES = ["anthropic", "PyPDF2", "nltk", "numpy"]
+
+def missing_dependencies():
+    """
+    Verifica quais dependências não estão instaladas, sem importá-las: apenas
+    os metadados dos pacotes são consultados, o que é quase instantâneo.
+    
+    Returns:
+        list: Nomes dos módulos ausentes
+    """
+    return [name for name in REQUIRED_MODULES if importlib.util.find_spec(name) is None]
 
 def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    
     # Verificar se as dependências estão instaladas
-    try:
-        import anthropic
-        import PyPDF2
-        import ebooklib
-        import nltk
-        import numpy
-    except ImportError:
+    if missing_dependencies():
         print("Instalando dependências...")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r",
+                               os.path.join(script_dir, "requirements.txt")])
+        importlib.invalidate_caches()
         print("Dependências instaladas com sucesso!")
     
-    # Executar o programa principal
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    main_script = os.path.join(script_dir, "medical_assistant", "main.py")
-    
-    # Passar argumentos da linha de comando para o script principal
-    args = sys.argv[1:]
-    cmd = [sys.executable, main_script] + args
+    # Executar o programa principal no mesmo interpretador, passando os
+    # argumentos da linha de comando
+    sys.path.insert(0, os.path.join(script_dir, "medical_assistant"))
+    sys.argv = [os.path.join(script_dir, "medical_assistant", "main.py")] + sys.argv[1:]
     
     try:
-        subprocess.call(cmd)
+        import main as medical_assistant
+        medical_assistant.main()
     except Exception as e:
         print(f"Erro ao executar o programa: {e}")
         return 1
@@ -37,4 +47,4 @@ def main():
     return 0
 
 if __name__ == "__main__":
-    sys.exit(main()) 
\ No newline at end of file
+    sys.exit(main())
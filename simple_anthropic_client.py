@@ -3,19 +3,26 @@
 Cliente simples para a API da Anthropic usando requisições HTTP diretas.
 """
 
-import requests
+import os
 import json
 import sys
 
+# Adicionar o diretório do assistente ao path para usar o transporte HTTP compartilhado
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "medical_assistant"))
+from ai_integration.http_transport import shared_transport
+
 class SimpleAnthropicClient:
-    def __init__(self, api_key):
+    def __init__(self, api_key, transport=None):
         """
         Inicializa o cliente simples da API da Anthropic.
         
         Args:
             api_key (str): Chave de API da Anthropic
+            transport (HTTPTransport): Conexões HTTP persistentes (padrão: o
+                transporte compartilhado)
         """
         self.api_key = api_key
+        self.transport = transport or shared_transport()
         self.api_url = "https://api.anthropic.com/v1/messages"
         self.headers = {
             "x-api-key": api_key,
@@ -49,15 +56,16 @@ class SimpleAnthropicClient:
         if system_prompt:
             data["system"] = system_prompt
         
+        response = None
         try:
-            response = requests.post(self.api_url, headers=self.headers, json=data)
+            response = self.transport.post(self.api_url, headers=self.headers, json=data)
             response.raise_for_status()
             
             result = response.json()
             return result["content"][0]["text"]
         except Exception as e:
             print(f"Erro ao comunicar com a API da Anthropic: {e}")
-            if response:
+            if response is not None:
                 print(f"Resposta da API: {response.text}")
             return "Não foi possível obter uma resposta. Verifique sua conexão ou chave de API."
 
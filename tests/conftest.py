@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do assistente são importados como no main.py, a partir da pasta medical_assistant
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "medical_assistant"))
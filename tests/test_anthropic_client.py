@@ -0,0 +1,191 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from ai_integration.anthropic_client import AnthropicClient, SYSTEM_INSTRUCTIONS
+from ai_integration.http_transport import HTTPTransport
+from ai_integration.prompt_cache import MIN_CACHED_TOKENS, cached_system_prompt
+
+# Versão mínima do SDK com client.messages e eventos de fluxo; deve
+# acompanhar o requirements.txt
+PINNED_SDK = (0, 42, 0)
+
+# Contexto completo acima do prefixo mínimo do cache de prompts
+MEDICAL_CONTEXT = "A bronquiolite é tratada com suporte e hidratação. " * 100
+
+class StubStream:
+    def __init__(self, events):
+        self.events = events
+        self.closed = False
+    
+    def __iter__(self):
+        return iter(self.events)
+    
+    def close(self):
+        self.closed = True
+
+class StubMessages:
+    def __init__(self):
+        self.calls = []
+        self.streams = []
+    
+    # Mesma assinatura de Messages.create no SDK fixado (anthropic 0.42):
+    # todos os argumentos são nomeados, e um argumento desconhecido falha
+    def create(self, *, max_tokens, messages, model, metadata=None, stop_sequences=None,
+               stream=False, system=None, temperature=None, tool_choice=None, tools=None,
+               top_k=None, top_p=None, extra_headers=None, extra_query=None, extra_body=None,
+               timeout=None):
+        self.calls.append({"max_tokens": max_tokens, "messages": messages, "model": model,
+                           "stream": stream, "system": system, "temperature": temperature})
+        usage = SimpleNamespace(input_tokens=1200, cache_read_input_tokens=1000,
+                                cache_creation_input_tokens=0)
+        if not stream:
+            return SimpleNamespace(content=[SimpleNamespace(type="text", text="Resposta completa")],
+                                   usage=usage)
+        events = [
+            SimpleNamespace(type="message_start", message=SimpleNamespace(usage=usage)),
+            SimpleNamespace(type="content_block_start", index=0),
+            SimpleNamespace(type="content_block_delta", delta=SimpleNamespace(type="text_delta", text="Resposta ")),
+            SimpleNamespace(type="content_block_delta", delta=SimpleNamespace(type="text_delta", text="em fluxo")),
+            SimpleNamespace(type="content_block_stop", index=0),
+            SimpleNamespace(type="message_stop")
+        ]
+        self.streams.append(StubStream(events))
+        return self.streams[-1]
+
+def stub_client():
+    client = AnthropicClient("chave-de-teste", transport=HTTPTransport())
+    client._client = SimpleNamespace(messages=StubMessages())
+    client.set_medical_context(MEDICAL_CONTEXT)
+    return client
+
+def test_get_completion_calls_messages_api():
+    client = stub_client()
+    
+    assert client.get_completion("Paciente com febre") == "Resposta completa"
+    
+    call = client._client.messages.calls[0]
+    assert call["stream"] is False
+    assert call["model"] == client.model
+    assert call["messages"] == [{"role": "user", "content": "Paciente com febre"}]
+    assert "bronquiolite" in call["system"][0]["text"]
+    assert client.cache_stats.hits == 1
+
+def test_stream_completion_yields_text_deltas_and_closes_stream():
+    client = stub_client()
+    
+    assert "".join(client.stream_completion("Paciente com tosse")) == "Resposta em fluxo"
+    
+    messages = client._client.messages
+    assert messages.calls[0]["stream"] is True
+    assert messages.streams[0].closed
+    assert client.cache_stats.requests == 1
+    # A resposta completa fica no cache e a repetição não chama a API
+    assert "".join(client.stream_completion("Paciente com tosse")) == "Resposta em fluxo"
+    assert len(messages.calls) == 1
+
+class StubRetriever:
+    def search_batch(self, queries, limit):
+        chunk = {"id": 1, "book": "Pediatria", "text": "Febre em lactentes exige avaliação de sinais de gravidade."}
+        return [[(1.0, chunk)] for _ in queries]
+
+def test_retrieval_mode_sends_passages_uncached():
+    client = stub_client()
+    client.set_retriever(StubRetriever())
+    
+    client.get_medical_suggestions("Lactente com febre")
+    
+    # As instruções ficam abaixo do prefixo mínimo: nenhum bloco vai marcado
+    # para o cache, e os trechos buscados vêm em um bloco separado
+    instructions, passages = client._client.messages.calls[0]["system"]
+    assert instructions == {"type": "text", "text": SYSTEM_INSTRUCTIONS}
+    assert "cache_control" not in passages
+    assert "Febre em lactentes" in passages["text"]
+
+def test_only_prefixes_above_the_minimum_are_marked_for_the_cache():
+    short = "x" * 100
+    long = "x" * (MIN_CACHED_TOKENS * 4)
+    assert "cache_control" not in cached_system_prompt(short)[0]
+    assert cached_system_prompt(long, "trechos")[0]["cache_control"] == {"type": "ephemeral"}
+
+def test_full_context_without_retriever_is_cached():
+    client = stub_client()
+    
+    client.get_medical_suggestions("Lactente com tosse")
+    
+    system = client._client.messages.calls[0]["system"]
+    assert len(system) == 1
+    assert system[0]["cache_control"] == {"type": "ephemeral"}
+    assert "bronquiolite" in system[0]["text"]
+
+def installed_sdk():
+    anthropic = pytest.importorskip("anthropic")
+    version = tuple(int(part) for part in anthropic.__version__.split(".")[:3] if part.isdigit())
+    if version < PINNED_SDK:
+        pytest.skip(f"anthropic {anthropic.__version__} instalado; o fixado é {'.'.join(map(str, PINNED_SDK))}")
+    return anthropic
+
+class FakeMessagesAPI(BaseHTTPRequestHandler):
+    requests = []
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeMessagesAPI.requests.append((self.path, body))
+        usage = {"input_tokens": 1200, "output_tokens": 3, "cache_read_input_tokens": 1000,
+                 "cache_creation_input_tokens": 0}
+        message = {"id": "msg_1", "type": "message", "role": "assistant", "model": body["model"],
+                   "content": [], "stop_reason": None, "stop_sequence": None, "usage": usage}
+        if body.get("stream"):
+            events = [
+                ("message_start", {"type": "message_start", "message": message}),
+                ("content_block_start", {"type": "content_block_start", "index": 0,
+                                         "content_block": {"type": "text", "text": ""}}),
+                ("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                         "delta": {"type": "text_delta", "text": "Resposta do SDK"}}),
+                ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+                ("message_stop", {"type": "message_stop"})
+            ]
+            payload = "".join(f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events)
+            content_type = "text/event-stream"
+        else:
+            message["content"] = [{"type": "text", "text": "Resposta do SDK"}]
+            message["stop_reason"] = "end_turn"
+            payload = json.dumps(message)
+            content_type = "application/json"
+        data = payload.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeMessagesAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    FakeMessagesAPI.requests = []
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    yield FakeMessagesAPI.requests
+    server.shutdown()
+    server.server_close()
+
+def test_pinned_sdk_get_and_stream_completion(fake_api):
+    installed_sdk()
+    transport = HTTPTransport()
+    client = AnthropicClient("chave-de-teste", transport=transport)
+    client.set_medical_context(MEDICAL_CONTEXT)
+    
+    assert client.get_completion("Paciente com febre") == "Resposta do SDK"
+    assert "".join(client.stream_completion("Paciente com tosse")) == "Resposta do SDK"
+    transport.close()
+    
+    assert [path for path, _ in fake_api] == ["/v1/messages", "/v1/messages"]
+    assert fake_api[1][1]["stream"] is True
+    assert fake_api[0][1]["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert client.cache_stats.hits == 2
@@ -0,0 +1,85 @@
+import os
+import random
+
+import numpy as np
+
+from book_processor.chunker import TextChunker
+from book_processor.processor import BookProcessor, PageRecord
+from book_processor.knowledge_store import KnowledgeStore, KnowledgeSegment, SIGNATURES_SUFFIX
+
+WORDS = ("febre tosse dispneia sibilância taquipneia hidratação oxigênio saturação lactente criança "
+         "antibiótico dose peso quilograma diagnóstico exame radiografia hemograma internação alta "
+         "bronquiolite pneumonia asma otite sepse meningite vacina calendário consulta retorno").split()
+
+def random_pages(seed, count=6, words=120):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words)) + "." for _ in range(count)]
+
+def write_book(store, book_name, pages):
+    records = (PageRecord(book_name, page, text + "\n") for page, text in enumerate(pages, 1))
+    store.write_segment(book_name, records, TextChunker(max_tokens=64, overlap_tokens=8))
+
+def test_deduplicate_compares_only_books_after_the_unchanged_ones(tmp_path, monkeypatch):
+    store = KnowledgeStore(str(tmp_path))
+    first = random_pages(1)
+    write_book(store, "a.pdf", first)
+    write_book(store, "b.pdf", random_pages(2))
+    store.save_catalog(["a.pdf", "b.pdf"])
+    assert store.deduplicate()["compared_books"] == 2
+    assert not store.duplicate_pages.any()
+    
+    # Nova edição do primeiro livro, com as mesmas páginas
+    write_book(store, "c.pdf", first[:4] + random_pages(3, count=2))
+    store.save_catalog(["a.pdf", "b.pdf", "c.pdf"])
+    assert not store.deduplicated
+    
+    read = KnowledgeSegment.read
+    def read_new_book(segment, start, end):
+        assert segment.book_name == "c.pdf", "texto de livro inalterado lido na deduplicação"
+        return read(segment, start, end)
+    monkeypatch.setattr(KnowledgeSegment, "read", read_new_book)
+    stats = store.deduplicate()
+    assert stats["compared_books"] == 1
+    assert store.duplicate_pages.tolist() == [False] * 12 + [True] * 4 + [False] * 2
+    incremental_chunks = store.duplicate_chunks.copy()
+    
+    # Sem mudanças, nenhum texto é lido nem comparado
+    monkeypatch.setattr(KnowledgeSegment, "read", None)
+    assert store.deduplicate()["compared_books"] == 0
+    monkeypatch.setattr(KnowledgeSegment, "read", read)
+    
+    # O resultado incremental é o mesmo de uma deduplicação completa
+    os.remove(os.path.join(str(tmp_path), KnowledgeStore.DUPLICATES_FILENAME))
+    for book_name in store.book_names():
+        os.remove(os.path.join(str(tmp_path), store.segment_name(book_name) + SIGNATURES_SUFFIX))
+    store.load_catalog()
+    assert store.deduplicate()["compared_books"] == 3
+    assert np.array_equal(store.duplicate_chunks, incremental_chunks)
+
+def test_changed_book_is_compared_again(tmp_path):
+    store = KnowledgeStore(str(tmp_path))
+    pages = random_pages(4)
+    write_book(store, "a.pdf", pages)
+    write_book(store, "b.pdf", pages)
+    store.save_catalog(["a.pdf", "b.pdf"])
+    store.deduplicate()
+    assert store.duplicate_pages[6:].all()
+    
+    write_book(store, "b.pdf", random_pages(5))
+    store.save_catalog(["a.pdf", "b.pdf"])
+    stats = store.deduplicate()
+    assert stats["compared_books"] == 1
+    assert not store.duplicate_pages.any()
+    
+    store.clear_duplicates()
+    assert not store.deduplicated
+
+def test_library_scan_order_is_stable(tmp_path):
+    library = tmp_path / "biblioteca"
+    for name in ("pediatria/urgencias.pdf", "b.txt", "pediatria/a.epub", "A.pdf", "notas.doc"):
+        (library / name).parent.mkdir(parents=True, exist_ok=True)
+        (library / name).write_text("")
+    
+    books = BookProcessor(str(library)).scan_library()
+    assert [os.path.relpath(book, str(library)) for book in books] == [
+        "A.pdf", "b.txt", os.path.join("pediatria", "a.epub"), os.path.join("pediatria", "urgencias.pdf")]
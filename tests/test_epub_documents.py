@@ -0,0 +1,25 @@
+import zipfile
+
+from book_processor.processor import BookProcessor
+
+CONTAINER_XML = ('<?xml version="1.0"?><container version="1.0" '
+                 'xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+                 '<rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>'
+                 '</rootfiles></container>')
+
+PACKAGE = ('<?xml version="1.0"?><package xmlns="http://www.idpf.org/2007/opf" version="3.0">'
+           '<manifest><item id="nav" href="nav.xhtml" media-type="application/xhtml+xml"/>'
+           '<item id="cap2" href="texto/cap2.xhtml" media-type="application/xhtml+xml"/>'
+           '<item id="cap1" href="texto/cap1.xhtml" media-type="application/xhtml+xml"/>'
+           '<item id="capa" href="capa.jpg" media-type="image/jpeg"/></manifest>'
+           '<spine><itemref idref="cap1"/><itemref idref="cap2"/></spine></package>')
+
+def test_documents_follow_the_spine(tmp_path):
+    path = tmp_path / "livro.epub"
+    with zipfile.ZipFile(path, "w") as epub_file:
+        epub_file.writestr("META-INF/container.xml", CONTAINER_XML)
+        epub_file.writestr("OEBPS/content.opf", PACKAGE)
+    
+    with zipfile.ZipFile(path) as epub_file:
+        documents = BookProcessor(str(tmp_path)).list_epub_documents(epub_file)
+    assert documents == ["OEBPS/texto/cap1.xhtml", "OEBPS/texto/cap2.xhtml"]
@@ -0,0 +1,44 @@
+from book_processor.html_text import html_to_text
+
+CHAPTER = """<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:svg="http://www.w3.org/2000/svg">
+<head><title>Capítulo 3</title><style>p { margin: 0 }</style></head>
+<body>
+<H2>Febre em lactentes</H2>
+<p class="texto">Temperatura &gt; 38&#176;C em menores de 3 meses
+exige <em>avaliação</em>&nbsp;imediata.</p>
+<script type="text/javascript">if (a < b) { nota = "</p>"; }</script>
+<svg:svg><svg:text>Figura 3.1</svg:text></svg:svg>
+<Div>Dose: 10 a 15 mg/kg<BR/>a cada 6 horas</Div>
+<table><tr><td>5 kg</td><td>50 mg</td></tr><tr><TD>10 kg</TD><TD>100 mg</TD></tr></table>
+<!-- nota do editor: <p>revisar</p> -->
+<p>Código <![CDATA[<b>literal</b>]]> &amp; fim.</p>
+</body>
+</html>"""
+
+def test_chapter_text_keeps_paragraphs_and_drops_non_content():
+    assert html_to_text(CHAPTER.encode("utf-8")) == (
+        "Febre em lactentes\n\n"
+        "Temperatura > 38°C em menores de 3 meses exige avaliação imediata.\n\n"
+        "Dose: 10 a 15 mg/kg\n"
+        "a cada 6 horas\n\n"
+        "5 kg 50 mg\n"
+        "10 kg 100 mg\n\n"
+        "Código <b>literal</b> & fim.\n"
+    )
+
+def test_tag_names_are_case_insensitive():
+    assert html_to_text("<Div>a</Div><dIV>b</dIV><P>c</P><p>d</p>") == "a\nb\n\nc\n\nd\n"
+    assert html_to_text("<HEAD><TITLE>x</TITLE></HEAD><Script>y</Script><p>z</p>") == "z\n"
+
+def test_similar_tag_names_are_not_structure():
+    assert html_to_text("<p>a<param name='x'/>b<span>c</span></p>") == "abc\n"
+    assert html_to_text("<p>a<script src='js/nota.js'/>b</p>") == "ab\n"
+
+def test_empty_document():
+    assert html_to_text("") == "\n"
+    assert html_to_text("<html><body> </body></html>") == "\n"
+
+def test_unclosed_script_keeps_the_rest_of_the_document():
+    assert html_to_text("<p>a<script>b</p><p>c</p><style>p {}</style><p>d</p>") == "ab\n\nc\n\nd\n"
@@ -0,0 +1,53 @@
+import os
+
+from book_processor.chunker import TextChunker
+from book_processor.knowledge_store import KnowledgeStore
+from book_processor.manifest import LibraryManifest
+from book_processor.page_cache import PageCache
+from book_processor.processor import BookProcessor, PageRecord
+
+TEXT = ("A bronquiolite viral aguda é a principal causa de internação de lactentes. "
+        "O tratamento é de suporte, com hidratação e oxigênio quando necessário.\n") * 40
+
+def test_cache_file_is_removed_once_the_book_is_in_the_store(tmp_path, monkeypatch):
+    library = tmp_path / "biblioteca"
+    library.mkdir()
+    for name in ("pediatria.txt", "urgencias.txt"):
+        (library / name).write_text(TEXT + name, encoding="utf-8")
+    
+    hashed = []
+    hash_file = LibraryManifest.hash_file
+    monkeypatch.setattr(LibraryManifest, "hash_file", staticmethod(lambda path: hashed.append(path) or hash_file(path)))
+    
+    kb_dir = tmp_path / "kb"
+    manifest = LibraryManifest(str(kb_dir / "manifest.json"), "1")
+    page_cache = PageCache(str(kb_dir / "page_cache"), "1", hash_file=manifest.file_hash)
+    processor = BookProcessor(str(library), chunker=TextChunker(), page_cache=page_cache)
+    processor.resources_checked = True
+    store = KnowledgeStore(str(kb_dir / "store"))
+    books = processor.scan_library()
+    changed, _ = manifest.diff(str(library), books)
+    
+    def book_saved(book_path):
+        manifest.update(str(library), book_path, os.path.basename(book_path))
+    
+    processor.process_books(changed, store=store, book_saved=book_saved)
+    
+    assert os.listdir(page_cache.cache_dir) == []
+    assert sorted(hashed) == sorted(books)
+    store.save_catalog([os.path.basename(book_path) for book_path in books])
+    assert store.page_text("pediatria.txt", 1).startswith("A bronquiolite")
+
+def test_interrupted_book_keeps_its_cache(tmp_path):
+    book = tmp_path / "pediatria.txt"
+    book.write_text(TEXT, encoding="utf-8")
+    page_cache = PageCache(str(tmp_path / "page_cache"), "1")
+    
+    entry = page_cache.open(str(book))
+    entry.append(PageRecord("pediatria.txt", 1, "Primeira página"))
+    entry.close()
+    
+    entry = page_cache.open(str(book))
+    assert entry.pages == 1 and not entry.complete
+    page_cache.discard(str(book))
+    assert os.listdir(page_cache.cache_dir) == []
@@ -0,0 +1,76 @@
+from book_processor.relevance import RelevanceScorer, INDEX_LINE_PATTERN
+
+DOSE_TABLE = """Paracetamol: dose por peso (10 a 15 mg/kg por dose, a cada 6 horas)
+Peso (kg)    Dose (mg)    Gotas (200 mg/mL)
+5 kg         50 mg        5 gotas
+10 kg        100 mg       10 gotas
+15 kg        150 mg       15 gotas
+20 kg        200 mg       20 gotas
+25 kg        250 mg       25 gotas
+30 kg        300 mg       30 gotas
+Dose máxima diária: 75 mg/kg/dia, sem ultrapassar 4 g/dia
+"""
+
+VITALS_TABLE = """Sinais vitais normais por faixa etária
+Idade           FC (bpm)     FR (irpm)    PAS (mmHg)
+Recém-nascido   100-160      30-60        60-90
+1-12 meses      100-150      25-50        70-100
+1-3 anos        90-140       20-30        80-110
+4-6 anos        80-120       20-25        90-110
+7-12 anos       70-110       16-22        90-120
+Adolescente     60-100       12-20        100-130
+Saturação de oxigênio esperada acima de 95%
+"""
+
+INDEX_PAGE = """Índice remissivo
+Asma, 120, 135-140
+Bronquiolite, 88
+Febre, 12, 45; 67
+Meningite ........ 230
+Otite média . . . . 150
+Pneumonia, 201-210
+Sepse, 305
+"""
+
+PROSE = """A bronquiolite viral aguda é a principal causa de internação de lactentes no
+primeiro ano de vida. O quadro clínico começa com coriza e febre baixa, evoluindo
+com tosse, taquipneia e sibilância. O diagnóstico é clínico e o tratamento é de
+suporte, com hidratação, oxigenoterapia quando a saturação estiver abaixo de 92%
+e monitorização dos sinais de desconforto respiratório. Lactentes com menos de
+três meses, prematuros e cardiopatas têm maior risco de evolução grave.
+"""
+
+SHORT_DOSE_PAGE = """Conduta
+Amoxicilina 50 mg/kg/dia VO 12/12 h por 10 dias
+Dose máxima: 1,5 g/dia
+"""
+
+def test_dose_table_is_kept():
+    assert RelevanceScorer().keep(DOSE_TABLE)
+
+def test_vital_signs_table_is_kept():
+    assert RelevanceScorer().keep(VITALS_TABLE)
+
+def test_short_dosing_page_is_kept():
+    scorer = RelevanceScorer()
+    assert scorer.keep(SHORT_DOSE_PAGE)
+    assert scorer.score(SHORT_DOSE_PAGE) < scorer.score(DOSE_TABLE)
+
+def test_prose_is_kept():
+    assert RelevanceScorer().keep(PROSE)
+
+def test_index_page_is_pruned():
+    assert not RelevanceScorer().keep(INDEX_PAGE)
+
+def test_table_rows_are_not_index_lines():
+    for line in DOSE_TABLE.splitlines() + VITALS_TABLE.splitlines():
+        assert not INDEX_LINE_PATTERN.search(line), line
+
+def test_index_lines_need_leader_dots_or_page_list():
+    assert INDEX_LINE_PATTERN.search("Meningite ........ 230")
+    assert INDEX_LINE_PATTERN.search("Otite média . . . . 150")
+    assert INDEX_LINE_PATTERN.search("Asma, 120, 135-140")
+    assert not INDEX_LINE_PATTERN.search("Frequência cardíaca do lactente 120")
+
+def test_page_headers_are_pruned():
+    assert not RelevanceScorer().keep("Capítulo 3")
@@ -0,0 +1,32 @@
+import os
+
+from book_processor.chunker import TextChunker
+from book_processor.processor import PageRecord
+from book_processor.knowledge_store import KnowledgeStore
+from retrieval.snapshot import IndexSnapshot
+
+def build_store(kb_dir, pages):
+    store = KnowledgeStore(os.path.join(kb_dir, "store"))
+    records = (PageRecord("a.pdf", page, text + "\n") for page, text in enumerate(pages, 1))
+    store.write_segment("a.pdf", records, TextChunker(max_tokens=64, overlap_tokens=8))
+    store.save_catalog(["a.pdf"])
+    return store
+
+def test_saving_keeps_the_open_snapshot_until_pruned(tmp_path):
+    kb_dir = str(tmp_path)
+    store = build_store(kb_dir, ["Febre em lactentes exige avaliação imediata."])
+    snapshot = IndexSnapshot(kb_dir)
+    snapshot.build(store)
+    first_dir = snapshot.snapshot_dir
+    opened = snapshot.load(store)
+    
+    store = build_store(kb_dir, ["Bronquiolite em lactentes: hidratação e oxigênio."])
+    snapshot.build(store)
+    assert snapshot.snapshot_dir != first_dir
+    assert os.path.isdir(first_dir)
+    assert opened.search("febre")[0][1]["text"].startswith("Febre")
+    assert snapshot.load(store).search("bronquiolite")[0][1]["text"].startswith("Bronquiolite")
+    
+    snapshot.prune()
+    assert not os.path.exists(first_dir)
+    assert IndexSnapshot(kb_dir).is_valid()
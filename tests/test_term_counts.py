@@ -0,0 +1,69 @@
+import os
+import random
+
+import numpy as np
+
+from book_processor.chunker import TextChunker
+from book_processor.processor import PageRecord
+from book_processor.knowledge_store import KnowledgeStore
+from retrieval.bm25 import BM25Index
+from retrieval.term_counts import TermCounts
+from retrieval.vectors import VectorIndex
+
+WORDS = ("Febre tosse dispneia sibilâncias taquipneia hidratação oxigênio saturação lactentes crianças "
+         "antibióticos dose peso diagnóstico exames radiografia hemograma internação alta e de com "
+         "bronquiolite pneumonia asma otites sepse meningite vacinas calendário consulta retorno").split()
+
+def write_book(store, book_name, seed, count=5):
+    rng = random.Random(seed)
+    pages = [" ".join(rng.choice(WORDS) for _ in range(150)) + "." for _ in range(count)]
+    records = (PageRecord(book_name, page, text + "\n") for page, text in enumerate(pages, 1))
+    store.write_segment(book_name, records, TextChunker(max_tokens=64, overlap_tokens=8))
+    return pages
+
+def build_store(kb_dir):
+    store = KnowledgeStore(os.path.join(kb_dir, "store"))
+    write_book(store, "a.pdf", 1)
+    write_book(store, "b.pdf", 1)
+    write_book(store, "c.pdf", 2)
+    store.save_catalog(["a.pdf", "b.pdf", "c.pdf"])
+    store.deduplicate()
+    return store
+
+def test_indexes_from_term_counts_match_indexes_from_text(tmp_path):
+    kb_dir = str(tmp_path)
+    store = build_store(kb_dir)
+    term_counts = TermCounts(kb_dir).collect(store)
+    assert len(term_counts) == len(store) < store._chunk_offsets[-1]
+    
+    expected = BM25Index().build(store.iter_chunks(), documents=store)
+    bm25 = BM25Index().build_from_terms(term_counts, documents=store)
+    assert list(bm25.terms) == list(expected.terms)
+    for name in ("posting_offsets", "doc_ids", "counts", "length_norms"):
+        assert np.array_equal(getattr(bm25, name), getattr(expected, name)), name
+    assert bm25.search("febre em lactentes")[0][1]["id"] == expected.search("febre em lactentes")[0][1]["id"]
+    
+    os.makedirs(os.path.join(kb_dir, "text"))
+    expected = VectorIndex(block_rows=7).build(store.iter_chunks(), os.path.join(kb_dir, "text"), documents=store)
+    vectors = VectorIndex(block_rows=7).build_from_terms(term_counts, kb_dir, documents=store)
+    assert np.allclose(vectors.idf, expected.idf)
+    assert np.allclose(vectors.matrix, expected.matrix, atol=1e-6)
+
+def test_only_changed_books_are_tokenized(tmp_path):
+    kb_dir = str(tmp_path)
+    store = build_store(kb_dir)
+    assert TermCounts(kb_dir).collect(store).tokenized_books == 3
+    
+    write_book(store, "c.pdf", 3)
+    write_book(store, "d.pdf", 4)
+    store.remove_segment("b.pdf")
+    store.save_catalog(["a.pdf", "c.pdf", "d.pdf"])
+    store.deduplicate()
+    term_counts = TermCounts(kb_dir).collect(store)
+    assert term_counts.tokenized_books == 2
+    assert sorted(os.listdir(term_counts.cache_dir)) == ["a.pdf.npz", "c.pdf.npz", "d.pdf.npz"]
+    
+    expected = BM25Index().build(store.iter_chunks(), documents=store)
+    bm25 = BM25Index().build_from_terms(term_counts, documents=store)
+    assert np.array_equal(bm25.doc_ids, expected.doc_ids)
+    assert np.array_equal(bm25.length_norms, expected.length_norms)
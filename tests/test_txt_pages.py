@@ -0,0 +1,24 @@
+from book_processor.processor import BookProcessor, TXT_PAGE_CHARS
+
+LINE = "Lactentes com bronquiolite: hidratação, oxigênio se saturação abaixo de 90%.\n"
+
+def test_text_file_is_read_in_bounded_groups_of_lines(tmp_path):
+    text = LINE * (3 * TXT_PAGE_CHARS // len(LINE)) + "última linha sem quebra"
+    book = tmp_path / "pediatria.txt"
+    book.write_bytes(text.encode("utf-8"))
+    processor = BookProcessor(str(tmp_path))
+    processor.text_decoder.block_size = 4096
+    
+    records = list(processor.iter_book(str(book)))
+    assert len(records) == 4
+    assert [record.page for record in records] == [1, 2, 3, 4]
+    assert "".join(record.text for record in records) == text
+    assert all(len(record.text) <= TXT_PAGE_CHARS and record.text.endswith("\n") for record in records[:-1])
+    
+    # A retomada começa no primeiro registro ausente
+    assert list(processor.iter_book(str(book), 2)) == records[2:]
+
+def test_empty_text_file_has_one_empty_record(tmp_path):
+    book = tmp_path / "vazio.txt"
+    book.write_bytes(b"")
+    assert [record.text for record in BookProcessor(str(tmp_path)).iter_book(str(book))] == [""]